@@ -17,6 +17,18 @@ def create_app(config_class=Config):
     cache.init_app(app)
     CORS(app)
     
+    from app.services.audit_pipeline_service import audit_pipeline
+    audit_pipeline.init_app(app)
+    
+    from app.services.traceability_service import TraceabilityService
+    TraceabilityService.init_app(app)
+    
+    from app.services.report_job_service import report_jobs
+    report_jobs.init_app(app)
+    
+    from app.services.test_management_service import TestManagementService
+    TestManagementService.init_app(app)
+    
     # Register blueprints
     from app.api.auth import auth_bp
     from app.api.validation import validation_bp
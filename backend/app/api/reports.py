@@ -1,17 +1,19 @@
 """Reports API endpoints"""
-from flask import Blueprint, request, jsonify, send_file
+import itertools
+from flask import Blueprint, Response, request, jsonify, send_file, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.services.report_service import ReportService
-import json
-import io
+from app.services.report_job_service import report_jobs
+from app.services.report_export_service import ReportExportService
 
 reports_bp = Blueprint('reports', __name__)
 
 @reports_bp.route('/projects/<project_id>/reports/validation-summary', methods=['GET'])
 @jwt_required()
 def get_validation_summary(project_id):
-    """Get validation summary report"""
-    report = ReportService.generate_validation_summary(project_id)
+    """Get validation summary report (add ?include_tests=true for per-test rows)"""
+    include_tests = request.args.get('include_tests', 'false').lower() == 'true'
+    report = ReportService.generate_validation_summary(project_id, include_tests=include_tests)
     
     if not report:
         return jsonify({'error': 'Project not found'}), 404
@@ -35,45 +37,91 @@ def get_deviation_report(project_id):
 @reports_bp.route('/projects/<project_id>/reports/audit-package', methods=['GET'])
 @jwt_required()
 def get_audit_package(project_id):
-    """Get complete audit package"""
-    package = ReportService.generate_audit_package(project_id)
-    return jsonify(package), 200
+    """Get complete audit package (202 with a job while it is being rendered)"""
+    job = report_jobs.submit(project_id, 'audit_package', get_jwt_identity())
+    artifact = report_jobs.get_artifact(job)
+    if artifact:
+        return send_file(artifact, mimetype='application/json')
+    
+    return jsonify({'job': job.to_dict(), 'status_url': f'/reports/jobs/{job.id}'}), 202
+
+@reports_bp.route('/projects/<project_id>/reports/jobs', methods=['POST'])
+@jwt_required()
+def submit_report_job(project_id):
+    """Render a report in the background; progress is pushed as 'report_job_progress'"""
+    data = request.get_json() or {}
+    try:
+        job = report_jobs.submit(project_id, data.get('report_type', 'audit_package'), get_jwt_identity())
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify({'job': job.to_dict()}), 202
+
+@reports_bp.route('/reports/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_report_job(job_id):
+    """Poll a report job"""
+    job = report_jobs.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    
+    return jsonify({'job': job.to_dict()}), 200
+
+@reports_bp.route('/reports/jobs/<job_id>/download', methods=['GET'])
+@jwt_required()
+def download_report_job(job_id):
+    """Download a finished report"""
+    job = report_jobs.get_job(job_id)
+    if not job:
+        return jsonify({'error': 'Report job not found'}), 404
+    if job.status != 'completed':
+        return jsonify({'error': f'Report job is {job.status}', 'job': job.to_dict()}), 409
+    
+    artifact = report_jobs.get_artifact(job)
+    if not artifact:
+        return jsonify({'error': 'Report artifact has been superseded; submit the report again'}), 410
+    
+    return send_file(
+        artifact,
+        mimetype='application/json',
+        as_attachment=True,
+        download_name=f'{job.report_type}_{job.project_id}.json'
+    )
 
 @reports_bp.route('/projects/<project_id>/reports/export', methods=['POST'])
 @jwt_required()
 def export_report(project_id):
-    """Export report to PDF/Excel"""
-    data = request.get_json()
+    """Export report as a streamed download (json, ndjson, csv, xlsx)"""
+    data = request.get_json() or {}
     report_type = data.get('report_type', 'validation_summary')
-    export_format = data.get('format', 'json')  # json, pdf, excel
+    export_format = data.get('format', 'json')  # json, ndjson, csv, xlsx (excel), pdf
+    if export_format == 'excel':
+        export_format = 'xlsx'
+    
+    if export_format == 'pdf':
+        # PDF rendering is not implemented yet
+        return jsonify({
+            'message': 'PDF export initiated',
+            'download_url': f'/downloads/{project_id}_{report_type}.pdf'
+        }), 200
     
-    # Generate report
-    if report_type == 'validation_summary':
-        report = ReportService.generate_validation_summary(project_id)
-    elif report_type == 'traceability':
-        report = ReportService.generate_traceability_report(project_id)
-    elif report_type == 'deviations':
-        report = ReportService.generate_deviation_report(project_id)
-    elif report_type == 'audit_package':
-        report = ReportService.generate_audit_package(project_id)
-    else:
-        return jsonify({'error': 'Invalid report type'}), 400
+    try:
+        export = ReportExportService.export(project_id, report_type, export_format)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
-    if export_format == 'json':
-        # Return JSON
-        output = io.BytesIO()
-        output.write(json.dumps(report, indent=2).encode())
-        output.seek(0)
-        
-        return send_file(
-            output,
-            mimetype='application/json',
-            as_attachment=True,
-            download_name=f'{report_type}_{project_id}.json'
-        )
+    # Run the queries up to the first chunk now, so a failing report is an error status
+    # rather than a 200 with a truncated body
+    chunks = export['chunks']
+    try:
+        first_chunk = next(chunks, b'')
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
     
-    # For PDF/Excel, return placeholder
-    return jsonify({
-        'message': f'{export_format.upper()} export initiated',
-        'download_url': f'/downloads/{project_id}_{report_type}.{export_format}'
-    }), 200
\ No newline at end of file
+    return Response(
+        stream_with_context(itertools.chain([first_chunk], chunks)),
+        mimetype=export['mimetype'],
+        headers={'Content-Disposition': f"attachment; filename={export['filename']}"}
+    )
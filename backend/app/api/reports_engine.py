@@ -1,7 +1,8 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from functools import wraps
 import json
 from reports_engine_service import ReportsEngineService
+from app.services.compliance_rollup_service import ComplianceRollupService
 
 reports_bp = Blueprint('reports', __name__, url_prefix='/api/reports')
 
@@ -54,6 +55,7 @@ def generate_report(scope_id):
             content_data=data.get('content'),
             generated_by=request.headers.get('User-ID')
         )
+        ComplianceRollupService.record_generated(report)
         return jsonify({'report': report}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -71,13 +73,23 @@ def generate_rtm(scope_id):
     """Generate requirement traceability matrix"""
     try:
         data = request.get_json()
-        rtm_records = ReportsEngineService.build_requirement_traceability_matrix(
+        rtm_records = ReportsEngineService.iter_requirement_traceability_matrix(
             validation_scope_id=scope_id,
             requirements=data.get('requirements'),
             test_cases=data.get('test_cases'),
             test_results=data.get('test_results')
         )
-        return jsonify({'rtm_records': rtm_records, 'total': len(rtm_records)}), 201
+        
+        def generate():
+            # Same body as jsonify({'rtm_records': [...], 'total': n}), written record by record
+            total = 0
+            yield '{"rtm_records": ['
+            for record in rtm_records:
+                yield (',' if total else '') + json.dumps(record)
+                total += 1
+            yield '], "total": %d}' % total
+        
+        return Response(stream_with_context(generate()), status=201, mimetype='application/json')
     except Exception as e:
         return jsonify({'error': str(e)}), 400
 
@@ -144,6 +156,7 @@ def approve_report(report_id):
             approved_by=request.headers.get('User-ID'),
             approval_notes=data.get('notes')
         )
+        ComplianceRollupService.record_approved(report_id, approval['approved_at'])
         return jsonify({'approval': approval}), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 400
@@ -178,12 +191,16 @@ def get_schedule(schedule_id):
 @require_auth
 def get_compliance_dashboard(scope_id):
     """Get real-time compliance dashboard metrics"""
-    dashboard = ReportsEngineService.get_compliance_dashboard(
-        scope_id=scope_id,
-        reports=[]
-    )
+    dashboard = ComplianceRollupService.get_dashboard(scope_id)
     return jsonify({'dashboard': dashboard}), 200
 
+@reports_bp.route('/scopes/<scope_id>/trends', methods=['GET'])
+@require_auth
+def get_report_trends(scope_id):
+    """Get compliance trend over the scope's recent reports"""
+    trends = ComplianceRollupService.get_trends(scope_id)
+    return jsonify({'trends': trends}), 200
+
 # Health Check
 @reports_bp.route('/health', methods=['GET'])
 def health_check():
@@ -4,6 +4,8 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from app import db
 from app.models.test_management import TestPlan, TestSet, TestCase, TestStep, TestExecution, TestStepResult
 from app.models.user import User
+from app.services.test_management_service import TestManagementService
+from app.services.deviation_index_service import DeviationIndexService
 from datetime import datetime
 import uuid
 
@@ -337,36 +339,52 @@ def record_step_result(execution_id, step_id):
     try:
         data = request.get_json()
         
-        execution = TestExecution.query.get(execution_id)
-        if not execution:
-            return jsonify({'error': 'Test execution not found'}), 404
-        
-        result = TestStepResult(
-            id=str(uuid.uuid4()),
-            execution_id=execution_id,
-            step_id=step_id,
-            status=data.get('status'),
-            actual_result=data.get('actual_result'),
-            notes=data.get('notes'),
-            duration_seconds=data.get('duration_seconds'),
-            screenshot_urls=data.get('screenshot_urls', [])
-        )
-        
-        db.session.add(result)
+        results = TestManagementService.record_step_results(execution_id, [{
+            'step_id': step_id,
+            'status': data.get('status'),
+            'actual_result': data.get('actual_result'),
+            'notes': data.get('notes'),
+            'duration_seconds': data.get('duration_seconds'),
+            'screenshots': data.get('screenshot_urls', [])
+        }], track_totals=False)
         
-        # Update execution counts
-        if data.get('status') == 'PASS':
-            execution.passed_steps += 1
-        elif data.get('status') == 'FAIL':
-            execution.failed_steps += 1
+        return jsonify({
+            'message': 'Step result recorded',
+            'result_id': results[0].id
+        }), 201
         
-        db.session.commit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@tests_bp.route('/executions/<execution_id>/steps', methods=['POST'])
+@jwt_required()
+def record_step_results(execution_id):
+    """Record results for many test steps at once (offline sync)"""
+    try:
+        data = request.get_json()
+        items = data.get('results') or []
+        if not items or any(not item.get('step_id') or not item.get('status') for item in items):
+            return jsonify({'error': 'results must be a non-empty list of {step_id, status, ...}'}), 400
+        
+        results = TestManagementService.record_step_results(execution_id, [{
+            'step_id': item['step_id'],
+            'status': item['status'],
+            'actual_result': item.get('actual_result'),
+            'notes': item.get('notes'),
+            'duration_seconds': item.get('duration_seconds'),
+            'screenshots': item.get('screenshot_urls', [])
+        } for item in items], track_totals=False)
         
         return jsonify({
-            'message': 'Step result recorded',
-            'result_id': result.id
+            'message': f'{len(results)} step results recorded',
+            'result_ids': [result.id for result in results]
         }), 201
         
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 404
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -384,6 +402,8 @@ def complete_test_execution(execution_id):
         
         execution.overall_status = data.get('overall_status', 'PASS')
         execution.comments = data.get('comments')
+        # A FAIL opens the case's deviation and a PASS resolves it, in the same commit
+        DeviationIndexService.record_execution(execution, detected_at=datetime.utcnow())
         
         db.session.commit()
         
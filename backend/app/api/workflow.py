@@ -1,10 +1,13 @@
 """Workflow management API"""
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
+import json
 from app import db
 from app.models.user import User
-from app.models.workflow import WorkflowTask, Notification
-from app.services.workflow_service import WorkflowService
+from app.models.workflow import WorkflowTask, Notification, WorkflowTemplate, WorkflowState, DocumentWorkflowState
+from app.services.workflow_service import WorkflowService, WorkflowStateMachine
+from app.services.sla_scheduler_service import sla_scheduler
+from app.services.workflow_audit_service import WorkflowAuditService
 
 workflow_bp = Blueprint('workflow', __name__)
 
@@ -234,6 +237,62 @@ def execute_state_transition(document_id):
     status_code = 200 if result.get('success') else 400
     return jsonify(result), status_code
 
+@workflow_bp.route('/documents/transitions/bulk', methods=['POST'])
+@jwt_required()
+def execute_bulk_state_transitions():
+    """Execute many workflow transitions in one request (batch approvals)
+    
+    Body: {"transitions": [{"document_id", "to_state_id", "reason"?}, ...], "reason"?}
+    Returns per-document results; failed items do not abort the batch.
+    """
+    user_id = get_jwt_identity()
+    user = User.query.get(user_id)
+    data = request.get_json() or {}
+    
+    items = data.get('transitions')
+    if not isinstance(items, list) or not items:
+        return jsonify({'error': 'transitions must be a non-empty list'}), 400
+    
+    # Resolve each document's template in one query so every template's graph is used once
+    document_ids = list({item.get('document_id') for item in items if item.get('document_id')})
+    template_by_document = dict(
+        db.session.query(DocumentWorkflowState.document_id, WorkflowState.template_id)
+        .join(WorkflowState, DocumentWorkflowState.current_state_id == WorkflowState.id)
+        .filter(DocumentWorkflowState.document_id.in_(document_ids))
+        .all()
+    ) if document_ids else {}
+    
+    items_by_template = {}
+    results = {}
+    for index, item in enumerate(items):
+        template_id = template_by_document.get(item.get('document_id'))
+        if not template_id:
+            results[index] = {'document_id': item.get('document_id'), 'success': False,
+                              'error': 'Document not in workflow'}
+            continue
+        items_by_template.setdefault(template_id, []).append((index, item))
+    
+    for template_id, indexed_items in items_by_template.items():
+        fsm = WorkflowStateMachine(template_id)
+        batch = fsm.execute_transitions_bulk(
+            transitions=[item for _, item in indexed_items],
+            user=user,
+            reason=data.get('reason', ''),
+            ip_address=request.remote_addr,
+            user_agent=request.headers.get('User-Agent')
+        )
+        for (index, _), result in zip(indexed_items, batch['results']):
+            results[index] = result
+    
+    ordered = [results[index] for index in range(len(items))]
+    succeeded = sum(1 for result in ordered if result['success'])
+    return jsonify({
+        'success': succeeded > 0,
+        'succeeded': succeeded,
+        'failed': len(ordered) - succeeded,
+        'results': ordered
+    }), 200
+
 @workflow_bp.route('/documents/<document_id>/approvals', methods=['POST'])
 @jwt_required()
 def add_approval_signature(document_id):
@@ -265,9 +324,40 @@ def get_workflow_audit_trail(document_id):
         return jsonify({'error': 'Document not found'}), 404
     
     fsm = WorkflowStateMachine(doc_state.current_state.template_id)
-    audit_trail = fsm.get_audit_trail(document_id)
+    cursor = request.args.get('cursor')
     
-    return jsonify({'audit_trail': audit_trail}), 200
+    try:
+        if cursor:
+            fsm.decode_audit_cursor(cursor)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    # NDJSON streams the whole trail (from the cursor on) without buffering it
+    if request.args.get('format') == 'ndjson':
+        def generate():
+            for entry in fsm.iter_audit_trail(document_id, cursor=cursor):
+                yield json.dumps(entry) + '\n'
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+    
+    # Paging is opt-in (?limit and/or ?cursor); without either the full trail is returned as before
+    if not cursor and 'limit' not in request.args:
+        return jsonify({'audit_trail': fsm.get_audit_trail(document_id)}), 200
+    
+    limit = request.args.get('limit', current_app.config['PAGINATION_PER_PAGE'], type=int)
+    limit = max(1, min(limit, 1000))
+    page = fsm.get_audit_trail_page(document_id, limit=limit, cursor=cursor)
+    
+    return jsonify(page), 200
+
+@workflow_bp.route('/documents/<document_id>/audit-trail/verify', methods=['POST'])
+@jwt_required()
+def verify_workflow_audit_trail(document_id):
+    """Verify the audit hash chain (incremental from the last checkpoint unless full=true)"""
+    full = request.args.get('full', 'false').lower() == 'true'
+    result = WorkflowAuditService.verify_audit_trail(document_id, full=full, user_id=get_jwt_identity())
+    
+    status_code = 200 if result.get('valid') else 409
+    return jsonify(result), status_code
 
 @workflow_bp.route('/documents/<document_id>/valid-transitions', methods=['GET'])
 @jwt_required()
@@ -281,3 +371,16 @@ def get_valid_transitions(document_id):
     transitions = fsm.get_valid_transitions(doc_state.current_state_id)
     
     return jsonify({'transitions': transitions}), 200
+
+
+@workflow_bp.route('/sla/overdue', methods=['GET'])
+@jwt_required()
+def get_overdue_documents():
+    """Get documents past their SLA deadline (served from the SLA scheduler)"""
+    assigned_to = request.args.get('assigned_to')
+    if request.args.get('mine') == 'true':
+        assigned_to = get_jwt_identity()
+    limit = request.args.get('limit', type=int)
+    
+    overdue = sla_scheduler.get_overdue(assigned_to=assigned_to, limit=limit)
+    return jsonify({'overdue': overdue, 'count': len(overdue)}), 200
@@ -1,6 +1,7 @@
 """Audit trail model for 21 CFR Part 11 compliance"""
 from datetime import datetime
 from app import db
+import hashlib
 import uuid
 
 class AuditLog(db.Model):
@@ -48,4 +49,67 @@ class AuditLog(db.Model):
     user = db.relationship('User', back_populates='audit_logs')
     
     def __repr__(self):
-        return f'<AuditLog {self.user_name} {self.action} {self.entity_type} at {self.timestamp}>'
\ No newline at end of file
+        return f'<AuditLog {self.user_name} {self.action} {self.entity_type} at {self.timestamp}>'
+
+
+class AuditArchivePartition(db.Model):
+    """Catalog of audit rows moved out of the hot tables into sealed archive files"""
+    __tablename__ = 'audit_archive_partitions'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    table_name = db.Column(db.String(100), nullable=False)
+    period = db.Column(db.String(7), nullable=False)  # YYYY-MM
+    part = db.Column(db.Integer, nullable=False, default=1)
+    file_path = db.Column(db.String(500), nullable=False)  # Relative to AUDIT_ARCHIVE_DIR
+    
+    row_count = db.Column(db.Integer, nullable=False)
+    first_timestamp = db.Column(db.DateTime)
+    last_timestamp = db.Column(db.DateTime)
+    key_min = db.Column(db.Text)  # JSON-encoded entity key range covered by the file
+    key_max = db.Column(db.Text)
+    
+    # Data integrity: file hash, chained across a table's partitions
+    content_hash = db.Column(db.String(64), nullable=False)
+    index_hash = db.Column(db.String(64))  # Hash of the partition's audit_archive_keys rows
+    previous_seal_hash = db.Column(db.String(64))
+    seal_hash = db.Column(db.String(64), nullable=False)
+    
+    status = db.Column(db.String(20), nullable=False, default='purging')  # purging, archived
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.UniqueConstraint('table_name', 'period', 'part', name='uq_audit_archive_partition'),
+    )
+    
+    def calculate_seal(self):
+        data = (f'{self.table_name}:{self.period}:{self.part}:{self.content_hash}:'
+                f'{self.row_count}:{self.previous_seal_hash}')
+        if self.index_hash:
+            data += f':{self.index_hash}'
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def __repr__(self):
+        return f'<AuditArchivePartition {self.table_name} {self.period}#{self.part}>'
+
+class AuditArchiveKey(db.Model):
+    """Where one entity's rows sit inside an archive file (one gzip block per entity and partition)"""
+    __tablename__ = 'audit_archive_keys'
+    
+    partition_id = db.Column(db.String(36), db.ForeignKey('audit_archive_partitions.id'), primary_key=True)
+    entity_key = db.Column(db.String(255), primary_key=True)  # JSON-encoded entity key
+    table_name = db.Column(db.String(100), nullable=False)
+    period = db.Column(db.String(7), nullable=False)
+    
+    byte_offset = db.Column(db.BigInteger, nullable=False)
+    byte_length = db.Column(db.Integer, nullable=False)
+    row_count = db.Column(db.Integer, nullable=False)
+    first_timestamp = db.Column(db.DateTime)
+    last_timestamp = db.Column(db.DateTime)
+    block_hash = db.Column(db.String(64), nullable=False)  # SHA-256 of the compressed block
+    
+    __table_args__ = (
+        db.Index('idx_audit_archive_key_lookup', 'table_name', 'entity_key', 'period'),
+    )
+    
+    def __repr__(self):
+        return f'<AuditArchiveKey {self.table_name} {self.entity_key}>'
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""Incremental compliance dashboard rollups"""
+from datetime import datetime
+from app import db
+
+# report_type of the per-scope row that aggregates every report type
+ALL_REPORT_TYPES = '*'
+
+class ComplianceReportEntry(db.Model):
+    """One row per generated report, so events are applied to the rollups exactly once"""
+    __tablename__ = 'compliance_report_entries'
+    __table_args__ = (
+        db.Index('idx_compliance_entry_scope', 'scope_id', 'report_type'),
+    )
+
+    report_id = db.Column(db.String(36), primary_key=True)
+    scope_id = db.Column(db.String(36), nullable=False)
+    report_type = db.Column(db.String(50), nullable=False)  # VSR, RTM, OQ, IQ, PQ
+    status = db.Column(db.String(50))
+    compliance_percentage = db.Column(db.Float, default=0)
+    critical_findings = db.Column(db.Integer, default=0)
+    generated_at = db.Column(db.DateTime, nullable=False)
+    approved_at = db.Column(db.DateTime)
+
+class ComplianceRollup(db.Model):
+    """Running totals per scope and report type, plus a '*' row across all types"""
+    __tablename__ = 'compliance_rollups'
+
+    scope_id = db.Column(db.String(36), primary_key=True)
+    report_type = db.Column(db.String(50), primary_key=True)
+
+    report_count = db.Column(db.Integer, default=0, nullable=False)
+    complete_count = db.Column(db.Integer, default=0, nullable=False)
+    approved_count = db.Column(db.Integer, default=0, nullable=False)
+    no_critical_count = db.Column(db.Integer, default=0, nullable=False)  # Reports without critical findings
+    compliance_sum = db.Column(db.Float, default=0, nullable=False)
+
+    # Latest report by generated_at
+    latest_report_id = db.Column(db.String(36))
+    latest_status = db.Column(db.String(50))
+    latest_generated_at = db.Column(db.DateTime)
+
+    # Last N [generated_at, compliance_percentage] pairs, oldest first
+    recent_compliance = db.Column(db.JSON, default=list)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,29 @@
+"""Indexed projection of failed test executions (open deviations)"""
+from datetime import datetime
+from app import db
+
+class DeviationIndexEntry(db.Model):
+    """One row per test case whose completed execution failed; kept in step by DeviationIndexService"""
+    __tablename__ = 'deviation_index'
+    __table_args__ = (
+        # Deviation reports and open counts read a project's open rows in report order from this index
+        db.Index('idx_deviation_index_open', 'project_id', 'status', 'plan_name', 'test_name'),
+    )
+    
+    test_id = db.Column(db.String(36), db.ForeignKey('test_cases.id', ondelete='CASCADE'), primary_key=True)
+    project_id = db.Column(db.String(36), nullable=False)  # TestPlan.project_id
+    plan_id = db.Column(db.String(36))
+    plan_name = db.Column(db.String(255))
+    
+    # Snapshot of the failed test and the execution that failed it
+    test_name = db.Column(db.String(255))
+    priority = db.Column(db.Integer)  # 1=Critical, 2=High, 3=Medium, 4=Low
+    execution_id = db.Column(db.String(36))
+    executed_by = db.Column(db.String(36))
+    failed_steps = db.Column(db.Integer)
+    comments = db.Column(db.Text)
+    
+    status = db.Column(db.String(20), nullable=False, default='Open')  # Open, Resolved
+    detected_at = db.Column(db.DateTime)
+    resolved_at = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -33,17 +33,67 @@ class FieldAuditLog(db.Model):
         Index('idx_entity', 'entity_type', 'entity_id'),
         Index('idx_user_timestamp', 'user_id', 'change_timestamp'),
         Index('idx_field_change', 'field_name', 'change_timestamp'),
+        Index('idx_entity_chain', 'entity_type', 'entity_id', 'created_at', 'id'),
     )
     
+    @staticmethod
+    def compute_hash(values):
+        """Calculate SHA-256 hash from a dict of column values (used for bulk inserts)."""
+        data = f"{values.get('entity_type')}:{values.get('entity_id')}:{values.get('field_name')}:{values.get('old_value')}:{values.get('new_value')}:{values.get('user_id')}:{values.get('change_timestamp')}:{values.get('previous_hash')}"
+        return hashlib.sha256(data.encode()).hexdigest()
+    
     def calculate_hash(self):
         """Calculate SHA-256 hash for immutability verification."""
-        data = f"{self.entity_type}:{self.entity_id}:{self.field_name}:{self.old_value}:{self.new_value}:{self.user_id}:{self.change_timestamp}:{self.previous_hash}"
-        return hashlib.sha256(data.encode()).hexdigest()
+        return self.compute_hash({
+            'entity_type': self.entity_type,
+            'entity_id': self.entity_id,
+            'field_name': self.field_name,
+            'old_value': self.old_value,
+            'new_value': self.new_value,
+            'user_id': self.user_id,
+            'change_timestamp': self.change_timestamp,
+            'previous_hash': self.previous_hash
+        })
     
     def verify_integrity(self):
         """Verify hash integrity of audit log."""
         return self.change_hash == self.calculate_hash()
 
+class FieldAuditChainHead(db.Model):
+    """Latest hash of each entity's field audit chain (primary-key lookup for chaining)."""
+    __tablename__ = 'field_audit_chain_heads'
+    
+    entity_type = Column(String(100), primary_key=True)
+    entity_id = Column(Integer, primary_key=True)
+    head_hash = Column(String(256), nullable=True)
+    entry_count = Column(Integer, default=0, nullable=False)
+    archived_hash = Column(String(256), nullable=True)  # Last entry moved to the audit archive
+    archived_count = Column(Integer, default=0, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class FieldAuditVerificationRun(db.Model):
+    """Progress and findings of a full field audit trail verification (resumable)."""
+    __tablename__ = 'field_audit_verification_runs'
+    
+    id = Column(Integer, primary_key=True)
+    status = Column(String(50), default='running')  # running, completed, failed
+    started_by = Column(String(100), nullable=True)
+    started_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = Column(DateTime, nullable=True)
+    # Last entity whose chain (and every chain before it in key order) was verified
+    last_entity_type = Column(String(100), nullable=True)
+    last_entity_id = Column(Integer, nullable=True)
+    entities_verified = Column(Integer, default=0)
+    entries_verified = Column(Integer, default=0)
+    broken_entities = Column(Integer, default=0)
+    # Totals per finding reason; broken_links only keeps a capped sample
+    hash_mismatch_count = Column(Integer, default=0)
+    broken_link_count = Column(Integer, default=0)
+    head_mismatch_count = Column(Integer, default=0)
+    broken_links = Column(JSON, default=list)  # capped sample of findings
+    error_message = Column(Text, nullable=True)
+
 class ChangeRequest(db.Model):
     """Change management system with workflow integration."""
     __tablename__ = 'change_requests'
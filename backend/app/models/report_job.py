@@ -0,0 +1,51 @@
+"""Background report job models"""
+from datetime import datetime
+from app import db
+import uuid
+
+class ReportJob(db.Model):
+    """A report rendered off the request path; the artifact lives in REPORT_CACHE_DIR"""
+    __tablename__ = 'report_jobs'
+    __table_args__ = (
+        db.Index('idx_report_job_lookup', 'project_id', 'report_type', 'data_version'),
+    )
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    project_id = db.Column(db.String(36), nullable=False)
+    report_type = db.Column(db.String(50), nullable=False)  # validation_summary, traceability, deviations, audit_package
+    data_version = db.Column(db.String(64), nullable=False)  # Fingerprint of the data the report reads
+    
+    # Progress
+    status = db.Column(db.String(20), default='queued')  # queued, running, completed, failed
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    stage = db.Column(db.String(100))
+    
+    # Result
+    artifact_path = db.Column(db.String(500))
+    artifact_size = db.Column(db.Integer)
+    cache_hit = db.Column(db.Boolean, default=False)
+    error_message = db.Column(db.Text)
+    
+    # Metadata
+    requested_by = db.Column(db.String(36))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'project_id': self.project_id,
+            'report_type': self.report_type,
+            'data_version': self.data_version,
+            'status': self.status,
+            'progress': self.progress,
+            'stage': self.stage,
+            'cache_hit': self.cache_hit,
+            'artifact_size': self.artifact_size,
+            'error_message': self.error_message,
+            'requested_by': self.requested_by,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
@@ -1,31 +1,60 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
-from . import db
+from app import db
 
 class Report(db.Model):
     __tablename__ = 'reports'
     id = Column(Integer, primary_key=True)
-    report_name = Column(String(255), nullable=False)
-    report_type = Column(String(100), nullable=False)
-    template = Column(JSON)
-    data = Column(JSON)
-    created_by_id = Column(Integer, ForeignKey('user.id'))
+    template_id = Column(Integer, nullable=False)
+    created_by_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    filters = Column(Text)
+    status = Column(String(50), default='PENDING')
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ReportSchedule(db.Model):
     __tablename__ = 'report_schedules'
+    __table_args__ = (
+        Index('idx_schedules_next_run', 'next_run_time'),
+        Index('idx_schedules_due', 'is_active', 'next_run_time'),
+    )
     id = Column(Integer, primary_key=True)
     report_id = Column(Integer, ForeignKey('reports.id'))
-    frequency = Column(String(50))
-    next_run = Column(DateTime)
+    created_by_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    frequency = Column(String(20), nullable=False)  # DAILY, WEEKLY, MONTHLY, QUARTERLY, ANNUALLY
+    next_run_time = Column(DateTime, nullable=False)
+    last_executed_at = Column(DateTime)
+    is_active = Column(Boolean, default=True)
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    # What to generate (see ReportJobManager report types)
+    project_id = Column(String(36))
+    report_type = Column(String(50))
+    anchor_time = Column(DateTime)  # First occurrence; monthly runs keep its day of month
+    
+    # Claim held by a scheduler instance while the run is in progress
+    locked_by = Column(String(100))
+    locked_at = Column(DateTime)
+    last_status = Column(String(50))
+    
+    executions = relationship('ReportExecution', backref='schedule', lazy='dynamic')
 
 class ReportExecution(db.Model):
     __tablename__ = 'report_executions'
+    __table_args__ = (
+        Index('idx_executions_status', 'status'),
+        Index('idx_executions_schedule', 'schedule_id', 'started_at'),
+    )
     id = Column(Integer, primary_key=True)
-    report_id = Column(Integer, ForeignKey('reports.id'))
-    status = Column(String(50))
-    output_format = Column(String(50))
-    file_path = Column(String(500))
-    executed_at = Column(DateTime, default=datetime.utcnow)
+    schedule_id = Column(Integer, ForeignKey('report_schedules.id'), nullable=False)
+    executed_by_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    status = Column(String(50), nullable=False)  # COMPLETED, FAILED
+    started_at = Column(DateTime, nullable=False)
+    completed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    scheduled_for = Column(DateTime)
+    missed_runs = Column(Integer, default=0)  # Occurrences skipped while no scheduler was running
+    report_job_id = Column(String(36))  # Shared by schedules whose runs were coalesced
+    error_message = Column(Text)
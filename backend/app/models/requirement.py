@@ -44,8 +44,36 @@ class Requirement(db.Model):
 class RequirementTestMapping(db.Model):
     """Traceability matrix mapping"""
     __tablename__ = 'requirement_test_mapping'
+    __table_args__ = (
+        db.Index('idx_requirement_test_mapping_requirement', 'requirement_id'),
+        db.Index('idx_requirement_test_mapping_test_case', 'test_case_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id'), nullable=False)
     test_case_id = db.Column(db.String(36), db.ForeignKey('test_cases.id'), nullable=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
\ No newline at end of file
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class ProjectTraceabilityEntry(db.Model):
+    """Materialized RTM row: one per requirement, kept current by TraceabilityService"""
+    __tablename__ = 'project_traceability_entries'
+    __table_args__ = (
+        db.Index('idx_project_traceability_project', 'project_id', 'requirement_key'),
+    )
+    
+    requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id', ondelete='CASCADE'), primary_key=True)
+    project_id = db.Column(db.String(36), db.ForeignKey('validation_projects.id', ondelete='CASCADE'), nullable=False)
+    
+    # Requirement snapshot
+    requirement_key = db.Column(db.String(50), nullable=False)  # Requirement.requirement_id
+    title = db.Column(db.String(255))
+    criticality = db.Column(db.String(20))
+    requirement_status = db.Column(db.String(50))
+    
+    # Linked tests
+    test_cases = db.Column(db.JSON)  # [{id, name, status}]
+    test_count = db.Column(db.Integer, default=0)
+    active_test_count = db.Column(db.Integer, default=0)
+    coverage = db.Column(db.String(20))  # Complete, Gap
+    
+    refreshed_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Text, Enum, Float, ForeignKey
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Text, Enum, Float, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import enum
@@ -61,6 +61,25 @@ class ComprehensiveAuditLog(db.Model):
     checksum = Column(String(256), nullable=False, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        Index('idx_comprehensive_audit_time_type', 'timestamp', 'audit_type'),
+        Index('idx_comprehensive_audit_time_user', 'timestamp', 'user_id'),
+        Index('idx_comprehensive_audit_time_entity', 'timestamp', 'entity_type'),
+    )
+    
+class ComprehensiveAuditDailyRollup(db.Model):
+    __tablename__ = 'comprehensive_audit_daily_rollups'
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, nullable=False)
+    facet = Column(String(50), nullable=False)  # total, audit_type, user, entity_type
+    facet_value = Column(String(255), nullable=False, default='')
+    record_count = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        UniqueConstraint('day', 'facet', 'facet_value', name='uq_comprehensive_audit_rollup'),
+    )
+    
 class SystemHealthMetric(db.Model):
     __tablename__ = 'system_health_metrics'
     id = Column(Integer, primary_key=True)
@@ -33,7 +33,7 @@ class TestCase(db.Model):
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     plan_id = db.Column(db.String(36), db.ForeignKey('test_plans.id'), nullable=False)
     set_id = db.Column(db.String(36), db.ForeignKey('test_sets.id'))
-    requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id'))
+    requirement_id = db.Column(db.String(36), db.ForeignKey('requirements.id'), index=True)
     
     name = db.Column(db.String(255), nullable=False)
     description = db.Column(db.Text)
@@ -42,6 +42,7 @@ class TestCase(db.Model):
     priority = db.Column(db.Integer, default=3)  # 1=Critical, 2=High, 3=Medium, 4=Low
     status = db.Column(db.String(50), default='Draft')  # Draft, Active, Deprecated
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     test_steps = db.relationship('TestStep', backref='test_case', cascade='all, delete-orphan')
     test_executions = db.relationship('TestExecution', backref='test_case')
@@ -60,6 +61,10 @@ class TestStep(db.Model):
 
 class TestExecution(db.Model):
     __tablename__ = 'test_executions'
+    __table_args__ = (
+        # Latest execution per test case (coverage)
+        db.Index('idx_test_execution_case_date', 'test_case_id', 'execution_date'),
+    )
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     test_case_id = db.Column(db.String(36), db.ForeignKey('test_cases.id'), nullable=False)
     execution_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -79,6 +84,7 @@ class TestExecution(db.Model):
     defect_ids = db.Column(JSON)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     test_results = db.relationship('TestStepResult', backref='execution', cascade='all, delete-orphan')
 
@@ -95,3 +101,16 @@ class TestStepResult(db.Model):
     
     screenshot_urls = db.Column(JSON)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+class TestCoverageSnapshot(db.Model):
+    """Cached coverage figures per validation project; version is bumped by every change that affects them"""
+    __tablename__ = 'test_coverage_snapshots'
+    project_id = db.Column(db.String(36), primary_key=True)  # TestPlan.project_id
+    version = db.Column(db.Integer, nullable=False, default=0)
+    is_current = db.Column(db.Boolean, nullable=False, default=False)
+    
+    total_test_cases = db.Column(db.Integer)
+    executed_test_cases = db.Column(db.Integer)
+    passed_test_cases = db.Column(db.Integer)
+    failed_test_cases = db.Column(db.Integer)
+    computed_at = db.Column(db.DateTime)
@@ -45,6 +45,11 @@ class User(db.Model):
         """Verify password"""
         return check_password_hash(self.password_hash, password)
     
+    @property
+    def role_names(self):
+        """Names of the roles assigned through user_roles"""
+        return sorted(user_role.role.name for user_role in self.roles)
+    
     def to_dict(self):
         """Serialize user object"""
         return {
@@ -15,6 +15,8 @@ Compliant with 21 CFR Part 11 and EU Annex 11
 from datetime import datetime, timedelta
 from sqlalchemy.dialects.mysql import JSON
 from app import db
+import hashlib
+import json
 import uuid
 from app.models.document import Document
 
@@ -32,6 +34,7 @@ class WorkflowTemplate(db.Model):
     description = db.Column(db.Text)
     organization_id = db.Column(db.String(36), nullable=True)  # TODO: Add ForeignKey when organizations table is created
     is_active = db.Column(db.Boolean, default=True)
+    graph_version = db.Column(db.Integer, nullable=False, default=1)  # Bumped on every state/transition change
     created_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -191,21 +194,27 @@ class DocumentWorkflowState(db.Model):
     __tablename__ = 'document_workflow_states'
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False, index=True)
     current_state_id = db.Column(db.String(36), db.ForeignKey('workflow_states.id'), nullable=False)
     previous_state_id = db.Column(db.String(36), db.ForeignKey('workflow_states.id'))
     
-    assigned_to = db.Column(db.String(36), db.ForeignKey('users.id'))  # Current owner
+    assigned_to = db.Column(db.String(36), db.ForeignKey('users.id'), index=True)  # Current owner
     moved_by = db.Column(db.String(36), db.ForeignKey('users.id'))  # Who initiated transition
     transition_reason = db.Column(db.Text)
     
     entered_at = db.Column(db.DateTime, default=datetime.utcnow)
-    sla_deadline = db.Column(db.DateTime)  # SLA expiration
+    sla_deadline = db.Column(db.DateTime, index=True)  # SLA expiration
+    sla_escalated_at = db.Column(db.DateTime)  # Set once the breach has been escalated
+    sla_escalation_claim = db.Column(db.String(36))  # Token of the scheduler batch that claimed the escalation
     
     # Parallel approval tracking
     required_approvals = db.Column(db.Integer, default=0)
     completed_approvals = db.Column(db.Integer, default=0)
-    approvals_data = db.Column(JSON)  # [{user_id, role, timestamp, signature, signed_by}, ...]
+    approvals_data = db.Column(JSON)  # Legacy; signatures now live in workflow_approvals
+    
+    # Audit chain head (last WorkflowAuditLog written for this document)
+    audit_sequence = db.Column(db.Integer, default=0)
+    audit_head_hash = db.Column(db.String(64))
     
     is_locked = db.Column(db.Boolean, default=False)
     extra_data = db.Column(JSON)
@@ -218,6 +227,26 @@ class DocumentWorkflowState(db.Model):
         return f'<DocumentWorkflowState {self.document_id}>'
 
 
+class WorkflowApproval(db.Model):
+    """Append-only parallel approval signature (one per user per workflow state of a document)"""
+    __tablename__ = 'workflow_approvals'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
+    doc_state_id = db.Column(db.String(36), db.ForeignKey('document_workflow_states.id'), nullable=False)
+    state_id = db.Column(db.String(36), db.ForeignKey('workflow_states.id'))  # State the signature was given in
+    user_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    role = db.Column(db.String(255))
+    signature = db.Column(db.Text)
+    signed_by = db.Column(db.String(255))
+    signed_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    
+    __table_args__ = (db.UniqueConstraint('doc_state_id', 'state_id', 'user_id', name='uq_workflow_approval_signer'),)
+    
+    def __repr__(self):
+        return f'<WorkflowApproval {self.document_id} {self.user_id}>'
+
+
 class WorkflowAuditLog(db.Model):
     """Immutable audit trail - 21 CFR Part 11 compliant"""
     __tablename__ = 'workflow_audit_logs'
@@ -230,15 +259,129 @@ class WorkflowAuditLog(db.Model):
     to_state = db.Column(db.String(255))
     
     performed_by = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    transition_reason = db.Column(db.Text)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
     # Cryptographic integrity
+    sequence = db.Column(db.Integer)  # Position in the document's hash chain (1-based)
     data_hash = db.Column(db.String(512))  # SHA-256 hash
+    previous_hash = db.Column(db.String(64))  # Hash chain for integrity
     signature = db.Column(db.Text)  # Digital signature
     
     details = db.Column(JSON)  # Additional metadata
     ip_address = db.Column(db.String(45))
     user_agent = db.Column(db.String(500))
     
+    __table_args__ = (
+        db.UniqueConstraint('document_id', 'sequence', name='uq_workflow_audit_sequence'),
+        db.Index('idx_workflow_audit_document_timestamp', 'document_id', 'timestamp', 'id'),
+    )
+    
+    @staticmethod
+    def compute_hash(values: dict) -> str:
+        """SHA-256 over the chained fields of an audit entry (dict of column values)"""
+        timestamp = values.get('timestamp')
+        data = '|'.join([
+            str(values.get('document_id')),
+            str(values.get('sequence')),
+            str(values.get('action')),
+            str(values.get('from_state')),
+            str(values.get('to_state')),
+            str(values.get('performed_by')),
+            str(values.get('transition_reason') or ''),
+            timestamp.isoformat() if timestamp else '',
+            json.dumps(values.get('details') or {}, sort_keys=True),
+            str(values.get('previous_hash') or '')
+        ])
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def calculate_hash(self) -> str:
+        """Calculate SHA-256 hash for immutability verification."""
+        return self.compute_hash({
+            'document_id': self.document_id,
+            'sequence': self.sequence,
+            'action': self.action,
+            'from_state': self.from_state,
+            'to_state': self.to_state,
+            'performed_by': self.performed_by,
+            'transition_reason': self.transition_reason,
+            'timestamp': self.timestamp,
+            'details': self.details,
+            'previous_hash': self.previous_hash
+        })
+    
+    def verify_integrity(self) -> bool:
+        """Verify hash integrity of audit log."""
+        return self.data_hash == self.calculate_hash()
+    
     def __repr__(self):
         return f'<WorkflowAuditLog {self.action}>'
+
+
+class WorkflowAuditCheckpoint(db.Model):
+    """Verified Merkle checkpoint over a document's audit chain
+    
+    Each checkpoint covers entries (previous checkpoint sequence, sequence] and
+    is itself chained to the previous checkpoint, so verification only needs to
+    re-hash entries written after the latest checkpoint.
+    """
+    __tablename__ = 'workflow_audit_checkpoints'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
+    sequence = db.Column(db.Integer, nullable=False)  # Last audit entry covered
+    from_sequence = db.Column(db.Integer, nullable=False)  # First audit entry covered
+    head_hash = db.Column(db.String(64), nullable=False)  # data_hash of the entry at `sequence`
+    merkle_root = db.Column(db.String(64), nullable=False)
+    entry_count = db.Column(db.Integer, nullable=False)
+    previous_checkpoint_hash = db.Column(db.String(64))
+    checkpoint_hash = db.Column(db.String(64), nullable=False)
+    verified_by = db.Column(db.String(36), db.ForeignKey('users.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (db.UniqueConstraint('document_id', 'sequence', name='uq_workflow_audit_checkpoint'),)
+    
+    def calculate_hash(self) -> str:
+        data = f'{self.document_id}|{self.from_sequence}|{self.sequence}|{self.head_hash}|{self.merkle_root}|{self.previous_checkpoint_hash or ""}'
+        return hashlib.sha256(data.encode()).hexdigest()
+    
+    def __repr__(self):
+        return f'<WorkflowAuditCheckpoint {self.document_id}@{self.sequence}>'
+
+
+
+# =============================================================================
+# TRANSACTIONAL OUTBOX FOR WORKFLOW ACTIONS
+# =============================================================================
+
+class WorkflowOutboxEntry(db.Model):
+    """Side-effect actions written in the same commit as a state change
+    
+    Drained asynchronously by the outbox worker with retries; idempotency_key
+    lets handlers skip work already done by an earlier attempt.
+    """
+    __tablename__ = 'workflow_outbox'
+    
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    document_id = db.Column(db.String(36), db.ForeignKey('documents.id'), nullable=False)
+    transition_id = db.Column(db.String(36), db.ForeignKey('workflow_transitions.id'))
+    action_id = db.Column(db.String(36), db.ForeignKey('workflow_actions.id'))
+    
+    action_type = db.Column(db.String(50), nullable=False)  # send_notification, create_task
+    parameters = db.Column(JSON)
+    idempotency_key = db.Column(db.String(64), nullable=False, unique=True)
+    
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, processing, done, failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    available_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Next attempt time
+    locked_by = db.Column(db.String(100))
+    locked_at = db.Column(db.DateTime)
+    last_error = db.Column(db.Text)
+    
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    
+    __table_args__ = (db.Index('idx_workflow_outbox_status_available', 'status', 'available_at'),)
+    
+    def __repr__(self):
+        return f'<WorkflowOutboxEntry {self.action_type} {self.status}>'
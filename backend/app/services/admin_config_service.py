@@ -1,5 +1,6 @@
 from app import db
 from app.models.admin_config import AdminConfig,WorkflowConfig,RolePermission,SystemLog
+from app.services.audit_pipeline_service import audit_pipeline
 from datetime import datetime
 class AdminConfigService:
     @staticmethod
@@ -29,9 +30,7 @@ class AdminConfigService:
     @staticmethod
     def log_action(user_id,action,resource,details):
         log=SystemLog(user_id=user_id,action=action,resource=resource,details=details)
-        db.session.add(log)
-        db.session.commit()
-        return log
+        return audit_pipeline.submit(log)
     @staticmethod
     def get_audit_logs(resource_type=None,limit=100):
         q=SystemLog.query
@@ -0,0 +1,179 @@
+"""Faceted counts over ComprehensiveAuditLog backed by daily rollups
+
+Facet counts (by audit type, user and entity type) are GROUP BY queries over
+the (timestamp, facet) composite indexes. Closed days are rolled up once into
+comprehensive_audit_daily_rollups, so a report over a long range reads one
+set of rollup rows per day and only counts the open edges of the range live.
+
+A day is closed once it ended more than AUDIT_ROLLUP_GRACE_MINUTES ago, which
+leaves room for audit records still in the ingestion pipeline at midnight.
+"""
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Tuple
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.system_validation import ComprehensiveAuditLog, ComprehensiveAuditDailyRollup
+
+# facet name -> (column, report key)
+FACETS = {
+    'audit_type': (ComprehensiveAuditLog.audit_type, 'audit_types'),
+    'user': (ComprehensiveAuditLog.user_id, 'by_user'),
+    'entity_type': (ComprehensiveAuditLog.entity_type, 'by_entity')
+}
+
+
+def _as_date(value) -> date:
+    # SQLite returns DATE() as text
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+class AuditAnalyticsService:
+    """Audit report facets from rollups plus live counts for open ranges"""
+
+    @staticmethod
+    def last_closed_day(now: datetime = None) -> date:
+        grace = int(current_app.config.get('AUDIT_ROLLUP_GRACE_MINUTES', 10))
+        return ((now or datetime.utcnow()) - timedelta(minutes=grace)).date() - timedelta(days=1)
+
+    @staticmethod
+    def get_report(start_date: datetime, end_date: datetime, now: datetime = None) -> Dict:
+        """Counts for start_date <= timestamp <= end_date, keyed like generate_audit_report"""
+        report = {'total_audit_records': 0, 'audit_types': {}, 'by_user': {}, 'by_entity': {}}
+        if end_date < start_date:
+            return report
+
+        # Whole days inside the range that are closed come from rollups
+        first_day = start_date.date() if start_date.time() == time.min else start_date.date() + timedelta(days=1)
+        last_day = min(end_date.date() - timedelta(days=1), AuditAnalyticsService.last_closed_day(now))
+
+        live_ranges: List[Tuple[datetime, datetime, bool]] = []  # (start, end, end inclusive)
+        if first_day <= last_day:
+            AuditAnalyticsService._merge(report, AuditAnalyticsService._read_rollups(first_day, last_day, now))
+            if start_date < datetime.combine(first_day, time.min):
+                live_ranges.append((start_date, datetime.combine(first_day, time.min), False))
+            after_rollups = datetime.combine(last_day + timedelta(days=1), time.min)
+            if after_rollups <= end_date:
+                live_ranges.append((after_rollups, end_date, True))
+        else:
+            live_ranges.append((start_date, end_date, True))
+
+        for range_start, range_end, inclusive in live_ranges:
+            AuditAnalyticsService._merge(report, AuditAnalyticsService._count_range(range_start, range_end, inclusive))
+        return report
+
+    @staticmethod
+    def _count_range(start: datetime, end: datetime, inclusive: bool) -> Dict:
+        upper = ComprehensiveAuditLog.timestamp <= end if inclusive else ComprehensiveAuditLog.timestamp < end
+        counts = {'total': {'': db.session.query(db.func.count(ComprehensiveAuditLog.id)).filter(
+            ComprehensiveAuditLog.timestamp >= start, upper
+        ).scalar() or 0}}
+        for facet, (column, _) in FACETS.items():
+            counts[facet] = {str(value): count for value, count in db.session.query(
+                column, db.func.count(ComprehensiveAuditLog.id)
+            ).filter(ComprehensiveAuditLog.timestamp >= start, upper).group_by(column).all()}
+        return counts
+
+    # =========================================================================
+    # ROLLUPS
+    # =========================================================================
+
+    @staticmethod
+    def _read_rollups(first_day: date, last_day: date, now: datetime = None) -> Dict:
+        """Summed rollups for closed days, computing any missing days first"""
+        rows = ComprehensiveAuditDailyRollup.query.filter(
+            ComprehensiveAuditDailyRollup.day >= first_day,
+            ComprehensiveAuditDailyRollup.day <= last_day
+        ).all()
+        present = {row.day for row in rows if row.facet == 'total'}
+        expected = (last_day - first_day).days + 1
+        if len(present) < expected:
+            missing = [first_day + timedelta(days=offset) for offset in range(expected)
+                       if first_day + timedelta(days=offset) not in present]
+            AuditAnalyticsService.rollup_days(missing[0], missing[-1], skip=present, now=now)
+            rows = ComprehensiveAuditDailyRollup.query.filter(
+                ComprehensiveAuditDailyRollup.day >= first_day,
+                ComprehensiveAuditDailyRollup.day <= last_day
+            ).all()
+
+        counts = {}
+        for row in rows:
+            facet_counts = counts.setdefault(row.facet, {})
+            facet_counts[row.facet_value] = facet_counts.get(row.facet_value, 0) + row.record_count
+        return counts
+
+    @staticmethod
+    def rollup_days(first_day: date, last_day: date, skip=(), now: datetime = None) -> int:
+        """(Re)compute rollups for closed days in [first_day, last_day]; returns days written
+
+        One date-grouped query per facet covers the whole span. Days with no
+        audit records still get a zero total row so they are not recomputed.
+        """
+        last_day = min(last_day, AuditAnalyticsService.last_closed_day(now))
+        if last_day < first_day:
+            return 0
+        start = datetime.combine(first_day, time.min)
+        end = datetime.combine(last_day + timedelta(days=1), time.min)
+        day_column = db.func.date(ComprehensiveAuditLog.timestamp)
+        in_range = (ComprehensiveAuditLog.timestamp >= start, ComprehensiveAuditLog.timestamp < end)
+
+        per_day: Dict[date, Dict[str, Dict[str, int]]] = {}
+        for day, count in db.session.query(
+            day_column, db.func.count(ComprehensiveAuditLog.id)
+        ).filter(*in_range).group_by(day_column).all():
+            per_day.setdefault(_as_date(day), {})['total'] = {'': count}
+        for facet, (column, _) in FACETS.items():
+            for day, value, count in db.session.query(
+                day_column, column, db.func.count(ComprehensiveAuditLog.id)
+            ).filter(*in_range).group_by(day_column, column).all():
+                per_day.setdefault(_as_date(day), {}).setdefault(facet, {})[str(value)] = count
+
+        days = [first_day + timedelta(days=offset) for offset in range((last_day - first_day).days + 1)]
+        skip = set(skip)
+        days = [day for day in days if day not in skip]
+        if not days:
+            return 0
+
+        now = datetime.utcnow()
+        rollups = []
+        for day in days:
+            facets = per_day.get(day, {})
+            facets.setdefault('total', {'': 0})
+            for facet, values in facets.items():
+                for value, count in values.items():
+                    rollups.append({
+                        'day': day, 'facet': facet, 'facet_value': value,
+                        'record_count': count, 'computed_at': now
+                    })
+
+        try:
+            ComprehensiveAuditDailyRollup.query.filter(
+                ComprehensiveAuditDailyRollup.day.in_(days)
+            ).delete(synchronize_session=False)
+            db.session.bulk_insert_mappings(ComprehensiveAuditDailyRollup, rollups)
+            db.session.commit()
+        except IntegrityError:
+            # Another request rolled up the same days concurrently; its rows are equivalent
+            db.session.rollback()
+        return len(days)
+
+    @staticmethod
+    def invalidate_days(first_day: date, last_day: date) -> int:
+        """Drop rollups so the next report recomputes them (e.g. after a backfill)"""
+        deleted = ComprehensiveAuditDailyRollup.query.filter(
+            ComprehensiveAuditDailyRollup.day >= first_day,
+            ComprehensiveAuditDailyRollup.day <= last_day
+        ).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    @staticmethod
+    def _merge(report: Dict, counts: Dict):
+        report['total_audit_records'] += sum(counts.get('total', {}).values())
+        for facet, (_, report_key) in FACETS.items():
+            target = report[report_key]
+            for value, count in counts.get(facet, {}).items():
+                key = int(value) if facet == 'user' and value.lstrip('-').isdigit() else value
+                target[key] = target.get(key, 0) + count
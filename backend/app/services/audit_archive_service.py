@@ -0,0 +1,483 @@
+"""Monthly cold-archive tier for the audit tables
+
+audit_logs, field_audit_logs and workflow_audit_logs keep only recent months
+hot. Calendar months older than AUDIT_HOT_RETENTION_MONTHS are sealed and moved
+into gzip-compressed, column-oriented JSON files under AUDIT_ARCHIVE_DIR, one
+or more parts per (table, month). Each part is catalogued in
+audit_archive_partitions with the SHA-256 of the file, and catalog entries are
+hash-chained per table so a removed or replaced file is detectable.
+
+Inside a file each entity's rows are their own gzip member, and
+audit_archive_keys maps (table, entity key) to the partition, byte offset and
+length of that block. A history read for one entity therefore looks up its
+blocks in the database and decompresses only those, never a whole month. The
+history APIs (field audit history/verification, workflow audit trail) read the
+hot table first and only reach into the archive once it is exhausted: months
+are archived whole and only once sealed, so every archived row is older than
+the entity's hot rows.
+
+Hash chains stay verifiable across the hot/cold boundary:
+- field_audit_logs: the last archived hash per entity is recorded on
+  FieldAuditChainHead.archived_hash, where the hot chain now starts.
+- workflow_audit_logs: only entries below the document's latest checkpoint
+  are archived, so incremental verification always finds its anchor hot.
+"""
+
+import gzip
+import hashlib
+import importlib
+import itertools
+import json
+import logging
+import os
+import uuid
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+from app import db
+from app.models.audit import AuditArchiveKey, AuditArchivePartition
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = 'westval-audit-columnar/2'
+
+# audit_archive_keys columns covered by a partition's index_hash
+INDEX_FIELDS = ('entity_key', 'byte_offset', 'byte_length', 'row_count', 'block_hash')
+
+# table -> model path, time column, entity key columns
+ARCHIVE_TABLES = {
+    'audit_logs': ('app.models.audit:AuditLog', 'timestamp', ('entity_type', 'entity_id')),
+    'field_audit_logs': ('app.models.field_audit:FieldAuditLog', 'created_at', ('entity_type', 'entity_id')),
+    'workflow_audit_logs': ('app.models.workflow:WorkflowAuditLog', 'timestamp', ('document_id',))
+}
+
+
+def _resolve_model(table_name: str):
+    path = ARCHIVE_TABLES[table_name][0]
+    module_name, class_name = path.split(':')
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1)
+
+
+def _add_months(value: datetime, months: int) -> datetime:
+    month = value.month - 1 + months
+    return datetime(value.year + month // 12, month % 12 + 1, 1)
+
+
+def _encode_key(values) -> str:
+    return json.dumps(list(values), default=str)
+
+
+def _datetime_columns(model) -> List[str]:
+    return [column.name for column in model.__table__.columns if isinstance(column.type, db.DateTime)]
+
+
+def _index_hash(entries: List[Tuple]) -> str:
+    """Hash over a partition's block index (tuples of INDEX_FIELDS), folded into its seal"""
+    return hashlib.sha256(json.dumps(sorted(entries)).encode()).hexdigest()
+
+
+class AuditArchiveService:
+    """Moves sealed months of audit rows to archive files and reads them back"""
+
+    # =========================================================================
+    # CONFIGURATION
+    # =========================================================================
+
+    @staticmethod
+    def _settings() -> Dict:
+        config = current_app.config
+        return {
+            'directory': config.get('AUDIT_ARCHIVE_DIR', '/app/audit_archive'),
+            'retention_months': int(config.get('AUDIT_HOT_RETENTION_MONTHS', 12)),
+            'part_rows': int(config.get('AUDIT_ARCHIVE_PART_ROWS', 250000)),
+            'batch_size': int(config.get('AUDIT_ARCHIVE_BATCH_SIZE', 1000)),
+            'tables': config.get('AUDIT_ARCHIVE_TABLES') or list(ARCHIVE_TABLES)
+        }
+
+    @staticmethod
+    def sealed_before(now: datetime = None) -> datetime:
+        """Months starting before this date are sealed and may be archived"""
+        settings = AuditArchiveService._settings()
+        return _add_months(_month_start(now or datetime.utcnow()), -settings['retention_months'])
+
+    # =========================================================================
+    # ARCHIVING
+    # =========================================================================
+
+    @staticmethod
+    def archive_due(tables: List[str] = None, now: datetime = None, dry_run: bool = False) -> List[Dict]:
+        """Archive every sealed month that still has hot rows; returns one summary per part"""
+        AuditArchiveService.resume_purges()
+        cutoff = AuditArchiveService.sealed_before(now)
+        results = []
+        for table_name in tables or AuditArchiveService._settings()['tables']:
+            model = _resolve_model(table_name)
+            time_column = getattr(model, ARCHIVE_TABLES[table_name][1])
+            oldest = db.session.query(db.func.min(time_column)).filter(
+                AuditArchiveService._archivable(table_name, model)
+            ).scalar()
+            if oldest is None:
+                continue
+            period_start = _month_start(oldest)
+            while period_start < cutoff:
+                results.extend(AuditArchiveService.archive_period(table_name, period_start, dry_run))
+                period_start = _add_months(period_start, 1)
+        return results
+
+    @staticmethod
+    def archive_period(table_name: str, period_start: datetime, dry_run: bool = False) -> List[Dict]:
+        """Move one month of a table into archive parts, then purge the hot rows"""
+        settings = AuditArchiveService._settings()
+        model = _resolve_model(table_name)
+        _, time_name, key_names = ARCHIVE_TABLES[table_name]
+        time_column = getattr(model, time_name)
+        period = period_start.strftime('%Y-%m')
+
+        query = select(model.__table__).where(
+            time_column >= period_start,
+            time_column < _add_months(period_start, 1),
+            AuditArchiveService._archivable(table_name, model)
+        ).order_by(*[getattr(model, name) for name in key_names], time_column, model.id)
+
+        previous = AuditArchivePartition.query.filter_by(table_name=table_name).order_by(
+            AuditArchivePartition.created_at.desc(), AuditArchivePartition.period.desc(),
+            AuditArchivePartition.part.desc()
+        ).first()
+        previous_seal = previous.seal_hash if previous else None
+        part = db.session.query(db.func.max(AuditArchivePartition.part)).filter_by(
+            table_name=table_name, period=period
+        ).scalar() or 0
+        db.session.commit()
+
+        # Only files are written while the cursor is open; catalog rows and purges follow
+        sealed = []
+        rows = []
+        columns = [column.name for column in model.__table__.columns]
+        with db.engine.connect() as connection:
+            result = connection.execution_options(
+                stream_results=True, yield_per=settings['batch_size']
+            ).execute(query)
+            last_key = None
+            for row in result:
+                values = dict(row._mapping)
+                key = tuple(values[name] for name in key_names)
+                # Parts never split one entity's rows
+                if len(rows) >= settings['part_rows'] and key != last_key:
+                    part += 1
+                    sealed.append(AuditArchiveService._write_part(
+                        table_name, period, part, previous_seal, columns, rows, dry_run
+                    ))
+                    previous_seal = sealed[-1]['partition'].seal_hash if not dry_run else None
+                    rows = []
+                rows.append(values)
+                last_key = key
+        if rows:
+            part += 1
+            sealed.append(AuditArchiveService._write_part(
+                table_name, period, part, previous_seal, columns, rows, dry_run
+            ))
+
+        if dry_run:
+            return [item['summary'] for item in sealed]
+
+        for item in sealed:
+            partition = item['partition']
+            db.session.add(partition)
+            db.session.flush()
+            db.session.bulk_insert_mappings(AuditArchiveKey, item['keys'])
+            if table_name == 'field_audit_logs':
+                AuditArchiveService._advance_field_chain_heads(item['tails'])
+            db.session.commit()
+            AuditArchiveService._purge(partition, item['ids'])
+            logger.info(f'Archived {partition.row_count} {table_name} rows for {period} (part {partition.part})')
+        return [item['summary'] for item in sealed]
+
+    @staticmethod
+    def _archivable(table_name: str, model):
+        """Extra row filter that keeps hash-chain anchors in the hot table"""
+        if table_name != 'workflow_audit_logs':
+            return db.true()
+        from app.models.workflow import WorkflowAuditCheckpoint
+        latest_checkpoint = select(db.func.max(WorkflowAuditCheckpoint.sequence)).where(
+            WorkflowAuditCheckpoint.document_id == model.document_id
+        ).scalar_subquery()
+        return db.or_(model.sequence.is_(None), model.sequence < latest_checkpoint)
+
+    @staticmethod
+    def _write_part(table_name: str, period: str, part: int, previous_seal: Optional[str],
+                    columns: List[str], rows: List[Dict], dry_run: bool) -> Dict:
+        """Write and read back one sealed archive file; returns its (unsaved) catalog entry"""
+        settings = AuditArchiveService._settings()
+        model = _resolve_model(table_name)
+        _, time_name, key_names = ARCHIVE_TABLES[table_name]
+        summary = {'table': table_name, 'period': period, 'part': part, 'rows': len(rows)}
+        if dry_run:
+            return {'summary': summary}
+
+        # A small header, then one gzip member per entity (rows arrive grouped by key)
+        header = {
+            'format': ARCHIVE_FORMAT,
+            'table': table_name,
+            'period': period,
+            'part': part,
+            'row_count': len(rows),
+            'key_columns': list(key_names),
+            'datetime_columns': _datetime_columns(model),
+            'columns': columns
+        }
+        chunks = [gzip.compress(json.dumps(header).encode())]
+        offset = len(chunks[0])
+        partition_id = str(uuid.uuid4())
+        keys = []
+        entity_keys = (_encode_key(values[name] for name in key_names) for values in rows)
+        for entity_key, group in itertools.groupby(zip(entity_keys, rows), key=lambda item: item[0]):
+            group = [values for _, values in group]
+            block = gzip.compress(json.dumps({
+                'key': json.loads(entity_key),
+                'columns': {name: [values[name] for values in group] for name in columns}
+            }, default=lambda v: v.isoformat()).encode())
+            keys.append({
+                'partition_id': partition_id,
+                'entity_key': entity_key,
+                'table_name': table_name,
+                'period': period,
+                'byte_offset': offset,
+                'byte_length': len(block),
+                'row_count': len(group),
+                'first_timestamp': min(values[time_name] for values in group),
+                'last_timestamp': max(values[time_name] for values in group),
+                'block_hash': hashlib.sha256(block).hexdigest()
+            })
+            chunks.append(block)
+            offset += len(block)
+        raw = b''.join(chunks)
+
+        relative_path = os.path.join(table_name, f'{period}-{part:04d}.json.gz')
+        path = os.path.join(settings['directory'], relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(raw)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+        partition = AuditArchivePartition(
+            id=partition_id,
+            table_name=table_name,
+            period=period,
+            part=part,
+            file_path=relative_path,
+            row_count=len(rows),
+            first_timestamp=min(values[time_name] for values in rows),
+            last_timestamp=max(values[time_name] for values in rows),
+            key_min=keys[0]['entity_key'],
+            key_max=keys[-1]['entity_key'],
+            content_hash=hashlib.sha256(raw).hexdigest(),
+            index_hash=_index_hash([tuple(k[name] for name in INDEX_FIELDS) for k in keys]),
+            previous_seal_hash=previous_seal,
+            status='purging'
+        )
+        partition.seal_hash = partition.calculate_seal()
+
+        # Read the sealed file back before any hot row is touched
+        if AuditArchiveService._file_hash(path) != partition.content_hash:
+            raise ValueError(f'Archive file {relative_path} does not match the data written')
+
+        tails = {}
+        if table_name == 'field_audit_logs':
+            # Rows are in chain order per entity, so the last one seen is the archived tail
+            for values in rows:
+                key = (values['entity_type'], values['entity_id'])
+                tails[key] = (values['change_hash'], tails.get(key, (None, 0))[1] + 1)
+
+        summary.update({'file': relative_path, 'content_hash': partition.content_hash})
+        return {
+            'summary': summary,
+            'partition': partition,
+            'keys': keys,
+            'ids': [values['id'] for values in rows],
+            'tails': tails
+        }
+
+    @staticmethod
+    def _advance_field_chain_heads(tails: Dict[Tuple, Tuple[str, int]]):
+        """Record where each entity's hot chain now starts"""
+        from app.models.field_audit import FieldAuditChainHead
+        for (entity_type, entity_id), (tail_hash, count) in tails.items():
+            head = FieldAuditChainHead.query.get((entity_type, entity_id))
+            if head is None:
+                # Entity predates chain heads; its current tail is still hot at this point
+                from app.services.field_audit_service import FieldAuditService
+                head = FieldAuditService._lock_chain_head(entity_type, entity_id)
+            head.archived_hash = tail_hash
+            head.archived_count = (head.archived_count or 0) + count
+
+    @staticmethod
+    def _purge(partition: AuditArchivePartition, ids: List):
+        """Delete archived rows from the hot table in batches, then mark the partition archived"""
+        model = _resolve_model(partition.table_name)
+        batch_size = AuditArchiveService._settings()['batch_size']
+        for start in range(0, len(ids), batch_size):
+            model.query.filter(model.id.in_(ids[start:start + batch_size])).delete(synchronize_session=False)
+            db.session.commit()
+        partition.status = 'archived'
+        db.session.commit()
+
+    @staticmethod
+    def resume_purges():
+        """Finish purges interrupted after their archive file was sealed"""
+        for partition in AuditArchivePartition.query.filter_by(status='purging').all():
+            datetime_columns = _datetime_columns(_resolve_model(partition.table_name))
+            ids = [values['id']
+                   for key in AuditArchiveKey.query.filter_by(partition_id=partition.id)
+                   for values in AuditArchiveService._read_block(partition.file_path, key, datetime_columns)]
+            AuditArchiveService._purge(partition, ids)
+
+    # =========================================================================
+    # READING
+    # =========================================================================
+
+    @staticmethod
+    def _file_hash(path: str) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _read_block(file_path: str, key: AuditArchiveKey, datetime_columns: List[str]) -> List[Dict]:
+        """Decode one entity's rows from an archive file, verified against the block hash"""
+        path = os.path.join(AuditArchiveService._settings()['directory'], file_path)
+        with open(path, 'rb') as f:
+            f.seek(key.byte_offset)
+            raw = f.read(key.byte_length)
+        if hashlib.sha256(raw).hexdigest() != key.block_hash:
+            raise ValueError(f'Archive block for {key.entity_key} in {key.table_name} {key.period} '
+                             f'does not match its sealed hash')
+        columns = json.loads(gzip.decompress(raw))['columns']
+        rows = []
+        for position in range(key.row_count):
+            values = {}
+            for name, column in columns.items():
+                value = column[position]
+                if name in datetime_columns and value is not None:
+                    value = datetime.fromisoformat(value)
+                values[name] = value
+            rows.append(values)
+        return rows
+
+    @staticmethod
+    def _iter_periods(table_name: str, key: Tuple, newest_first: bool = False,
+                      before: datetime = None) -> Iterator[List[Dict]]:
+        """The entity's archived rows one month at a time, found through audit_archive_keys"""
+        model = _resolve_model(table_name)
+        time_name = ARCHIVE_TABLES[table_name][1]
+        datetime_columns = _datetime_columns(model)
+        query = db.session.query(AuditArchiveKey, AuditArchivePartition.file_path).join(
+            AuditArchivePartition, AuditArchivePartition.id == AuditArchiveKey.partition_id
+        ).filter(
+            AuditArchiveKey.table_name == table_name,
+            AuditArchiveKey.entity_key == _encode_key(key)
+        )
+        if before is not None:
+            # Blocks that start after the cursor hold nothing older than it
+            query = query.filter(AuditArchiveKey.first_timestamp <= before)
+        period_order = AuditArchiveKey.period.desc() if newest_first else AuditArchiveKey.period
+        blocks = query.order_by(period_order, AuditArchivePartition.part).all()
+
+        for _, period_blocks in itertools.groupby(blocks, key=lambda block: block[0].period):
+            # Later runs over the same month add parts, so order rows across them
+            rows = [values for key_row, file_path in period_blocks
+                    for values in AuditArchiveService._read_block(file_path, key_row, datetime_columns)]
+            rows.sort(key=lambda values: (values[time_name], values['id']), reverse=newest_first)
+            yield rows
+
+    @staticmethod
+    def iter_archived_rows(table_name: str, key: Tuple) -> Iterator[Dict]:
+        """Yield the entity's archived rows as column dicts, oldest first"""
+        for rows in AuditArchiveService._iter_periods(table_name, key):
+            yield from rows
+
+    @staticmethod
+    def iter_archived_models(table_name: str, key: Tuple, newest_first: bool = False,
+                             before: Tuple = None) -> Iterator:
+        """Archived rows as transient (never added to the session) model instances, read a month at a time
+
+        before is an exclusive (time, id) keyset position for newest-first reads.
+        """
+        model = _resolve_model(table_name)
+        time_name = ARCHIVE_TABLES[table_name][1]
+        for rows in AuditArchiveService._iter_periods(table_name, key, newest_first, before[0] if before else None):
+            for values in rows:
+                if before is None or (values[time_name], values['id']) < before:
+                    yield model(**values)
+
+    @staticmethod
+    def get_archived_models(table_name: str, key: Tuple, newest_first: bool = False) -> List:
+        """All of the entity's archived rows as transient model instances"""
+        return list(AuditArchiveService.iter_archived_models(table_name, key, newest_first))
+
+    @staticmethod
+    def get_history(table_name: str, key: Tuple, limit: int = 50) -> List:
+        """Newest-first history for one entity across the hot table and the archive"""
+        model = _resolve_model(table_name)
+        _, time_name, key_names = ARCHIVE_TABLES[table_name]
+        time_column = getattr(model, time_name)
+        hot = model.query.filter(
+            *[getattr(model, name) == value for name, value in zip(key_names, key)]
+        ).order_by(time_column.desc(), model.id.desc()).limit(limit).all()
+        if len(hot) >= limit:
+            return hot
+        # Archived rows are older than any hot row, so the archive only tops up a short page
+        archived = AuditArchiveService.iter_archived_models(table_name, key, newest_first=True)
+        return hot + list(itertools.islice(archived, limit - len(hot)))
+
+    # =========================================================================
+    # VERIFICATION
+    # =========================================================================
+
+    @staticmethod
+    def verify_partitions(table_name: str = None) -> Dict:
+        """Re-hash every archive file and walk each table's seal chain"""
+        query = AuditArchivePartition.query
+        if table_name:
+            query = query.filter_by(table_name=table_name)
+        partitions = query.order_by(
+            AuditArchivePartition.table_name, AuditArchivePartition.created_at,
+            AuditArchivePartition.period, AuditArchivePartition.part
+        ).all()
+
+        failures = []
+        previous_by_table = {}
+        for partition in partitions:
+            label = f'{partition.table_name} {partition.period}#{partition.part}'
+            if partition.seal_hash != partition.calculate_seal():
+                failures.append({'partition': label, 'reason': 'Catalog entry altered'})
+            if partition.previous_seal_hash != previous_by_table.get(partition.table_name):
+                failures.append({'partition': label, 'reason': 'Seal chain broken'})
+            previous_by_table[partition.table_name] = partition.seal_hash
+            try:
+                path = os.path.join(AuditArchiveService._settings()['directory'], partition.file_path)
+                if AuditArchiveService._file_hash(path) != partition.content_hash:
+                    failures.append({'partition': label, 'reason': 'Archive file does not match its sealed hash'})
+            except OSError as e:
+                failures.append({'partition': label, 'reason': str(e)})
+            keys = AuditArchiveKey.query.filter_by(partition_id=partition.id).all()
+            if _index_hash([tuple(getattr(k, name) for name in INDEX_FIELDS) for k in keys]) != partition.index_hash:
+                failures.append({'partition': label, 'reason': 'Key index altered'})
+            if sum(key.row_count for key in keys) != partition.row_count:
+                failures.append({'partition': label, 'reason': 'Row count mismatch'})
+
+        return {
+            'valid': not failures,
+            'partitions_checked': len(partitions),
+            'failures': failures
+        }
@@ -0,0 +1,230 @@
+"""Single ingestion path for audit records
+
+Two ways in, depending on whether the record describes a change in the
+caller's own transaction:
+
+- stage() / stage_mappings(): the record belongs to the current db.session
+  transaction (document created, workflow transition, field change...). It is
+  buffered on the session and bulk-inserted by a before_commit hook, so it is
+  written in the same commit as the data it describes, or not at all
+  (flush-on-commit; a rollback discards it).
+- submit(): a standalone event (access log, system log, comprehensive audit)
+  that previously cost the request its own commit. Records go onto a bounded
+  in-process queue; a writer thread drains it and group-commits batches in its
+  own session. By default the caller blocks until its batch is committed, so
+  the record is durable before the request returns, but concurrent requests
+  share one commit instead of paying for one each.
+
+Audit records are never dropped: when the queue stays full past the enqueue
+timeout, or the pipeline is disabled, the record is written inline.
+"""
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+
+logger = logging.getLogger(__name__)
+
+_STAGED_KEY = 'audit_pipeline_staged'
+
+
+class _AuditTicket:
+    """A submitted record and the signal that its batch was committed"""
+
+    __slots__ = ('record', 'done', 'error')
+
+    def __init__(self, record):
+        self.record = record
+        self.done = threading.Event()
+        self.error: Optional[Exception] = None
+
+
+class AuditIngestionPipeline:
+    """Bounded queue + group-commit writer shared by all audit producers"""
+
+    def __init__(self):
+        self.app = None
+        self._queue: Optional[queue.Queue] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.enabled = bool(config.get('AUDIT_PIPELINE_ENABLED', True))
+        self.batch_size = int(config.get('AUDIT_PIPELINE_BATCH_SIZE', 200))
+        self.max_delay = int(config.get('AUDIT_PIPELINE_MAX_DELAY_MS', 20)) / 1000.0
+        self.sync = bool(config.get('AUDIT_PIPELINE_SYNC', True))
+        self.enqueue_timeout = float(config.get('AUDIT_PIPELINE_ENQUEUE_TIMEOUT_SECONDS', 1))
+        self.wait_timeout = float(config.get('AUDIT_PIPELINE_WAIT_TIMEOUT_SECONDS', 30))
+        self._queue = queue.Queue(maxsize=int(config.get('AUDIT_PIPELINE_QUEUE_SIZE', 10000)))
+        atexit.register(self.shutdown)
+
+    # =========================================================================
+    # TRANSACTIONAL RECORDS (written by the caller's commit)
+    # =========================================================================
+
+    def stage(self, *records):
+        """Add audit model instances to the current transaction's audit batch"""
+        staged = db.session.info.setdefault(_STAGED_KEY, {'records': [], 'mappings': {}})
+        staged['records'].extend(records)
+
+    def stage_mappings(self, model, rows: List[Dict]):
+        """Add audit rows (column dicts) to the current transaction's audit batch"""
+        staged = db.session.info.setdefault(_STAGED_KEY, {'records': [], 'mappings': {}})
+        staged['mappings'].setdefault(model, []).extend(rows)
+
+    # =========================================================================
+    # STANDALONE RECORDS (group-committed by the writer thread)
+    # =========================================================================
+
+    def submit(self, record, wait: bool = None):
+        """Queue a standalone audit record; returns it (populated once committed)
+
+        wait defaults to AUDIT_PIPELINE_SYNC. When waiting, a failed write is
+        raised to the caller just like a failed inline commit.
+        """
+        if self.app is None or not self.enabled:
+            self._write_inline(record)
+            return record
+
+        self._ensure_writer()
+        ticket = _AuditTicket(record)
+        try:
+            self._queue.put(ticket, timeout=self.enqueue_timeout)
+        except queue.Full:
+            logger.warning('Audit queue full; writing record inline')
+            self._write_inline(record)
+            return record
+
+        if self.sync if wait is None else wait:
+            if not ticket.done.wait(self.wait_timeout):
+                raise RuntimeError('Audit record was not persisted in time')
+            if ticket.error is not None:
+                raise ticket.error
+        return record
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until everything queued so far is committed"""
+        if self._queue is None or self._thread is None:
+            return True
+        marker = _AuditTicket(None)
+        self._queue.put(marker)
+        return marker.done.wait(timeout if timeout is not None else self.wait_timeout)
+
+    def shutdown(self):
+        if self._thread is not None and self._thread.is_alive():
+            self.flush()
+            self._stop.set()
+            self._thread.join(timeout=self.wait_timeout)
+
+    def get_stats(self) -> Dict:
+        return {
+            'enabled': bool(self.app is not None and self.enabled),
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'writer_alive': bool(self._thread is not None and self._thread.is_alive())
+        }
+
+    def _ensure_writer(self):
+        # Started lazily (and again after fork) so pre-forking servers get one writer per worker
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            if self._pid != os.getpid():
+                self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._stop.clear()
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='audit-pipeline-writer', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        with self.app.app_context():
+            while not self._stop.is_set():
+                try:
+                    first = self._queue.get(timeout=0.5)
+                except queue.Empty:
+                    continue
+
+                batch = [first]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+
+                self._write_batch([ticket for ticket in batch if ticket.record is not None])
+                for ticket in batch:
+                    ticket.done.set()
+
+    def _write_batch(self, tickets: List[_AuditTicket]):
+        if not tickets:
+            return
+        try:
+            with Session(db.engine, expire_on_commit=False) as session:
+                session.add_all([ticket.record for ticket in tickets])
+                session.commit()
+                session.expunge_all()
+            return
+        except Exception as e:
+            logger.error(f'Audit group commit of {len(tickets)} records failed, retrying individually: {str(e)}')
+
+        # Isolate the bad record so the rest of the group is still persisted
+        for ticket in tickets:
+            try:
+                with Session(db.engine, expire_on_commit=False) as session:
+                    session.add(ticket.record)
+                    session.commit()
+                    session.expunge_all()
+            except Exception as e:
+                ticket.error = e
+                logger.error(f'Audit record {ticket.record!r} could not be written: {str(e)}')
+
+    @staticmethod
+    def _write_inline(record):
+        with Session(db.engine, expire_on_commit=False) as session:
+            session.add(record)
+            session.commit()
+            session.expunge_all()
+
+
+@event.listens_for(Session, 'before_commit')
+def _flush_staged_audit(session):
+    if session.in_nested_transaction():
+        # Savepoint commits fire this too; the batch belongs to the outermost commit
+        return
+    staged = session.info.pop(_STAGED_KEY, None)
+    if not staged:
+        return
+    if staged['records']:
+        session.add_all(staged['records'])
+    if staged['mappings']:
+        # Rows may reference objects still pending in this transaction
+        session.flush()
+    for model, rows in staged['mappings'].items():
+        session.bulk_insert_mappings(model, rows)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_staged_audit(session, previous_transaction):
+    # A savepoint rollback keeps the outer transaction, and the records it staged
+    if previous_transaction.parent is None:
+        session.info.pop(_STAGED_KEY, None)
+
+
+audit_pipeline = AuditIngestionPipeline()
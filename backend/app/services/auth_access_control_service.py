@@ -8,6 +8,7 @@ from app.models.auth_access_control import (
 )
 from app.models.user import User, UserRole
 from app import db
+from app.services.audit_pipeline_service import audit_pipeline
 import pyotp
 
 class AccessControlService:
@@ -134,9 +135,7 @@ class AccessControlService:
             session_id=session_id,
             details=details
         )
-        db.session.add(log)
-        db.session.commit()
-        return log
+        return audit_pipeline.submit(log)
     
     @staticmethod
     def check_segregation_of_duties(user_id, action_type, resource_type):
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 from app import db
 from app.models.user import User
 from app.models.audit import AuditLog
+from app.services.audit_pipeline_service import audit_pipeline
 import hashlib
 import secrets
 
@@ -35,7 +36,7 @@ class AuthService:
             change_description=f'User account created: {user.email}',
             timestamp=datetime.utcnow()
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return user
@@ -60,8 +61,7 @@ class AuthService:
                     ip_address=ip_address,
                     device_info=device_info
                 )
-                db.session.add(audit)
-                db.session.commit()
+                audit_pipeline.submit(audit)
             return None
         
         if not user.is_active:
@@ -83,7 +83,7 @@ class AuthService:
             ip_address=ip_address,
             device_info=device_info
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return user
@@ -0,0 +1,214 @@
+"""Compliance dashboard and trend figures from incrementally maintained rollups
+
+ReportsEngineService.get_compliance_dashboard and calculate_report_trends fold
+a scope's whole report history on every call. Here each report event updates
+running totals instead: one compliance_rollups row per (scope, report type)
+plus a '*' row for the scope as a whole, holding counts, the compliance sum,
+the latest report and a ring buffer of the last COMPLIANCE_TREND_LENGTH
+compliance percentages. Dashboard and trend reads touch only those rows, no
+matter how many reports a scope has.
+
+compliance_report_entries keeps one row per report so that events are applied
+once (a repeated approval does not count twice), status changes can be undone
+from the right counters, and a scope's rollups can be rebuilt from scratch.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List
+
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from app import db
+from app.models.compliance_rollup import ALL_REPORT_TYPES, ComplianceReportEntry, ComplianceRollup
+
+logger = logging.getLogger(__name__)
+
+_COUNTERS = ('report_count', 'complete_count', 'approved_count', 'no_critical_count', 'compliance_sum')
+
+
+def _as_datetime(value) -> datetime:
+    if value is None:
+        return datetime.utcnow()
+    return datetime.fromisoformat(value) if isinstance(value, str) else value
+
+
+class ComplianceRollupService:
+    """Applies report events to per-scope rollups and reads dashboards from them"""
+
+    # =========================================================================
+    # EVENTS
+    # =========================================================================
+
+    @staticmethod
+    def record_generated(report: Dict) -> bool:
+        """Fold a newly generated report (as returned by ReportsEngineService.generate_report) into the rollups
+
+        Returns False if the report was already recorded.
+        """
+        if ComplianceReportEntry.query.get(report['id']) is not None:
+            return False
+        summary = report.get('summary') or {}
+        entry = ComplianceReportEntry(
+            report_id=report['id'],
+            scope_id=report['validation_scope_id'],
+            report_type=report['report_type'],
+            status=report.get('status'),
+            compliance_percentage=summary.get('compliance_percentage') or 0,
+            critical_findings=summary.get('critical_findings') or 0,
+            generated_at=_as_datetime(report.get('generated_at'))
+        )
+        try:
+            with db.session.begin_nested():
+                db.session.add(entry)
+        except IntegrityError:
+            # Recorded concurrently by another request; only the savepoint is rolled back
+            return False
+
+        limit = int(current_app.config.get('COMPLIANCE_TREND_LENGTH', 10))
+        for rollup in ComplianceRollupService._lock_rollups(entry.scope_id, entry.report_type):
+            ComplianceRollupService._fold(rollup, entry, limit)
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def record_approved(report_id: str, approved_at: datetime = None) -> bool:
+        """Count a report approval once; returns False for unknown or already approved reports"""
+        entry = ComplianceReportEntry.query.filter_by(report_id=report_id).with_for_update().first()
+        if entry is None or entry.approved_at is not None:
+            db.session.rollback()
+            return False
+        entry.approved_at = _as_datetime(approved_at)
+        for rollup in ComplianceRollupService._lock_rollups(entry.scope_id, entry.report_type):
+            rollup.approved_count += 1
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def record_status(report_id: str, status: str) -> bool:
+        """Move a report to a new status (e.g. GENERATING -> COMPLETE)"""
+        entry = ComplianceReportEntry.query.filter_by(report_id=report_id).with_for_update().first()
+        if entry is None or entry.status == status:
+            db.session.rollback()
+            return False
+        delta = (status == 'COMPLETE') - (entry.status == 'COMPLETE')
+        entry.status = status
+        for rollup in ComplianceRollupService._lock_rollups(entry.scope_id, entry.report_type):
+            rollup.complete_count += delta
+            if rollup.latest_report_id == report_id:
+                rollup.latest_status = status
+        db.session.commit()
+        return True
+
+    @staticmethod
+    def rebuild_scope(scope_id: str) -> int:
+        """Recompute a scope's rollups from its report entries; returns reports folded"""
+        ComplianceRollup.query.filter_by(scope_id=scope_id).delete(synchronize_session=False)
+        limit = int(current_app.config.get('COMPLIANCE_TREND_LENGTH', 10))
+        rollups: Dict[str, ComplianceRollup] = {}
+        entries = ComplianceReportEntry.query.filter_by(scope_id=scope_id).order_by(
+            ComplianceReportEntry.generated_at
+        ).all()
+        for entry in entries:
+            for report_type in (entry.report_type, ALL_REPORT_TYPES):
+                rollup = rollups.get(report_type)
+                if rollup is None:
+                    rollup = rollups[report_type] = ComplianceRollupService._empty(scope_id, report_type)
+                ComplianceRollupService._fold(rollup, entry, limit)
+                rollup.approved_count += entry.approved_at is not None
+        db.session.add_all(rollups.values())
+        db.session.commit()
+        return len(entries)
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    @staticmethod
+    def get_dashboard(scope_id: str) -> Dict:
+        """Same shape as ReportsEngineService.get_compliance_dashboard, read from rollups"""
+        rollups = {row.report_type: row for row in ComplianceRollup.query.filter_by(scope_id=scope_id)}
+        overall = rollups.get(ALL_REPORT_TYPES)
+        return {
+            'scope_id': scope_id,
+            'generated_at': datetime.utcnow().isoformat(),
+            'oq_status': rollups['OQ'].latest_status if 'OQ' in rollups else None,
+            'iq_status': rollups['IQ'].latest_status if 'IQ' in rollups else None,
+            'pq_status': rollups['PQ'].latest_status if 'PQ' in rollups else None,
+            'vsr_count': rollups['VSR'].report_count if 'VSR' in rollups else 0,
+            'rtm_completion': rollups['RTM'].complete_count if 'RTM' in rollups else 0,
+            'avg_compliance_percentage': overall.compliance_sum / overall.report_count if overall and overall.report_count else 0
+        }
+
+    @staticmethod
+    def get_trends(scope_id: str) -> Dict:
+        """Same shape as ReportsEngineService.calculate_report_trends, read from the scope's '*' rollup"""
+        overall = ComplianceRollup.query.get((scope_id, ALL_REPORT_TYPES))
+        count = overall.report_count if overall else 0
+        return {
+            'scope_id': scope_id,
+            'analysis_timestamp': datetime.utcnow().isoformat(),
+            'total_reports_generated': count,
+            'pass_rate_trend': [percentage for _, percentage in overall.recent_compliance or []] if overall else [],
+            'average_pass_rate': overall.compliance_sum / count if count else 0,
+            'critical_issues_resolved': overall.no_critical_count if overall else 0,
+            'report_generation_time_hours': 2.5  # Average generation time
+        }
+
+    # =========================================================================
+    # HELPERS
+    # =========================================================================
+
+    @staticmethod
+    def _lock_rollups(scope_id: str, report_type: str) -> List[ComplianceRollup]:
+        """The type row and the '*' row of a scope, row-locked and created if missing"""
+        keys = sorted({report_type, ALL_REPORT_TYPES})
+
+        def locked():
+            # Fixed lock order so concurrent events on one scope cannot deadlock
+            return {row.report_type: row for row in ComplianceRollup.query.filter(
+                ComplianceRollup.scope_id == scope_id,
+                ComplianceRollup.report_type.in_(keys)
+            ).order_by(ComplianceRollup.report_type).with_for_update()}
+
+        rows = locked()
+        missing = [key for key in keys if key not in rows]
+        if missing:
+            try:
+                with db.session.begin_nested():
+                    db.session.add_all([ComplianceRollupService._empty(scope_id, key) for key in missing])
+            except IntegrityError:
+                pass  # Created concurrently; the re-read below locks the other request's rows
+            rows = locked()
+        return [rows[key] for key in keys]
+
+    @staticmethod
+    def _empty(scope_id: str, report_type: str) -> ComplianceRollup:
+        rollup = ComplianceRollup(scope_id=scope_id, report_type=report_type, recent_compliance=[])
+        for counter in _COUNTERS:
+            setattr(rollup, counter, 0)
+        return rollup
+
+    @staticmethod
+    def _fold(rollup: ComplianceRollup, entry: ComplianceReportEntry, limit: int):
+        """Add one report to a rollup's counters, latest report and trend buffer"""
+        rollup.report_count += 1
+        rollup.complete_count += entry.status == 'COMPLETE'
+        rollup.no_critical_count += not entry.critical_findings
+        rollup.compliance_sum += entry.compliance_percentage or 0
+        if rollup.latest_generated_at is None or entry.generated_at > rollup.latest_generated_at:
+            rollup.latest_report_id = entry.report_id
+            rollup.latest_status = entry.status
+            rollup.latest_generated_at = entry.generated_at
+        rollup.recent_compliance = ComplianceRollupService._push_recent(
+            rollup.recent_compliance or [], entry.generated_at, entry.compliance_percentage, limit
+        )
+
+    @staticmethod
+    def _push_recent(recent: List, generated_at: datetime, percentage: float, limit: int) -> List:
+        """Insert into the generated_at-ordered ring buffer, keeping the newest limit items"""
+        item = [generated_at.isoformat(), percentage or 0]
+        position = len(recent)
+        while position > 0 and recent[position - 1][0] > item[0]:
+            position -= 1
+        return (recent[:position] + [item] + recent[position:])[-limit:]
@@ -0,0 +1,180 @@
+"""Deviation index: failed tests kept as an indexed projection
+
+Every test case whose execution turns FAIL gets a deviation_index row,
+written in the same transaction as the status change: completing the
+execution (POST /api/tests/executions/<id>/complete) or recording step
+results that derive overall_status (record_step_results with track_totals);
+a later execution that turns PASS marks it Resolved. Deviation reports, open-deviation counts and the
+workflow no_deviations rule then read a project's open rows straight from the
+(project_id, status, plan_name, test_name) index instead of ranking every
+case's executions.
+
+rebuild_project (CLI: flask rebuild_deviation_index) re-derives the rows from
+each case's latest execution, for data loaded outside these paths (imports).
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterator
+
+from sqlalchemy import select
+from app import db
+from app.models.deviation_index import DeviationIndexEntry
+from app.models.test_management import TestPlan, TestCase, TestExecution
+from app.services.test_management_service import TestManagementService
+
+logger = logging.getLogger(__name__)
+
+
+class DeviationIndexService:
+    """Maintains and reads the deviation projection"""
+
+    # =========================================================================
+    # MAINTENANCE
+    # =========================================================================
+
+    @staticmethod
+    def record_execution(execution: TestExecution, detected_at: datetime = None) -> DeviationIndexEntry:
+        """Open, refresh or resolve a test case's deviation from an execution's status (caller commits)
+
+        FAIL opens (or refreshes) the case's deviation and PASS resolves it;
+        BLOCKED and NOT_RUN leave it as it is.
+        """
+        entry = DeviationIndexEntry.query.get(execution.test_case_id)
+        if execution.overall_status != 'FAIL':
+            if execution.overall_status == 'PASS' and entry is not None and entry.status == 'Open':
+                entry.status = 'Resolved'
+                entry.resolved_at = datetime.utcnow()
+            return entry
+
+        if entry is None:
+            case = db.session.query(
+                TestCase.name, TestCase.priority, TestPlan.id, TestPlan.name, TestPlan.project_id
+            ).join(TestPlan, TestCase.plan_id == TestPlan.id).filter(TestCase.id == execution.test_case_id).first()
+            if case is None:
+                logger.warning(f'Failed execution {execution.id} has no test case; not indexed as a deviation')
+                return None
+            name, priority, plan_id, plan_name, project_id = case
+            entry = DeviationIndexEntry(
+                test_id=execution.test_case_id,
+                project_id=project_id,
+                plan_id=plan_id,
+                plan_name=plan_name,
+                test_name=name,
+                priority=priority
+            )
+            db.session.add(entry)
+        entry.execution_id = execution.id
+        entry.executed_by = execution.executed_by
+        entry.failed_steps = execution.failed_steps
+        entry.comments = execution.comments
+        if entry.status != 'Open' or entry.detected_at is None:
+            entry.detected_at = detected_at or execution.execution_date or datetime.utcnow()
+        entry.status = 'Open'
+        entry.resolved_at = None
+        return entry
+
+    @staticmethod
+    def rebuild_project(project_id: str) -> int:
+        """Re-derive a project's open deviations from each case's latest execution (caller commits)
+
+        Returns the number of rows written.
+        """
+        DeviationIndexEntry.query.filter_by(project_id=project_id).delete(synchronize_session=False)
+        latest = TestManagementService.latest_executions(
+            select(TestCase.id).join(TestPlan, TestCase.plan_id == TestPlan.id).where(TestPlan.project_id == project_id)
+        )
+        rows = db.session.query(
+            TestCase.id,
+            TestCase.name,
+            TestCase.priority,
+            TestPlan.id,
+            TestPlan.name,
+            TestExecution.id,
+            TestExecution.executed_by,
+            TestExecution.failed_steps,
+            TestExecution.comments,
+            TestExecution.execution_date
+        ).join(
+            TestPlan, TestCase.plan_id == TestPlan.id
+        ).join(
+            latest, latest.c.test_case_id == TestCase.id
+        ).join(
+            TestExecution, TestExecution.id == latest.c.execution_id
+        ).filter(
+            TestPlan.project_id == project_id,
+            latest.c.overall_status == 'FAIL'
+        ).all()
+        now = datetime.utcnow()
+        db.session.bulk_insert_mappings(DeviationIndexEntry, [{
+            'test_id': test_id,
+            'project_id': project_id,
+            'plan_id': plan_id,
+            'plan_name': plan_name,
+            'test_name': name,
+            'priority': priority,
+            'execution_id': execution_id,
+            'executed_by': executed_by,
+            'failed_steps': failed_steps,
+            'comments': comments,
+            'status': 'Open',
+            'detected_at': execution_date,
+            'updated_at': now
+        } for (test_id, name, priority, plan_id, plan_name, execution_id,
+               executed_by, failed_steps, comments, execution_date) in rows])
+        return len(rows)
+
+    # =========================================================================
+    # READS
+    # =========================================================================
+
+    @staticmethod
+    def _open(project_id: str):
+        return DeviationIndexEntry.query.filter(
+            DeviationIndexEntry.project_id == project_id,
+            DeviationIndexEntry.status == 'Open'
+        )
+
+    @staticmethod
+    def iter_open(project_id: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """A project's open deviations in plan/test order, as deviation report records"""
+        rows = db.session.query(
+            DeviationIndexEntry.test_id,
+            DeviationIndexEntry.test_name,
+            DeviationIndexEntry.plan_name,
+            DeviationIndexEntry.execution_id,
+            DeviationIndexEntry.failed_steps,
+            DeviationIndexEntry.comments,
+            DeviationIndexEntry.detected_at,
+            DeviationIndexEntry.priority
+        ).filter(
+            DeviationIndexEntry.project_id == project_id,
+            DeviationIndexEntry.status == 'Open'
+        ).order_by(
+            DeviationIndexEntry.plan_name, DeviationIndexEntry.test_name
+        ).yield_per(batch_size)
+        for test_id, name, plan_name, execution_id, failed_steps, comments, detected_at, priority in rows:
+            yield {
+                'deviation_id': f'DEV-{test_id}',
+                'test_case_id': test_id,
+                'test_title': name,
+                'test_plan': plan_name,
+                'execution_id': execution_id,
+                'failed_steps': failed_steps,
+                'comments': comments,
+                'detected_date': detected_at.isoformat() if detected_at else None,
+                'severity': 'Critical' if priority == 1 else 'Major',
+                'status': 'Open',
+                'investigation_required': True
+            }
+
+    @staticmethod
+    def count_open(project_id: str) -> int:
+        return DeviationIndexService._open(project_id).with_entities(
+            db.func.count(DeviationIndexEntry.test_id)
+        ).scalar() or 0
+
+    @staticmethod
+    def has_open(project_id: str) -> bool:
+        """Whether a project has any open deviation (one index probe)"""
+        return db.session.query(DeviationIndexService._open(project_id).exists()).scalar()
@@ -3,6 +3,7 @@ from datetime import datetime
 from app import db
 from app.models.document import Document, DocumentTemplate, ElectronicSignature
 from app.models.audit import AuditLog
+from app.services.audit_pipeline_service import audit_pipeline
 import hashlib
 import uuid
 
@@ -41,7 +42,7 @@ class DocumentService:
             change_description=f'Document created: {document.document_number}',
             timestamp=datetime.utcnow()
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return document
@@ -97,7 +98,7 @@ class DocumentService:
             change_description=f'New version {new_document.version} created from {original.version}',
             timestamp=datetime.utcnow()
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return new_document
@@ -149,7 +150,7 @@ class DocumentService:
             timestamp=datetime.utcnow(),
             ip_address=ip_address
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return signature
\ No newline at end of file
@@ -1,8 +1,13 @@
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
+from sqlalchemy.exc import IntegrityError
 from app import db
-from app.models import FieldAuditLog, ChangeRequest, DocumentComment, RiskAssessment, User
+from app.models import FieldAuditLog, FieldAuditChainHead, ChangeRequest, DocumentComment, RiskAssessment, User
+from app.services.audit_archive_service import AuditArchiveService
+from app.services.audit_pipeline_service import audit_pipeline
+from app.services.field_audit_verifier_service import CHAIN_COLUMNS, verify_chain
 import hashlib
+import itertools
 import json
 
 class FieldAuditService:
@@ -10,61 +15,128 @@ class FieldAuditService:
     
     @staticmethod
     def log_field_change(entity_type, entity_id, field_name, old_value, new_value, user_id, ip_address=None, change_reason=None):
-        """Create an immutable field audit log entry."""
-        # Serialize values for storage
-        old_val_str = json.dumps(old_value) if not isinstance(old_value, str) else old_value
-        new_val_str = json.dumps(new_value) if not isinstance(new_value, str) else new_value
+        """Create an immutable field audit log entry.
         
-        # Get previous hash for chain
-        previous_log = FieldAuditLog.query.filter_by(
+        Returns the logged values as a transient FieldAuditLog (its id is not loaded).
+        """
+        rows = FieldAuditService.log_field_changes(
+            entity_type, entity_id,
+            [{'field_name': field_name, 'old_value': old_value, 'new_value': new_value}],
+            user_id, ip_address=ip_address, change_reason=change_reason
+        )
+        return FieldAuditLog(**rows[0])
+    
+    @staticmethod
+    def log_field_changes(entity_type, entity_id, changes, user_id, ip_address=None, change_reason=None):
+        """Log many field changes for one entity with a single chain lookup and commit.
+        
+        changes: [{'field_name', 'old_value', 'new_value', 'change_reason' (optional)}]
+        Hashes are chained in memory from the entity's chain head, all rows are
+        bulk-inserted, and the head is advanced in the same transaction.
+        Returns the inserted column values in chain order.
+        """
+        if not changes:
+            return []
+        
+        head = FieldAuditService._lock_chain_head(entity_type, entity_id)
+        previous_hash = head.head_hash
+        # Second precision so stored timestamps re-hash identically
+        timestamp = datetime.utcnow().replace(microsecond=0)
+        
+        rows = []
+        for change in changes:
+            old_value = change.get('old_value')
+            new_value = change.get('new_value')
+            row = {
+                'entity_type': entity_type,
+                'entity_id': entity_id,
+                'field_name': change['field_name'],
+                # Serialize values for storage
+                'old_value': json.dumps(old_value) if not isinstance(old_value, str) else old_value,
+                'new_value': json.dumps(new_value) if not isinstance(new_value, str) else new_value,
+                'user_id': user_id,
+                'change_timestamp': timestamp,
+                'ip_address': ip_address,
+                'change_reason': change.get('change_reason', change_reason),
+                'approval_status': 'pending',
+                'previous_hash': previous_hash,
+                'created_at': timestamp
+            }
+            row['change_hash'] = FieldAuditLog.compute_hash(row)
+            previous_hash = row['change_hash']
+            rows.append(row)
+        
+        try:
+            audit_pipeline.stage_mappings(FieldAuditLog, rows)
+            head.head_hash = previous_hash
+            head.entry_count = (head.entry_count or 0) + len(rows)
+            head.updated_at = datetime.utcnow()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return rows
+    
+    @staticmethod
+    def _lock_chain_head(entity_type, entity_id):
+        """Fetch (and row-lock) the entity's chain head by primary key, creating it on first use."""
+        head = FieldAuditChainHead.query.filter_by(
             entity_type=entity_type,
             entity_id=entity_id
-        ).order_by(desc(FieldAuditLog.created_at)).first()
+        ).with_for_update().first()
+        if head:
+            return head
         
-        previous_hash = previous_log.change_hash if previous_log else None
+        # One-time seed for chains written before heads were tracked
+        previous_log = FieldAuditLog.query.filter_by(
+            entity_type=entity_type,
+            entity_id=entity_id
+        ).order_by(desc(FieldAuditLog.created_at), desc(FieldAuditLog.id)).first()
+        entry_count = FieldAuditLog.query.filter_by(
+            entity_type=entity_type,
+            entity_id=entity_id
+        ).count() if previous_log else 0
         
-        # Create new audit log
-        audit_log = FieldAuditLog(
+        head = FieldAuditChainHead(
             entity_type=entity_type,
             entity_id=entity_id,
-            field_name=field_name,
-            old_value=old_val_str,
-            new_value=new_val_str,
-            user_id=user_id,
-            ip_address=ip_address,
-            change_reason=change_reason,
-            previous_hash=previous_hash
+            head_hash=previous_log.change_hash if previous_log else None,
+            entry_count=entry_count
         )
-        
-        # Calculate hash
-        audit_log.change_hash = audit_log.calculate_hash()
-        
-        db.session.add(audit_log)
-        db.session.commit()
-        return audit_log
+        try:
+            with db.session.begin_nested():
+                db.session.add(head)
+            return head
+        except IntegrityError:
+            # A concurrent first write created the head; wait for its lock and chain after its entries
+            return FieldAuditChainHead.query.filter_by(
+                entity_type=entity_type,
+                entity_id=entity_id
+            ).populate_existing().with_for_update().one()
     
     @staticmethod
     def verify_audit_trail(entity_type, entity_id):
         """Verify integrity of entire audit trail for an entity."""
-        logs = FieldAuditLog.query.filter_by(
-            entity_type=entity_type,
-            entity_id=entity_id
-        ).order_by(FieldAuditLog.created_at).all()
+        rows = db.session.query(*CHAIN_COLUMNS).filter(
+            FieldAuditLog.entity_type == entity_type,
+            FieldAuditLog.entity_id == entity_id
+        ).order_by(FieldAuditLog.created_at, FieldAuditLog.id).yield_per(1000)
         
-        for i, log in enumerate(logs):
-            if not log.verify_integrity():
-                return False, f"Integrity check failed at log {i+1}"
-            if i > 0 and log.previous_hash != logs[i-1].change_hash:
-                return False, f"Chain integrity broken at log {i+1}"
+        # Months moved to the audit archive come first in the chain
+        archived = (tuple(values[column.key] for column in CHAIN_COLUMNS)
+                    for values in AuditArchiveService.iter_archived_rows('field_audit_logs', (entity_type, entity_id)))
+        _, findings = verify_chain(entity_type, entity_id, itertools.chain(archived, rows))
+        if findings:
+            finding = findings[0]
+            if finding['reason'] == 'hash_mismatch':
+                return False, f"Integrity check failed at log {finding['position']}"
+            return False, f"Chain integrity broken at log {finding['position']}"
         return True, "All logs verified"
     
     @staticmethod
     def get_audit_history(entity_type, entity_id, limit=50):
         """Retrieve audit history for an entity."""
-        return FieldAuditLog.query.filter_by(
-            entity_type=entity_type,
-            entity_id=entity_id
-        ).order_by(desc(FieldAuditLog.created_at)).limit(limit).all()
+        return AuditArchiveService.get_history('field_audit_logs', (entity_type, entity_id), limit)
     
     @staticmethod
     def approve_changes(audit_log_ids, approved_by_user_id, notes=None):
@@ -0,0 +1,265 @@
+"""Full-table verifier for the field audit hash chains
+
+Streams FieldAuditLog in (entity_type, entity_id, created_at, id) order over a
+server-side cursor, groups rows into per-entity chains and hands batches of
+chains to a process pool for the SHA-256 work. Results are consumed in
+submission order, so the last verified entity key is always a safe resume
+point; it is checkpointed to field_audit_verification_runs after every batch.
+"""
+
+import logging
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import select, tuple_
+from app import db
+from app.models.field_audit import FieldAuditLog, FieldAuditChainHead, FieldAuditVerificationRun
+
+logger = logging.getLogger(__name__)
+
+# Row layout handed to worker processes (plain tuples pickle cheaply)
+CHAIN_COLUMNS = (
+    FieldAuditLog.id,
+    FieldAuditLog.field_name,
+    FieldAuditLog.old_value,
+    FieldAuditLog.new_value,
+    FieldAuditLog.user_id,
+    FieldAuditLog.change_timestamp,
+    FieldAuditLog.previous_hash,
+    FieldAuditLog.change_hash
+)
+
+# Finding reason -> FieldAuditVerificationRun counter column
+REASON_COUNTERS = {
+    'hash_mismatch': 'hash_mismatch_count',
+    'broken_link': 'broken_link_count',
+    'head_mismatch': 'head_mismatch_count'
+}
+
+
+def verify_chain(entity_type: str, entity_id: int, rows: Iterable[Tuple],
+                 head_hash: str = None, start_hash: str = None) -> Tuple[int, List[Dict]]:
+    """Check one entity's chain; rows are CHAIN_COLUMNS tuples in chain order
+
+    Returns (entries checked, findings). A finding is raised for an entry whose
+    stored hash does not match its contents, an entry that does not point at
+    its predecessor, and a chain whose last entry differs from the tracked head.
+    start_hash is the hash the first row must link to (the last archived entry).
+    """
+    findings = []
+    previous_hash = start_hash
+    position = 0
+    last_id = None
+    for log_id, field_name, old_value, new_value, user_id, change_timestamp, stored_previous, change_hash in rows:
+        position += 1
+        last_id = log_id
+        expected = FieldAuditLog.compute_hash({
+            'entity_type': entity_type,
+            'entity_id': entity_id,
+            'field_name': field_name,
+            'old_value': old_value,
+            'new_value': new_value,
+            'user_id': user_id,
+            'change_timestamp': change_timestamp,
+            'previous_hash': stored_previous
+        })
+        if change_hash != expected:
+            findings.append(_finding(entity_type, entity_id, log_id, position, 'hash_mismatch'))
+        if (stored_previous or None) != previous_hash:
+            findings.append(_finding(entity_type, entity_id, log_id, position, 'broken_link'))
+        previous_hash = change_hash
+
+    if head_hash is not None and position and previous_hash != head_hash and not findings:
+        findings.append(_finding(entity_type, entity_id, last_id, position, 'head_mismatch'))
+    return position, findings
+
+
+def verify_chain_batch(chains: List[Tuple]) -> Tuple[int, int, List[Dict]]:
+    """Process-pool entry point: chains are (entity_type, entity_id, head_hash, start_hash, rows)
+
+    Returns (entries checked, broken entities, findings).
+    """
+    entries = 0
+    broken = 0
+    findings = []
+    for entity_type, entity_id, head_hash, start_hash, rows in chains:
+        checked, chain_findings = verify_chain(entity_type, entity_id, rows, head_hash, start_hash)
+        entries += checked
+        if chain_findings:
+            broken += 1
+            findings.extend(chain_findings)
+    return entries, broken, findings
+
+
+def _finding(entity_type: str, entity_id: int, log_id: int, position: int, reason: str) -> Dict:
+    return {
+        'entity_type': entity_type,
+        'entity_id': entity_id,
+        'log_id': log_id,
+        'position': position,
+        'reason': reason
+    }
+
+
+class FieldAuditVerifier:
+    """Resumable, parallel verification of every field audit chain"""
+
+    def __init__(self, app, workers: int = None, batch_entities: int = None, fetch_size: int = None):
+        self.app = app
+        config = app.config
+        self.workers = workers or int(config.get('FIELD_AUDIT_VERIFY_WORKERS', 4))
+        self.batch_entities = batch_entities or int(config.get('FIELD_AUDIT_VERIFY_BATCH_ENTITIES', 500))
+        self.fetch_size = fetch_size or int(config.get('FIELD_AUDIT_VERIFY_FETCH_SIZE', 5000))
+        self.max_findings = int(config.get('FIELD_AUDIT_VERIFY_MAX_FINDINGS', 1000))
+
+    def run(self, resume: bool = True, started_by: str = None) -> Dict:
+        """Verify all chains, continuing the latest unfinished run when resume=True"""
+        with self.app.app_context():
+            run = self._start_run(resume, started_by)
+            after = (run.last_entity_type, run.last_entity_id) if run.last_entity_type is not None else None
+            logger.info(f'Field audit verification run {run.id} started'
+                        + (f' after {after[0]}:{after[1]}' if after else ''))
+            try:
+                if self.workers > 1:
+                    with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                        self._verify(run, after, pool)
+                else:
+                    self._verify(run, after, None)
+                run.status = 'completed'
+                run.completed_at = datetime.utcnow()
+                db.session.commit()
+            except BaseException as e:
+                db.session.rollback()
+                run.status = 'failed'
+                run.error_message = str(e) or e.__class__.__name__
+                db.session.commit()
+                raise
+            return FieldAuditVerifier.get_summary(run)
+
+    def _start_run(self, resume: bool, started_by: Optional[str]) -> FieldAuditVerificationRun:
+        if resume:
+            run = FieldAuditVerificationRun.query.filter(
+                FieldAuditVerificationRun.status.in_(['running', 'failed'])
+            ).order_by(FieldAuditVerificationRun.id.desc()).first()
+            if run:
+                run.status = 'running'
+                run.error_message = None
+                db.session.commit()
+                return run
+        run = FieldAuditVerificationRun(status='running', started_by=started_by, broken_links=[],
+                                        entities_verified=0, entries_verified=0, broken_entities=0,
+                                        hash_mismatch_count=0, broken_link_count=0, head_mismatch_count=0)
+        db.session.add(run)
+        db.session.commit()
+        return run
+
+    def _verify(self, run: FieldAuditVerificationRun, after: Optional[Tuple], pool: Optional[ProcessPoolExecutor]):
+        in_flight = deque()  # (future or result, last entity key, entity count)
+        window = max(self.workers * 2, 1)
+
+        for chains in self._iter_batches(after):
+            last_key = (chains[-1][0], chains[-1][1])
+            if pool is None:
+                in_flight.append((verify_chain_batch(chains), last_key, len(chains)))
+            else:
+                in_flight.append((pool.submit(verify_chain_batch, chains), last_key, len(chains)))
+            while len(in_flight) >= window:
+                self._record(run, *in_flight.popleft())
+
+        while in_flight:
+            self._record(run, *in_flight.popleft())
+
+    def _record(self, run: FieldAuditVerificationRun, outcome, last_key: Tuple, entity_count: int):
+        entries, broken, findings = outcome if isinstance(outcome, tuple) else outcome.result()
+        run.last_entity_type, run.last_entity_id = last_key
+        run.entities_verified = (run.entities_verified or 0) + entity_count
+        run.entries_verified = (run.entries_verified or 0) + entries
+        run.broken_entities = (run.broken_entities or 0) + broken
+        if findings:
+            stored = list(run.broken_links or [])
+            run.broken_links = stored + findings[:max(self.max_findings - len(stored), 0)]
+            for finding in findings:
+                counter = REASON_COUNTERS[finding['reason']]
+                setattr(run, counter, (getattr(run, counter) or 0) + 1)
+                logger.warning(f"Field audit chain {finding['entity_type']}:{finding['entity_id']} "
+                               f"{finding['reason']} at entry {finding['position']} (log {finding['log_id']})")
+        db.session.commit()
+
+    def _iter_batches(self, after: Optional[Tuple]):
+        """Yield lists of (entity_type, entity_id, head_hash, start_hash, rows) in key order"""
+        batch = []
+        batch_rows = 0
+        for entity_type, entity_id, rows in self._stream_chains(after):
+            batch.append((entity_type, entity_id, rows))
+            batch_rows += len(rows)
+            if len(batch) >= self.batch_entities or batch_rows >= self.fetch_size:
+                yield self._attach_heads(batch)
+                batch = []
+                batch_rows = 0
+        if batch:
+            yield self._attach_heads(batch)
+
+    def _stream_chains(self, after: Optional[Tuple]):
+        """Group the ordered row stream into per-entity chains"""
+        query = select(FieldAuditLog.entity_type, FieldAuditLog.entity_id, *CHAIN_COLUMNS)
+        if after is not None:
+            query = query.where(db.or_(
+                FieldAuditLog.entity_type > after[0],
+                db.and_(FieldAuditLog.entity_type == after[0], FieldAuditLog.entity_id > after[1])
+            ))
+        query = query.order_by(
+            FieldAuditLog.entity_type, FieldAuditLog.entity_id, FieldAuditLog.created_at, FieldAuditLog.id
+        )
+
+        # Separate connection so checkpoint commits do not disturb the server-side cursor
+        with db.engine.connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=self.fetch_size).execute(query)
+            key = None
+            rows = []
+            for row in result:
+                row_key = (row[0], row[1])
+                if row_key != key:
+                    if rows:
+                        yield key[0], key[1], rows
+                    key = row_key
+                    rows = []
+                rows.append(tuple(row[2:]))
+            if rows:
+                yield key[0], key[1], rows
+
+    def _attach_heads(self, batch: List[Tuple]) -> List[Tuple]:
+        keys = [(entity_type, entity_id) for entity_type, entity_id, _ in batch]
+        heads = dict(((head.entity_type, head.entity_id), (head.head_hash, head.archived_hash)) for head in db.session.query(
+            FieldAuditChainHead.entity_type, FieldAuditChainHead.entity_id,
+            FieldAuditChainHead.head_hash, FieldAuditChainHead.archived_hash
+        ).filter(tuple_(FieldAuditChainHead.entity_type, FieldAuditChainHead.entity_id).in_(keys)).all())
+        # Archived prefixes are sealed files, checked by AuditArchiveService.verify_partitions
+        return [(entity_type, entity_id) + heads.get((entity_type, entity_id), (None, None)) + (rows,)
+                for entity_type, entity_id, rows in batch]
+
+    @staticmethod
+    def get_summary(run: FieldAuditVerificationRun = None) -> Optional[Dict]:
+        """Report for a run (latest run when none is given)"""
+        run = run or FieldAuditVerificationRun.query.order_by(FieldAuditVerificationRun.id.desc()).first()
+        if run is None:
+            return None
+        findings = run.broken_links or []
+        by_reason = {reason: getattr(run, counter) or 0 for reason, counter in REASON_COUNTERS.items()}
+        return {
+            'run_id': run.id,
+            'status': run.status,
+            'valid': run.status == 'completed' and not run.broken_entities,
+            'started_at': run.started_at.isoformat() if run.started_at else None,
+            'completed_at': run.completed_at.isoformat() if run.completed_at else None,
+            'entities_verified': run.entities_verified,
+            'entries_verified': run.entries_verified,
+            'broken_entities': run.broken_entities,
+            'findings_by_reason': by_reason,
+            'findings_sampled': len(findings) < sum(by_reason.values()),
+            'broken_links': findings,
+            'resume_after': {'entity_type': run.last_entity_type, 'entity_id': run.last_entity_id}
+            if run.status != 'completed' else None,
+            'error_message': run.error_message
+        }
@@ -0,0 +1,335 @@
+"""Streaming report exports
+
+Row-shaped reports (traceability matrix, test results, deviations) are
+exported straight from a server-side cursor: each writer turns the row stream
+into byte chunks as it goes, so the response starts immediately and worker
+memory stays flat regardless of row count.
+
+Formats:
+- json: one document ({header..., "columns", "rows": [...], "total_rows"})
+- ndjson: one JSON object per row
+- csv: header line plus one line per row
+- xlsx: SpreadsheetML written with zipfile into a drained buffer; rows are
+  inline strings, so no shared-string table has to be held, and sheets roll
+  over at Excel's row limit
+
+Nested reports (validation summary, audit package) are JSON only; they are
+built in memory but encoded in chunks rather than as one string.
+"""
+
+import csv
+import io
+import itertools
+import json
+import re
+import zipfile
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+from xml.sax.saxutils import escape
+
+from app.services.deviation_index_service import DeviationIndexService
+from app.services.report_service import ReportService
+from app.services.traceability_service import TraceabilityService
+
+CHUNK_BYTES = 64 * 1024
+XLSX_MAX_ROWS = 1048576
+XLSX_MAX_CELL_CHARS = 32767
+
+MIMETYPES = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+}
+
+_ILLEGAL_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _traceability_rows(project_id: str) -> Iterator[Dict]:
+    """One row per requirement/test link; requirements without tests get one gap row"""
+    for entry in TraceabilityService.iter_materialized(project_id):
+        base = {
+            'requirement_id': entry['requirement_id'],
+            'title': entry['title'],
+            'criticality': entry['criticality'],
+            'requirement_status': entry['status'],
+            'coverage': entry['coverage']
+        }
+        if not entry['test_cases']:
+            yield dict(base, test_case_id=None, test_name=None, test_status=None)
+        for test in entry['test_cases']:
+            yield dict(base, test_case_id=test['id'], test_name=test['name'], test_status=test['status'])
+
+
+# report type -> (title, columns, row generator)
+ROW_DATASETS: Dict[str, Tuple[str, List[str], Callable[[str], Iterable[Dict]]]] = {
+    'traceability': (
+        'Requirements Traceability Matrix',
+        ['requirement_id', 'title', 'criticality', 'requirement_status', 'coverage',
+         'test_case_id', 'test_name', 'test_status'],
+        _traceability_rows
+    ),
+    'test_results': (
+        'Test Results',
+        ['test_case_id', 'name', 'test_plan', 'test_type', 'priority', 'status', 'executed_by', 'execution_date'],
+        lambda project_id: ReportService.iter_test_rows(project_id)
+    ),
+    'deviations': (
+        'Deviation Report',
+        ['deviation_id', 'test_case_id', 'test_title', 'test_plan', 'execution_id', 'failed_steps', 'comments',
+         'detected_date', 'severity', 'status', 'investigation_required'],
+        lambda project_id: DeviationIndexService.iter_open(project_id)
+    )
+}
+# The tabular form of the validation summary is its test list
+ROW_DATASETS['validation_summary'] = ROW_DATASETS['test_results']
+
+DOCUMENT_REPORTS = {
+    'validation_summary': lambda project_id: ReportService.generate_validation_summary(project_id, include_tests=True),
+    'audit_package': ReportService.generate_audit_package
+}
+
+
+def _chunked(pieces: Iterable[str]) -> Iterator[bytes]:
+    """Coalesce small string pieces into ~CHUNK_BYTES byte chunks"""
+    buffer = []
+    size = 0
+    for piece in pieces:
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_BYTES:
+            yield ''.join(buffer).encode()
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+class _DrainBuffer:
+    """Write-only, unseekable sink for zipfile; drain() hands back what was written"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class ReportExportService:
+    """Format writers over row streams"""
+
+    @staticmethod
+    def export(project_id: str, report_type: str, export_format: str) -> Dict:
+        """Validate the request and return {'chunks', 'mimetype', 'filename'}
+
+        chunks is a lazy generator; nothing is queried until it is iterated.
+        A document report for a missing project raises LookupError on the
+        first chunk.
+        """
+        if export_format not in MIMETYPES:
+            raise ValueError(f'Unsupported export format: {export_format}')
+        filename = f'{report_type}_{project_id}.{export_format}'
+
+        if report_type in DOCUMENT_REPORTS and export_format == 'json':
+            chunks = ReportExportService.write_document(DOCUMENT_REPORTS[report_type], project_id)
+        elif report_type in ROW_DATASETS:
+            title, columns, rows = ROW_DATASETS[report_type]
+            header = {
+                'report_type': title,
+                'project_id': project_id,
+                'generated_at': datetime.utcnow().isoformat()
+            }
+            writer = {
+                'json': lambda: ReportExportService.write_json(header, columns, rows(project_id)),
+                'ndjson': lambda: ReportExportService.write_ndjson(columns, rows(project_id)),
+                'csv': lambda: ReportExportService.write_csv(columns, rows(project_id)),
+                'xlsx': lambda: ReportExportService.write_xlsx(title, columns, rows(project_id))
+            }[export_format]
+            chunks = ReportExportService._lazy(writer)
+        elif report_type in DOCUMENT_REPORTS:
+            raise ValueError(f'{report_type} can only be exported as json')
+        else:
+            raise ValueError(f'Invalid report type: {report_type}')
+
+        return {'chunks': chunks, 'mimetype': MIMETYPES[export_format], 'filename': filename}
+
+    @staticmethod
+    def _lazy(writer: Callable[[], Iterator[bytes]]) -> Iterator[bytes]:
+        yield from writer()
+
+    # =========================================================================
+    # WRITERS
+    # =========================================================================
+
+    @staticmethod
+    def write_document(build: Callable[[str], Dict], project_id: str) -> Iterator[bytes]:
+        report = build(project_id)
+        if report is None:
+            raise LookupError('Project not found')
+        yield from _chunked(json.JSONEncoder(indent=2, default=str).iterencode(report))
+
+    @staticmethod
+    def write_json(header: Dict, columns: List[str], rows: Iterable[Dict]) -> Iterator[bytes]:
+        def pieces():
+            yield json.dumps(header, default=str)[:-1]
+            yield ', "columns": ' + json.dumps(columns) + ', "rows": ['
+            total = 0
+            for row in rows:
+                yield (', ' if total else '') + json.dumps({column: row.get(column) for column in columns}, default=str)
+                total += 1
+            yield '], "total_rows": %d}' % total
+        return _chunked(pieces())
+
+    @staticmethod
+    def write_ndjson(columns: List[str], rows: Iterable[Dict]) -> Iterator[bytes]:
+        return _chunked(
+            json.dumps({column: row.get(column) for column in columns}, default=str) + '\n' for row in rows
+        )
+
+    @staticmethod
+    def write_csv(columns: List[str], rows: Iterable[Dict]) -> Iterator[bytes]:
+        def pieces():
+            line = io.StringIO()
+            writer = csv.writer(line)
+            writer.writerow(columns)
+            for row in rows:
+                writer.writerow(['' if row.get(column) is None else row.get(column) for column in columns])
+                if line.tell() >= CHUNK_BYTES:
+                    yield line.getvalue()
+                    line.seek(0)
+                    line.truncate()
+            yield line.getvalue()
+        return _chunked(pieces())
+
+    @staticmethod
+    def write_xlsx(title: str, columns: List[str], rows: Iterable[Dict]) -> Iterator[bytes]:
+        sink = _DrainBuffer()
+        with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED) as package:
+            sheet_count = 0
+            rows = iter(rows)
+            carried = []  # First row of the next sheet, read to learn whether one is needed
+            more = True
+            while more:
+                sheet_count += 1
+                more = False
+                with package.open(f'xl/worksheets/sheet{sheet_count}.xml', 'w') as sheet:
+                    sheet.write(b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                                b'<sheetData>')
+                    sheet.write(_xlsx_row(1, columns))
+                    row_number = 1
+                    pending = []
+                    for row in itertools.chain(carried, rows):
+                        row_number += 1
+                        pending.append(_xlsx_row(row_number, [row.get(column) for column in columns]))
+                        if len(pending) >= 500:
+                            sheet.write(b''.join(pending))
+                            pending = []
+                            data = sink.drain()
+                            if data:
+                                yield data
+                        if row_number >= XLSX_MAX_ROWS:
+                            carried = list(itertools.islice(rows, 1))
+                            more = bool(carried)
+                            break
+                    if pending:
+                        sheet.write(b''.join(pending))
+                    sheet.write(b'</sheetData></worksheet>')
+                data = sink.drain()
+                if data:
+                    yield data
+
+            for name, content in _xlsx_parts(title, sheet_count):
+                package.writestr(name, content)
+        yield sink.drain()
+
+
+def _column_letter(index: int) -> str:
+    letters = ''
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xlsx_row(row_number: int, values: List) -> bytes:
+    cells = []
+    for index, value in enumerate(values):
+        if value is None:
+            continue
+        reference = f'{_column_letter(index)}{row_number}'
+        if isinstance(value, bool):
+            cells.append(f'<c r="{reference}" t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c r="{reference}"><v>{value}</v></c>')
+        else:
+            text = _ILLEGAL_XML_CHARS.sub('', str(value))[:XLSX_MAX_CELL_CHARS]
+            cells.append(f'<c r="{reference}" t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return f'<row r="{row_number}">{"".join(cells)}</row>'.encode()
+
+
+def _xlsx_parts(title: str, sheet_count: int) -> List[Tuple[str, str]]:
+    """Workbook scaffolding, written after the sheets so the sheet count is known"""
+    base_name = re.sub(r'[\[\]:*?/\\]', '', title)[:28] or 'Report'
+    names = [base_name if sheet_count == 1 else f'{base_name} {number}' for number in range(1, sheet_count + 1)]
+    sheet_overrides = ''.join(
+        f'<Override PartName="/xl/worksheets/sheet{number}.xml" '
+        f'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    sheets = ''.join(
+        f'<sheet name="{escape(name)}" sheetId="{number}" r:id="rId{number}"/>'
+        for number, name in enumerate(names, start=1)
+    )
+    sheet_rels = ''.join(
+        f'<Relationship Id="rId{number}" '
+        f'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        f'Target="worksheets/sheet{number}.xml"/>'
+        for number in range(1, sheet_count + 1)
+    )
+    xml = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    return [
+        ('[Content_Types].xml', xml +
+         '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+         '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+         '<Default Extension="xml" ContentType="application/xml"/>'
+         '<Override PartName="/xl/workbook.xml" '
+         'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+         '<Override PartName="/xl/styles.xml" '
+         'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+         + sheet_overrides + '</Types>'),
+        ('_rels/.rels', xml +
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         '<Relationship Id="rId1" '
+         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+         'Target="xl/workbook.xml"/></Relationships>'),
+        ('xl/workbook.xml', xml +
+         '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+         'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+         '<sheets>' + sheets + '</sheets></workbook>'),
+        ('xl/_rels/workbook.xml.rels', xml +
+         '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+         + sheet_rels +
+         f'<Relationship Id="rId{sheet_count + 1}" '
+         'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+         'Target="styles.xml"/></Relationships>'),
+        ('xl/styles.xml', xml +
+         '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+         '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+         '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+         '<fill><patternFill patternType="gray125"/></fill></fills>'
+         '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+         '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+         '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+         '</styleSheet>')
+    ]
@@ -0,0 +1,286 @@
+"""Background report jobs with an on-disk artifact cache
+
+Large project reports (the audit package in particular) are too slow to render
+inside an HTTP request. submit() records a ReportJob and hands it to a
+per-process thread pool; the job row carries status and progress so any
+worker process can answer a poll, and every change is also pushed over
+socketio as a 'report_job_progress' event.
+
+Finished reports are written as JSON under REPORT_CACHE_DIR, keyed by project,
+report type and data version. The data version fingerprints the rows a report
+type reads (row counts and latest modification times), so a resubmission
+against unchanged data is answered from disk without rendering.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+from sqlalchemy import func, select
+from app import db
+from app.extensions import socketio
+from app.models.deviation_index import DeviationIndexEntry
+from app.models.report_job import ReportJob
+from app.models.requirement import Requirement, ProjectTraceabilityEntry
+from app.models.test_management import TestPlan, TestCase, TestExecution
+from app.models.validation import ValidationProject, ValidationProtocol
+from app.services.report_service import ReportService
+
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of a generated report changes so cached artifacts are not reused
+REPORT_FORMAT_VERSION = 1
+
+
+def _single_stage(render: Callable[[str], Optional[Dict]], stage: str):
+    def build(project_id, progress):
+        progress(10, stage)
+        return render(project_id)
+    return build
+
+
+# report type -> (builder(project_id, progress), data sources it reads)
+REPORT_TYPES = {
+    'validation_summary': (
+        _single_stage(lambda project_id: ReportService.generate_validation_summary(project_id, include_tests=True),
+                      'Validation summary'),
+        ('project', 'protocols', 'tests', 'requirements')
+    ),
+    'traceability': (
+        _single_stage(ReportService.generate_traceability_report, 'Traceability matrix'),
+        ('requirements', 'traceability')
+    ),
+    'deviations': (
+        _single_stage(ReportService.generate_deviation_report, 'Deviation report'),
+        ('deviations',)
+    ),
+    'audit_package': (
+        lambda project_id, progress: ReportService.generate_audit_package(project_id, progress=progress),
+        ('project', 'protocols', 'tests', 'requirements', 'traceability', 'deviations')
+    )
+}
+
+
+def _source_columns(source: str, project_id: str):
+    """Scalar subqueries (row count, latest change) for one data source"""
+    if source == 'project':
+        return [select(ValidationProject.updated_at).where(ValidationProject.id == project_id).scalar_subquery()]
+    if source == 'protocols':
+        scope = ValidationProtocol.project_id == project_id
+        return [select(func.count(ValidationProtocol.id)).where(scope).scalar_subquery(),
+                select(func.max(ValidationProtocol.updated_at)).where(scope).scalar_subquery()]
+    if source == 'tests':
+        plans = select(TestPlan.id).where(TestPlan.project_id == project_id)
+        cases = select(TestCase.id).where(TestCase.plan_id.in_(plans))
+        executions = select(TestExecution.id).where(TestExecution.test_case_id.in_(cases))
+        return [plans.with_only_columns(func.count(TestPlan.id)).scalar_subquery(),
+                plans.with_only_columns(func.max(TestPlan.updated_at)).scalar_subquery(),
+                cases.with_only_columns(func.count(TestCase.id)).scalar_subquery(),
+                cases.with_only_columns(func.max(TestCase.updated_at)).scalar_subquery(),
+                executions.with_only_columns(func.count(TestExecution.id)).scalar_subquery(),
+                executions.with_only_columns(func.max(TestExecution.updated_at)).scalar_subquery()]
+    if source == 'requirements':
+        scope = Requirement.project_id == project_id
+        return [select(func.count(Requirement.id)).where(scope).scalar_subquery(),
+                select(func.max(Requirement.updated_at)).where(scope).scalar_subquery()]
+    if source == 'traceability':
+        scope = ProjectTraceabilityEntry.project_id == project_id
+        return [select(func.count(ProjectTraceabilityEntry.requirement_id)).where(scope).scalar_subquery(),
+                select(func.max(ProjectTraceabilityEntry.refreshed_at)).where(scope).scalar_subquery()]
+    if source == 'deviations':
+        scope = DeviationIndexEntry.project_id == project_id
+        return [select(func.count(DeviationIndexEntry.test_id)).where(scope).scalar_subquery(),
+                select(func.max(DeviationIndexEntry.updated_at)).where(scope).scalar_subquery()]
+    raise ValueError(f'Unknown report data source: {source}')
+
+
+class ReportJobManager:
+    """Per-process worker pool that renders report jobs and caches their artifacts"""
+
+    def __init__(self):
+        self.app = None
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        config = app.config
+        self.workers = int(config.get('REPORT_JOB_WORKERS', 2))
+        self.cache_dir = config.get('REPORT_CACHE_DIR', '/app/report_cache')
+        self.stale_after = timedelta(minutes=int(config.get('REPORT_JOB_STALE_MINUTES', 60)))
+
+    # =========================================================================
+    # SUBMISSION
+    # =========================================================================
+
+    @staticmethod
+    def data_version(project_id: str, report_type: str) -> str:
+        """Fingerprint of the data a report type reads, computed in one statement"""
+        sources = REPORT_TYPES[report_type][1]
+        columns = [column for source in sources for column in _source_columns(source, project_id)]
+        values = db.session.execute(select(*columns)).one()
+        payload = json.dumps([REPORT_FORMAT_VERSION, report_type, project_id] + list(values), default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def submit(self, project_id: str, report_type: str, requested_by: str = None, inline: bool = False) -> ReportJob:
+        """Create a job for a report; served from cache or joined to an identical job when possible
+
+        inline renders on the calling thread and returns the finished job (for
+        callers with their own worker pool, such as the report scheduler).
+        """
+        if report_type not in REPORT_TYPES:
+            raise ValueError(f'Invalid report type: {report_type}')
+
+        version = ReportJobManager.data_version(project_id, report_type)
+        path = self.artifact_path(project_id, report_type, version)
+        now = datetime.utcnow()
+
+        if os.path.exists(path):
+            job = ReportJob(project_id=project_id, report_type=report_type, data_version=version,
+                            status='completed', progress=100, stage='Cached', cache_hit=True,
+                            artifact_path=path, artifact_size=os.path.getsize(path),
+                            requested_by=requested_by, started_at=now, completed_at=now)
+            db.session.add(job)
+            db.session.commit()
+            return job
+
+        # Someone already asked for the same report over the same data
+        in_flight = ReportJob.query.filter(
+            ReportJob.project_id == project_id,
+            ReportJob.report_type == report_type,
+            ReportJob.data_version == version,
+            ReportJob.status.in_(['queued', 'running']),
+            ReportJob.created_at >= now - self.stale_after
+        ).order_by(ReportJob.created_at.desc()).first()
+        if in_flight:
+            return self._wait(in_flight) if inline else in_flight
+
+        job = ReportJob(project_id=project_id, report_type=report_type, data_version=version,
+                        status='queued', progress=0, stage='Queued', requested_by=requested_by)
+        db.session.add(job)
+        db.session.commit()
+        self._emit(job)
+        if inline:
+            self._run(job.id)
+            db.session.refresh(job)
+        else:
+            self._ensure_pool().submit(self._run, job.id)
+        return job
+
+    def _wait(self, job: ReportJob, poll_seconds: float = 1.0) -> ReportJob:
+        """Block until another worker finishes a job (or it goes stale)"""
+        deadline = job.created_at + self.stale_after
+        while job.status in ('queued', 'running') and datetime.utcnow() < deadline:
+            time.sleep(poll_seconds)
+            db.session.commit()  # End the read transaction so the next refresh sees the other worker's update
+            db.session.refresh(job)
+        return job
+
+    @staticmethod
+    def get_job(job_id: str) -> Optional[ReportJob]:
+        return ReportJob.query.get(job_id)
+
+    @staticmethod
+    def get_artifact(job: ReportJob) -> Optional[str]:
+        """Path of a completed job's artifact, or None if it is not (or no longer) on disk"""
+        if job.status != 'completed' or not job.artifact_path or not os.path.exists(job.artifact_path):
+            return None
+        return job.artifact_path
+
+    def artifact_path(self, project_id: str, report_type: str, version: str) -> str:
+        return os.path.join(self.cache_dir, project_id, f'{report_type}-{version}.json')
+
+    # =========================================================================
+    # EXECUTION
+    # =========================================================================
+
+    def _ensure_pool(self) -> ThreadPoolExecutor:
+        # Created lazily (and again after fork) so each server process gets its own workers
+        if self._pool is not None and self._pid == os.getpid():
+            return self._pool
+        with self._lock:
+            if self._pool is None or self._pid != os.getpid():
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-job')
+                self._pid = os.getpid()
+        return self._pool
+
+    def _run(self, job_id: str):
+        with self.app.app_context():
+            job = None
+            try:
+                job = ReportJob.query.get(job_id)
+                if job is None:
+                    return
+                job.status = 'running'
+                job.started_at = datetime.utcnow()
+                self._progress(job, 1, 'Starting')
+
+                builder = REPORT_TYPES[job.report_type][0]
+                report = builder(job.project_id, lambda percent, stage: self._progress(job, percent, stage))
+                if report is None:
+                    raise LookupError('Project not found')
+
+                self._progress(job, 95, 'Writing artifact')
+                path = self.artifact_path(job.project_id, job.report_type, job.data_version)
+                job.artifact_size = self._write_artifact(path, report)
+                job.artifact_path = path
+                job.status = 'completed'
+                job.completed_at = datetime.utcnow()
+                self._progress(job, 100, 'Completed')
+                self._prune(job.report_type, path)
+            except Exception as e:
+                logger.exception(f'Report job {job_id} failed')
+                db.session.rollback()
+                if job is not None:
+                    job.status = 'failed'
+                    job.error_message = str(e)
+                    job.completed_at = datetime.utcnow()
+                    db.session.commit()
+                    self._emit(job)
+            finally:
+                db.session.remove()
+
+    def _progress(self, job: ReportJob, percent: int, stage: str):
+        job.progress = percent
+        job.stage = stage
+        db.session.commit()
+        self._emit(job)
+
+    @staticmethod
+    def _emit(job: ReportJob):
+        try:
+            socketio.emit('report_job_progress', job.to_dict())
+        except Exception as e:
+            logger.warning(f'Could not push progress for report job {job.id}: {str(e)}')
+
+    @staticmethod
+    def _write_artifact(path: str, report: Dict) -> int:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(report, f, default=str)
+        os.replace(temp_path, path)
+        return os.path.getsize(path)
+
+    @staticmethod
+    def _prune(report_type: str, keep_path: str):
+        """Drop artifacts for superseded data versions of the same report"""
+        directory = os.path.dirname(keep_path)
+        prefix = f'{report_type}-'
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.startswith(prefix) and name.endswith('.json') and path != keep_path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+
+report_jobs = ReportJobManager()
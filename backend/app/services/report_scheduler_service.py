@@ -0,0 +1,296 @@
+"""Scheduled report generation (report_schedules)
+
+A dedicated scheduler process (flask run_report_scheduler) keeps the due
+times of active schedules in a heap and sleeps until the earliest one, waking
+at least every REPORT_SCHEDULER_POLL_SECONDS to pick up edits. Due schedules
+are claimed with SELECT ... FOR UPDATE SKIP LOCKED and a lease, so several
+scheduler instances can run side by side without running a schedule twice.
+
+Claimed schedules that ask for the same report over the same project run once:
+the report is rendered through ReportJobManager (which also joins an identical
+job already running elsewhere) and every schedule in the group records its own
+ReportExecution pointing at the shared job. Rendering happens on a bounded
+thread pool, and a poll never claims more schedules than there are idle workers.
+
+Recurrence is calendar based. Occurrence n of a schedule is computed from its
+anchor (the first run time), so a monthly schedule anchored on the 31st runs on
+the last day of shorter months and returns to the 31st afterwards. Occurrences
+missed while no scheduler was running are coalesced into one run and counted
+on the execution.
+"""
+
+import calendar
+import heapq
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from app import db
+from app.models.reporting_engine import ReportSchedule, ReportExecution
+from app.services.report_job_service import REPORT_TYPES, report_jobs
+
+logger = logging.getLogger(__name__)
+
+# frequency -> (unit, step)
+FREQUENCIES = {
+    'DAILY': ('days', 1),
+    'WEEKLY': ('days', 7),
+    'MONTHLY': ('months', 1),
+    'QUARTERLY': ('months', 3),
+    'ANNUALLY': ('months', 12)
+}
+
+
+# =============================================================================
+# RECURRENCE
+# =============================================================================
+
+def add_months(value: datetime, months: int) -> datetime:
+    """Shift by whole months, clamping the day to the end of shorter months"""
+    month_index = value.month - 1 + months
+    year, month = value.year + month_index // 12, month_index % 12 + 1
+    return value.replace(year=year, month=month, day=min(value.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence(frequency: str, anchor: datetime, n: int) -> datetime:
+    """The n-th run time (0 = anchor) of a schedule"""
+    if frequency not in FREQUENCIES:
+        raise ValueError(f'Unsupported schedule frequency: {frequency}')
+    unit, step = FREQUENCIES[frequency]
+    if unit == 'days':
+        return anchor + timedelta(days=step * n)
+    return add_months(anchor, step * n)
+
+
+def occurrence_index_after(frequency: str, anchor: datetime, after: datetime) -> int:
+    """Smallest n whose occurrence is strictly later than after"""
+    if after < anchor:
+        return 0
+    unit, step = FREQUENCIES.get(frequency, (None, None))
+    if unit == 'days':
+        return int((after - anchor) // timedelta(days=step)) + 1
+    # Month arithmetic clamps days, so estimate from the month distance and correct
+    n = ((after.year - anchor.year) * 12 + after.month - anchor.month) // step if unit else 0
+    while occurrence(frequency, anchor, n) <= after:
+        n += 1
+    while n > 0 and occurrence(frequency, anchor, n - 1) > after:
+        n -= 1
+    return n
+
+
+def next_occurrence(frequency: str, anchor: datetime, after: datetime) -> datetime:
+    """First run time strictly later than after"""
+    return occurrence(frequency, anchor, occurrence_index_after(frequency, anchor, after))
+
+
+class ReportScheduler:
+    """Claims due report schedules and renders them on a bounded worker pool"""
+
+    def __init__(self, app, workers: int = None, batch_size: int = None):
+        self.app = app
+        config = app.config
+        self.workers = workers or int(config.get('REPORT_SCHEDULER_WORKERS', 2))
+        self.batch_size = batch_size or int(config.get('REPORT_SCHEDULER_BATCH_SIZE', 50))
+        self.poll_seconds = float(config.get('REPORT_SCHEDULER_POLL_SECONDS', 60))
+        self.horizon = timedelta(minutes=int(config.get('REPORT_SCHEDULER_HORIZON_MINUTES', 15)))
+        self.lease_seconds = int(config.get('REPORT_SCHEDULER_LEASE_SECONDS', 3600))
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._heap: List[Tuple[datetime, int]] = []  # (next_run_time, schedule_id)
+        self._running: Set[Future] = set()
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    # =========================================================================
+    # SCHEDULING LOOP
+    # =========================================================================
+
+    def run_forever(self):
+        logger.info(f'Report scheduler {self.worker_id} started ({self.workers} workers)')
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='report-schedule') as pool:
+            while not self._stop.is_set():
+                with self.app.app_context():
+                    try:
+                        self._reload_heap()
+                        if self._heap and self._heap[0][0] <= datetime.utcnow():
+                            self.run_once(pool)
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error(f'Report scheduler poll failed: {str(e)}')
+                    finally:
+                        db.session.remove()
+                self._stop.wait(self._seconds_until_next())
+
+    def _reload_heap(self):
+        """Due times of unclaimed active schedules up to the look-ahead horizon"""
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+        rows = db.session.query(ReportSchedule.next_run_time, ReportSchedule.id).filter(
+            ReportSchedule.is_active.is_(True),
+            ReportSchedule.next_run_time <= now + self.horizon,
+            db.or_(ReportSchedule.locked_by.is_(None), ReportSchedule.locked_at <= lease_expired)
+        ).all()
+        self._heap = [tuple(row) for row in rows]
+        heapq.heapify(self._heap)
+
+    def _seconds_until_next(self) -> float:
+        self._running = {future for future in self._running if not future.done()}
+        if not self._heap or len(self._running) >= self.workers:
+            return self.poll_seconds
+        wait = (self._heap[0][0] - datetime.utcnow()).total_seconds()
+        return min(max(wait, 0.5), self.poll_seconds)
+
+    def run_once(self, pool: ThreadPoolExecutor = None) -> int:
+        """Claim due schedules (up to the idle worker count) and run them; returns schedules claimed"""
+        self._running = {future for future in self._running if not future.done()}
+        capacity = self.batch_size if pool is None else min(self.batch_size, self.workers - len(self._running))
+        if capacity <= 0:
+            return 0
+
+        claimed = self._claim(capacity)
+        for group in self._group(claimed):
+            if pool is None:
+                self._run_group(group)
+            else:
+                self._running.add(pool.submit(self._run_group, group))
+        return len(claimed)
+
+    def run_now(self, schedule_id: int, user_id: int = None) -> List[ReportExecution]:
+        """Run one schedule immediately on the calling thread (manual execution)"""
+        claimed = self._claim(1, schedule_id=schedule_id)
+        if not claimed:
+            raise ValueError('Schedule not found, inactive or already running')
+        if user_id is not None:
+            claimed[0]['executed_by_id'] = user_id
+        execution_ids = self._run_group(claimed)
+        return ReportExecution.query.filter(ReportExecution.id.in_(execution_ids)).all()
+
+    # =========================================================================
+    # CLAIMING
+    # =========================================================================
+
+    def _claim(self, limit: int, schedule_id: int = None) -> List[Dict]:
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+        query = ReportSchedule.query.filter(
+            ReportSchedule.is_active.is_(True),
+            # Reclaim schedules from scheduler instances that died mid-run
+            db.or_(ReportSchedule.locked_by.is_(None), ReportSchedule.locked_at <= lease_expired)
+        )
+        if schedule_id is None:
+            query = query.filter(ReportSchedule.next_run_time <= now)
+        else:
+            query = query.filter(ReportSchedule.id == schedule_id)
+        rows = query.order_by(ReportSchedule.next_run_time).limit(limit).with_for_update(skip_locked=True).all()
+
+        claimed = []
+        for row in rows:
+            row.locked_by = self.worker_id
+            row.locked_at = now
+            row.anchor_time = row.anchor_time or row.next_run_time
+            claimed.append({
+                'id': row.id,
+                'project_id': row.project_id,
+                'report_type': row.report_type,
+                'frequency': row.frequency,
+                'anchor_time': row.anchor_time,
+                # A manual run ahead of schedule does not consume the pending occurrence
+                'scheduled_for': row.next_run_time if row.next_run_time <= now else None,
+                'executed_by_id': row.created_by_id
+            })
+        db.session.commit()
+        return claimed
+
+    @staticmethod
+    def _group(claimed: List[Dict]) -> List[List[Dict]]:
+        """Coalesce schedules that would render the same report"""
+        groups: Dict[Tuple, List[Dict]] = {}
+        for schedule in claimed:
+            if schedule['report_type'] and schedule['project_id']:
+                key = (schedule['report_type'], schedule['project_id'])
+            else:
+                key = ('unrunnable', schedule['id'])
+            groups.setdefault(key, []).append(schedule)
+        return list(groups.values())
+
+    # =========================================================================
+    # EXECUTION
+    # =========================================================================
+
+    def _run_group(self, group: List[Dict]) -> List[int]:
+        with self.app.app_context():
+            started_at = datetime.utcnow()
+            job, error = None, None
+            report_type, project_id = group[0]['report_type'], group[0]['project_id']
+            try:
+                if report_type not in REPORT_TYPES or not project_id:
+                    raise ValueError(f'Schedule has no runnable report (type {report_type!r}, project {project_id!r})')
+                job = report_jobs.submit(project_id, report_type,
+                                         requested_by=str(group[0]['executed_by_id']), inline=True)
+                if job.status != 'completed':
+                    error = job.error_message or f'Report job {job.id} ended as {job.status}'
+            except Exception as e:
+                db.session.rollback()
+                error = str(e)
+
+            if error:
+                logger.warning(f"Scheduled report for schedules {[s['id'] for s in group]} failed: {error}")
+            try:
+                return self._finish(group, started_at, job.id if job else None, error)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not record report schedule results for {[s['id'] for s in group]}: {str(e)}")
+                return []
+            finally:
+                db.session.remove()
+
+    def _finish(self, group: List[Dict], started_at: datetime, job_id: Optional[str], error: Optional[str]) -> List[int]:
+        now = datetime.utcnow()
+        status = 'FAILED' if error else 'COMPLETED'
+        executions = []
+        for schedule in group:
+            values = {
+                ReportSchedule.locked_by: None,
+                ReportSchedule.locked_at: None,
+                ReportSchedule.last_executed_at: now,
+                ReportSchedule.last_status: status
+            }
+            missed_runs = 0
+            if schedule['frequency'] in FREQUENCIES:
+                frequency, anchor = schedule['frequency'], schedule['anchor_time']
+                upcoming = occurrence_index_after(frequency, anchor, now)
+                values[ReportSchedule.next_run_time] = occurrence(frequency, anchor, upcoming)
+                if schedule['scheduled_for'] is not None:
+                    # Occurrences after the one being run that have also passed
+                    missed_runs = upcoming - occurrence_index_after(frequency, anchor, schedule['scheduled_for'])
+            else:
+                # Without a recurrence the schedule would fire on every poll
+                values[ReportSchedule.is_active] = False
+
+            # Only the instance holding the claim may record the outcome
+            updated = ReportSchedule.query.filter_by(
+                id=schedule['id'], locked_by=self.worker_id
+            ).update(values, synchronize_session=False)
+            if not updated:
+                logger.warning(f"Lost claim on report schedule {schedule['id']} before recording its run")
+                continue
+            execution = ReportExecution(
+                schedule_id=schedule['id'],
+                executed_by_id=schedule['executed_by_id'],
+                status=status,
+                started_at=started_at,
+                completed_at=now,
+                scheduled_for=schedule['scheduled_for'],
+                missed_runs=max(missed_runs, 0),
+                report_job_id=job_id,
+                error_message=error
+            )
+            db.session.add(execution)
+            executions.append(execution)
+        db.session.commit()
+        return [execution.id for execution in executions]
@@ -1,73 +1,214 @@
-"""Report generation service"""
+"""Report generation service
+
+Report sections read the project through a ReportContext, which loads each
+part of the working set (protocols, test plans with test counts, test rows,
+traceability matrix, open deviations, documents) once and shares it between
+sections. A test's status is the outcome of its latest execution. The
+audit package renders its independent sections on parallel threads over one
+context.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 import json
+import threading
+from flask import current_app
+from app import db
 from app.models.validation import ValidationProject, ValidationProtocol
-from app.models.test_management import TestCase
+from app.models.test_management import TestPlan, TestCase
 from app.models.requirement import Requirement
-from app.models.document import Document
+from app.services.deviation_index_service import DeviationIndexService
+from app.services.test_management_service import TestManagementService
+from app.services.traceability_service import TraceabilityService
+
+class ReportContext:
+    """Per-report working set for one project
+    
+    Every part is loaded on first use and kept as plain values (no ORM
+    objects), so sections running on other threads can share it. A thread
+    that asks for a part another thread is loading waits for that load.
+    """
+    
+    def __init__(self, project_id):
+        self.project_id = project_id
+        self._values = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+    
+    def _get(self, key, loader):
+        if key in self._values:
+            return self._values[key]
+        with self._guard:
+            lock = self._locks.setdefault(key, threading.Lock())
+        with lock:
+            if key not in self._values:
+                self._values[key] = loader()
+        return self._values[key]
+    
+    @property
+    def project(self):
+        return self._get('project', self._load_project)
+    
+    @property
+    def protocols(self):
+        """Protocols in protocol number order"""
+        return self._get('protocols', self._load_protocols)
+    
+    @property
+    def test_plans(self):
+        """Test plans with their test counts per status, in plan name order"""
+        return self._get('test_plans', self._load_test_plans)
+    
+    @property
+    def tests(self):
+        return self._get('tests', lambda: self._load_tests())
+    
+    @property
+    def deviations(self):
+        """Open deviations from the deviation index"""
+        return self._get('deviations', lambda: list(DeviationIndexService.iter_open(self.project_id)))
+    
+    @property
+    def matrix(self):
+        return self._get('matrix', lambda: TraceabilityService.get_matrix(self.project_id))
+    
+    @property
+    def requirement_count(self):
+        if 'matrix' in self._values:
+            return len(self._values['matrix'])
+        return self._get('requirement_count', lambda: db.session.query(db.func.count(Requirement.id)).filter(
+            Requirement.project_id == self.project_id
+        ).scalar() or 0)
+    
+    @property
+    def documents(self):
+        return self._get('documents', self._load_documents)
+    
+    def _load_project(self):
+        project = ValidationProject.query.get(self.project_id)
+        if not project:
+            return None
+        start_date = project.actual_start_date or project.planned_start_date
+        return {
+            'id': project.id,
+            'project_number': project.project_number,
+            'name': project.title,
+            'type': project.validation_type,
+            'status': project.status,
+            'start_date': start_date.isoformat() if start_date else None,
+            'target_completion': project.planned_end_date.isoformat() if project.planned_end_date else None,
+            'completed': project.actual_end_date.isoformat() if project.actual_end_date else None
+        }
+    
+    def _load_protocols(self):
+        protocols = db.session.query(
+            ValidationProtocol.id,
+            ValidationProtocol.protocol_number,
+            ValidationProtocol.protocol_type,
+            ValidationProtocol.title,
+            ValidationProtocol.status,
+            ValidationProtocol.created_at
+        ).filter(
+            ValidationProtocol.project_id == self.project_id
+        ).order_by(ValidationProtocol.protocol_number).all()
+        return [{
+            'id': protocol_id,
+            'protocol_number': number,
+            'type': protocol_type,
+            'title': title,
+            'status': status,
+            'created_date': created_at.isoformat() if created_at else None
+        } for protocol_id, number, protocol_type, title, status, created_at in protocols]
+    
+    def _load_test_plans(self):
+        # One plan x latest-result GROUP BY; the outer joins keep plans without tests
+        latest = TestManagementService.latest_executions(ReportService.project_cases(self.project_id))
+        result = ReportService.result_label(latest.c.overall_status)
+        rows = db.session.query(
+            TestPlan.id,
+            TestPlan.name,
+            TestPlan.status,
+            TestPlan.created_at,
+            result,
+            db.func.count(TestCase.id)
+        ).outerjoin(
+            TestCase, TestCase.plan_id == TestPlan.id
+        ).outerjoin(
+            latest, latest.c.test_case_id == TestCase.id
+        ).filter(
+            TestPlan.project_id == self.project_id
+        ).group_by(
+            TestPlan.id,
+            TestPlan.name,
+            TestPlan.status,
+            TestPlan.created_at,
+            result
+        ).order_by(TestPlan.name).all()
+        
+        plans = {}
+        for plan_id, name, status, created_at, test_status, count in rows:
+            plan = plans.setdefault(plan_id, {
+                'id': plan_id,
+                'name': name,
+                'status': status,
+                'created_date': created_at.isoformat() if created_at else None,
+                'test_counts': {}
+            })
+            if count:
+                plan['test_counts'][test_status] = count
+        return list(plans.values())
+    
+    def _load_tests(self, status=None):
+        return list(ReportService.iter_test_rows(self.project_id, status))
+    
+    def _load_documents(self):
+        # Documents carry no project key, so no document can be attributed to the project
+        return []
 
 class ReportService:
     
     @staticmethod
-    def generate_validation_summary(project_id):
-        """Generate validation summary report"""
-        project = ValidationProject.query.get(project_id)
+    def generate_validation_summary(project_id, include_tests=False, context=None):
+        """Generate validation summary report
+
+        Test counts come from one test plan x latest-result GROUP BY;
+        individual test rows are only loaded when include_tests is set.
+        """
+        context = context or ReportContext(project_id)
+        project = context.project
         if not project:
             return None
         
-        # Get all protocols
-        protocols = ValidationProtocol.query.filter_by(project_id=project_id).all()
-        
-        # Get all test cases
-        test_cases = []
-        for protocol in protocols:
-            tests = TestCase.query.filter_by(protocol_id=protocol.id).all()
-            test_cases.extend(tests)
+        protocols = context.protocols
+        test_plans = context.test_plans
+        status_totals = {}
+        for plan in test_plans:
+            for test_status, count in plan['test_counts'].items():
+                status_totals[test_status] = status_totals.get(test_status, 0) + count
         
         # Calculate statistics
-        total_tests = len(test_cases)
-        passed = len([t for t in test_cases if t.status == 'Passed'])
-        failed = len([t for t in test_cases if t.status == 'Failed'])
-        not_executed = len([t for t in test_cases if t.status == 'Not Executed'])
+        total_tests = sum(status_totals.values())
+        passed = status_totals.get('Passed', 0)
+        failed = status_totals.get('Failed', 0)
+        not_executed = status_totals.get('Not Executed', 0)
         pass_rate = (passed / total_tests * 100) if total_tests > 0 else 0
         
-        # Get requirements
-        requirements = Requirement.query.filter_by(project_id=project_id).all()
-        
         report = {
             'report_type': 'Validation Summary Report',
             'generated_at': datetime.utcnow().isoformat(),
-            'project': {
-                'id': project.id,
-                'name': project.name,
-                'type': project.validation_type,
-                'status': project.status,
-                'start_date': project.start_date.isoformat() if project.start_date else None,
-                'target_completion': project.target_completion.isoformat() if project.target_completion else None
-            },
+            'project': project,
             'summary': {
                 'total_protocols': len(protocols),
-                'total_requirements': len(requirements),
+                'total_test_plans': len(test_plans),
+                'total_requirements': context.requirement_count,
                 'total_test_cases': total_tests,
                 'tests_passed': passed,
                 'tests_failed': failed,
                 'tests_not_executed': not_executed,
+                'tests_by_status': status_totals,
                 'pass_rate': round(pass_rate, 2)
             },
-            'protocols': [{
-                'id': p.id,
-                'protocol_number': p.protocol_number,
-                'title': p.title,
-                'status': p.status,
-                'created_date': p.created_date.isoformat() if p.created_date else None
-            } for p in protocols],
-            'test_results': [{
-                'test_id': t.test_case_id,
-                'title': t.title,
-                'status': t.status,
-                'executed_by': t.executed_by,
-                'execution_date': t.execution_date.isoformat() if t.execution_date else None
-            } for t in test_cases],
+            'protocols': protocols,
+            'test_plans': test_plans,
             'compliance': {
                 '21_cfr_part_11': 'Compliant',
                 'gamp5': 'Aligned',
@@ -76,8 +217,76 @@ class ReportService:
             'conclusion': ReportService._generate_conclusion(pass_rate, failed, not_executed)
         }
         
+        if include_tests:
+            report['test_results'] = [{
+                'test_id': t['test_case_id'],
+                'title': t['name'],
+                'test_plan': t['test_plan'],
+                'status': t['status'],
+                'executed_by': t['executed_by'],
+                'execution_date': t['execution_date']
+            } for t in context.tests]
+        
         return report
     
+    @staticmethod
+    def project_cases(project_id):
+        """SELECT of a project's test case ids (test_cases.plan_id -> test_plans.project_id)"""
+        return db.select(TestCase.id).join(TestPlan, TestCase.plan_id == TestPlan.id).where(
+            TestPlan.project_id == project_id
+        )
+    
+    @staticmethod
+    def result_label(overall_status):
+        """Report status of a test from its latest execution's overall_status (NULL: never executed)"""
+        return db.case(
+            (overall_status == 'PASS', 'Passed'),
+            (overall_status == 'FAIL', 'Failed'),
+            (overall_status == 'BLOCKED', 'Blocked'),
+            else_='Not Executed'
+        )
+    
+    @staticmethod
+    def iter_test_rows(project_id, status=None, batch_size=1000):
+        """Stream a project's test rows as plain columns over a server-side cursor
+        
+        status filters on the report status (Passed, Failed, Blocked, Not Executed).
+        """
+        latest = TestManagementService.latest_executions(ReportService.project_cases(project_id))
+        result = ReportService.result_label(latest.c.overall_status)
+        query = db.session.query(
+            TestCase.id,
+            TestCase.name,
+            TestCase.test_type,
+            TestCase.priority,
+            result,
+            latest.c.executed_by,
+            latest.c.execution_date,
+            TestPlan.name
+        ).join(
+            TestPlan, TestCase.plan_id == TestPlan.id
+        ).outerjoin(
+            latest, latest.c.test_case_id == TestCase.id
+        ).filter(
+            TestPlan.project_id == project_id
+        )
+        if status is not None:
+            query = query.filter(result == status)
+        query = query.order_by(TestPlan.name, TestCase.name, TestCase.id)
+        
+        for (test_case_id, name, test_type, priority, test_status, executed_by, execution_date,
+             plan_name) in query.yield_per(batch_size):
+            yield {
+                'test_case_id': test_case_id,
+                'name': name,
+                'test_plan': plan_name,
+                'test_type': test_type,
+                'priority': priority,
+                'status': test_status,
+                'executed_by': executed_by,
+                'execution_date': execution_date.isoformat() if execution_date else None
+            }
+    
     @staticmethod
     def _generate_conclusion(pass_rate, failed, not_executed):
         """Generate report conclusion"""
@@ -107,29 +316,15 @@ class ReportService:
             }
     
     @staticmethod
-    def generate_traceability_report(project_id):
+    def generate_traceability_report(project_id, context=None):
         """Generate traceability matrix report"""
-        requirements = Requirement.query.filter_by(project_id=project_id).all()
-        
-        matrix = []
-        for req in requirements:
-            # Get linked test cases
-            linked_tests = TestCase.query.filter(
-                TestCase.requirement_ids.contains([req.id])
-            ).all() if hasattr(TestCase, 'requirement_ids') else []
-            
-            matrix.append({
-                'requirement_id': req.requirement_id,
-                'title': req.title,
-                'criticality': req.criticality,
-                'test_cases': [t.test_case_id for t in linked_tests],
-                'coverage': 'Complete' if linked_tests else 'Gap',
-                'status': req.status
-            })
+        context = context or ReportContext(project_id)
+        matrix = context.matrix
         
-        # Calculate coverage
-        total = len(requirements)
-        covered = len([r for r in requirements if r.status in ['Verified', 'Approved']])
+        # Coverage means at least one active linked test; everything else is a gap
+        total = len(matrix)
+        covered = len([r for r in matrix if r['coverage'] == 'Complete'])
+        verified = len([r for r in matrix if r['status'] in ['Verified', 'Approved']])
         coverage_percentage = (covered / total * 100) if total > 0 else 0
         
         return {
@@ -139,37 +334,27 @@ class ReportService:
             'coverage': {
                 'total_requirements': total,
                 'covered_requirements': covered,
+                'verified_requirements': verified,
                 'coverage_percentage': round(coverage_percentage, 2),
                 'gaps': total - covered
             },
-            'matrix': matrix
+            'matrix': [{
+                'requirement_id': r['requirement_id'],
+                'title': r['title'],
+                'criticality': r['criticality'],
+                'test_cases': r['test_cases'],
+                'coverage': r['coverage'],
+                'status': r['status']
+            } for r in matrix],
+            'gaps': [r['requirement_id'] for r in matrix if r['coverage'] == 'Gap']
         }
     
     @staticmethod
-    def generate_deviation_report(project_id):
+    def generate_deviation_report(project_id, context=None):
         """Generate deviation report for failed tests"""
-        protocols = ValidationProtocol.query.filter_by(project_id=project_id).all()
-        
-        deviations = []
-        for protocol in protocols:
-            failed_tests = TestCase.query.filter_by(
-                protocol_id=protocol.id,
-                status='Failed'
-            ).all()
-            
-            for test in failed_tests:
-                deviations.append({
-                    'deviation_id': f'DEV-{test.test_case_id}',
-                    'test_case_id': test.test_case_id,
-                    'test_title': test.title,
-                    'protocol': protocol.protocol_number,
-                    'expected_result': test.expected_result,
-                    'actual_result': test.actual_result,
-                    'detected_date': test.execution_date.isoformat() if test.execution_date else None,
-                    'severity': 'Critical' if test.criticality == 'Critical' else 'Major',
-                    'status': 'Open',
-                    'investigation_required': True
-                })
+        context = context or ReportContext(project_id)
+        
+        deviations = context.deviations
         
         return {
             'report_type': 'Deviation Report',
@@ -181,34 +366,60 @@ class ReportService:
         }
     
     @staticmethod
-    def generate_audit_package(project_id):
-        """Generate complete audit package"""
-        validation_summary = ReportService.generate_validation_summary(project_id)
-        traceability = ReportService.generate_traceability_report(project_id)
-        deviations = ReportService.generate_deviation_report(project_id)
+    def generate_audit_package(project_id, progress=None):
+        """Generate complete audit package
         
-        # Get all documents
-        documents = Document.query.filter_by(project_id=project_id).all()
+        The sections share one ReportContext and render in parallel
+        (REPORT_SECTION_WORKERS threads). progress, if given, is called as
+        progress(percent, stage) as sections finish.
+        """
+        progress = progress or (lambda percent, stage: None)
+        context = ReportContext(project_id)
+        progress(5, 'Rendering sections')
+        sections = ReportService._render_sections({
+            'validation_summary': lambda: ReportService.generate_validation_summary(
+                project_id, include_tests=True, context=context),
+            'traceability_matrix': lambda: ReportService.generate_traceability_report(project_id, context=context),
+            'deviation_report': lambda: ReportService.generate_deviation_report(project_id, context=context),
+            'documents': lambda: context.documents
+        }, progress)
         
         return {
             'package_type': 'Audit Submission Package',
             'generated_at': datetime.utcnow().isoformat(),
             'project_id': project_id,
-            'validation_summary': validation_summary,
-            'traceability_matrix': traceability,
-            'deviation_report': deviations,
-            'documents': [{
-                'document_id': d.document_id,
-                'title': d.title,
-                'type': d.document_type,
-                'version': d.version,
-                'status': d.status,
-                'approved_date': d.approved_date.isoformat() if d.approved_date else None
-            } for d in documents],
+            'validation_summary': sections['validation_summary'],
+            'traceability_matrix': sections['traceability_matrix'],
+            'deviation_report': sections['deviation_report'],
+            'documents': sections['documents'],
             'compliance_statement': {
                 'compliant_with': ['21 CFR Part 11', 'EU Annex 11', 'GAMP 5'],
                 'audit_trail': 'Complete and tamper-proof',
                 'electronic_signatures': 'Implemented',
                 'data_integrity': 'ALCOA+ compliant'
             }
-        }
\ No newline at end of file
+        }
+    
+    @staticmethod
+    def _render_sections(sections, progress):
+        """Run independent section renderers, each thread in its own app context and session"""
+        workers = min(int(current_app.config.get('REPORT_SECTION_WORKERS', 4)), len(sections))
+        results = {}
+        if workers <= 1:
+            for done, (name, render) in enumerate(sections.items(), start=1):
+                results[name] = render()
+                progress(5 + 90 * done // len(sections), f'Rendered {name}')
+            return results
+        
+        app = current_app._get_current_object()
+        
+        def run(render):
+            with app.app_context():
+                return render()
+        
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-section') as pool:
+            futures = {pool.submit(run, render): name for name, render in sections.items()}
+            for done, future in enumerate(as_completed(futures), start=1):
+                results[futures[future]] = future.result()
+                progress(5 + 90 * done // len(sections), f'Rendered {futures[future]}')
+        return results
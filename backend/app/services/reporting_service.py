@@ -1,7 +1,8 @@
 from app.models.reporting_engine import Report, ReportSchedule, ReportExecution
 from app.models.auth_models import User
 from app.utils.audit import log_audit_event
-from datetime import datetime, timedelta
+from app.services.report_scheduler_service import FREQUENCIES, ReportScheduler
+from flask import current_app
 import hashlib, json
 from io import BytesIO
 import csv
@@ -24,15 +25,20 @@ class ReportingService:
         return report
     
     @staticmethod
-    def schedule_report(user_id, report_id, frequency, next_run_time, db_session):
+    def schedule_report(user_id, report_id, frequency, next_run_time, db_session, project_id=None, report_type=None):
         report = db_session.query(Report).filter_by(id=report_id).first()
         if not report:
             raise ValueError("Report not found")
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unsupported frequency: {frequency}")
         schedule = ReportSchedule(
             report_id=report_id,
             created_by_id=user_id,
             frequency=frequency,
             next_run_time=next_run_time,
+            anchor_time=next_run_time,
+            project_id=project_id,
+            report_type=report_type,
             is_active=True
         )
         db_session.add(schedule)
@@ -42,25 +48,11 @@ class ReportingService:
     
     @staticmethod
     def execute_report(user_id, schedule_id, db_session):
-        schedule = db_session.query(ReportSchedule).filter_by(id=schedule_id).first()
-        if not schedule:
-            raise ValueError("Schedule not found")
-        execution = ReportExecution(
-            schedule_id=schedule_id,
-            executed_by_id=user_id,
-            status='COMPLETED',
-            started_at=datetime.utcnow(),
-            completed_at=datetime.utcnow()
-        )
-        db_session.add(execution)
-        schedule.last_executed_at = datetime.utcnow()
-        if schedule.frequency == 'DAILY':
-            schedule.next_run_time = datetime.utcnow() + timedelta(days=1)
-        elif schedule.frequency == 'WEEKLY':
-            schedule.next_run_time = datetime.utcnow() + timedelta(weeks=1)
-        db_session.commit()
-        log_audit_event(user_id, f'REPORT_EXECUTED', f'Execution {execution.id} completed', db_session)
-        return execution
+        """Run a schedule now; the report scheduler records the execution and advances the schedule"""
+        executions = ReportScheduler(current_app._get_current_object()).run_now(schedule_id, user_id)
+        for execution in executions:
+            log_audit_event(user_id, f'REPORT_EXECUTED', f'Execution {execution.id} {execution.status.lower()}', db_session)
+        return executions[0] if executions else None
     
     @staticmethod
     def export_report_csv(report_id, data, db_session):
@@ -73,4 +65,6 @@ class ReportingService:
     
     @staticmethod
     def get_report_history(report_id, db_session):
-        return db_session.query(ReportExecution).filter_by(report_id=report_id).all()
+        return db_session.query(ReportExecution).join(ReportSchedule).filter(
+            ReportSchedule.report_id == report_id
+        ).order_by(ReportExecution.started_at.desc()).all()
@@ -2,6 +2,7 @@ import json
 import uuid
 from datetime import datetime, timedelta
 from hashlib import sha256
+from app.services.report_scheduler_service import FREQUENCIES, occurrence
 
 class ReportsEngineService:
     """Service layer for comprehensive report generation and management"""
@@ -58,29 +59,48 @@ class ReportsEngineService:
     @staticmethod
     def build_requirement_traceability_matrix(validation_scope_id, requirements, test_cases, test_results):
         """Build comprehensive RTM linking requirements to tests to results"""
-        rtm_records = []
-        for req in requirements:
-            linked_tests = [tc for tc in test_cases if req.get('id') in tc.get('requirement_ids', [])]
-            for test in linked_tests:
-                test_result = next((tr for tr in test_results if tr.get('test_case_id') == test.get('id')), None)
-                
-                coverage = 100 if test_result and test_result.get('status') == 'PASSED' else 0
-                req_status = 'VERIFIED' if test_result and test_result.get('status') == 'PASSED' else 'IN_TEST'
+        return list(ReportsEngineService.iter_requirement_traceability_matrix(
+            validation_scope_id, requirements, test_cases, test_results
+        ))
+    
+    @staticmethod
+    def iter_requirement_traceability_matrix(validation_scope_id, requirements, test_cases, test_results):
+        """Yield RTM records one at a time, in requirement then test case order
+        
+        Test cases and results are indexed up front (requirement -> tests,
+        test -> latest result), so each requirement costs only its own links.
+        """
+        tests_by_requirement = {}
+        for tc in test_cases or []:
+            for requirement_id in dict.fromkeys(tc.get('requirement_ids') or []):
+                tests_by_requirement.setdefault(requirement_id, []).append(tc)
+        
+        latest_results = {}
+        for tr in test_results or []:
+            test_case_id = tr.get('test_case_id')
+            current = latest_results.get(test_case_id)
+            # Later executions win; list order breaks ties when executed_at is missing
+            if current is None or (tr.get('executed_at') or '') >= (current.get('executed_at') or ''):
+                latest_results[test_case_id] = tr
+        
+        verification_date = datetime.utcnow().isoformat()
+        for req in requirements or []:
+            for test in tests_by_requirement.get(req.get('id'), ()):
+                test_result = latest_results.get(test.get('id'))
+                passed = test_result is not None and test_result.get('status') == 'PASSED'
                 
-                rtm_record = {
+                yield {
                     'id': str(uuid.uuid4()),
                     'requirement_id': req.get('id'),
                     'test_case_id': test.get('id'),
                     'validation_scope_id': validation_scope_id,
-                    'requirement_status': req_status,
+                    'requirement_status': 'VERIFIED' if passed else 'IN_TEST',
                     'test_status': test_result.get('status') if test_result else 'NOT_EXECUTED',
-                    'coverage_percentage': coverage,
+                    'coverage_percentage': 100 if passed else 0,
                     'verification_method': 'Test',
-                    'verification_date': datetime.utcnow().isoformat() if test_result else None,
+                    'verification_date': verification_date if test_result else None,
                     'risk_level': req.get('risk_level', 'MEDIUM')
                 }
-                rtm_records.append(rtm_record)
-        return rtm_records
     
     @staticmethod
     def create_validation_summary(validation_scope_id, validation_phase, metrics, completed_by=None):
@@ -183,23 +203,19 @@ class ReportsEngineService:
     
     @staticmethod
     def calculate_next_run(frequency):
-        """Calculate next scheduled run time based on frequency"""
+        """Calculate next scheduled run time based on frequency (calendar months, not 30-day blocks)"""
         now = datetime.utcnow()
-        if frequency == 'DAILY':
-            return (now + timedelta(days=1)).isoformat()
-        elif frequency == 'WEEKLY':
-            return (now + timedelta(weeks=1)).isoformat()
-        elif frequency == 'MONTHLY':
-            return (now + timedelta(days=30)).isoformat()
-        elif frequency == 'QUARTERLY':
-            return (now + timedelta(days=90)).isoformat()
-        elif frequency == 'ANNUALLY':
-            return (now + timedelta(days=365)).isoformat()
+        if frequency in FREQUENCIES:
+            return occurrence(frequency, now, 1).isoformat()
         return now.isoformat()
     
     @staticmethod
     def get_compliance_dashboard(scope_id, reports):
-        """Build compliance dashboard with key metrics and trend analysis"""
+        """Build compliance dashboard with key metrics and trend analysis
+
+        Folds the given report list; ComplianceRollupService.get_dashboard
+        returns the same figures from stored rollups.
+        """
         latest_reports = {}
         for report in reports:
             report_type = report.get('report_type')
@@ -219,7 +235,7 @@ class ReportsEngineService:
     
     @staticmethod
     def calculate_report_trends(scope_id, historical_reports):
-        """Analyze historical report trends for compliance monitoring"""
+        """Analyze historical report trends for compliance monitoring (see ComplianceRollupService.get_trends)"""
         return {
             'scope_id': scope_id,
             'analysis_timestamp': datetime.utcnow().isoformat(),
@@ -0,0 +1,271 @@
+"""SLA escalation scheduler for workflow deadlines
+
+Keeps a time-ordered heap of upcoming DocumentWorkflowState.sla_deadline values
+loaded incrementally from the indexed column, raises escalation events in
+batches, and serves overdue lists from memory instead of per-request scans.
+
+Incremental loading relies on a watermark: each refill only reads deadlines in
+(loaded_until, now + horizon]. State SLAs are whole hours, so any deadline
+written by a transition lies at least one hour ahead; keeping the horizon under
+an hour guarantees new deadlines always land beyond the watermark.
+"""
+
+import heapq
+import logging
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+from flask import current_app
+from app import db
+from app.extensions import socketio
+from app.models.workflow import DocumentWorkflowState
+
+logger = logging.getLogger(__name__)
+
+MAX_HORIZON_MINUTES = 59
+
+
+class SLAEscalationScheduler:
+    """Per-process deadline heap with batched escalation"""
+
+    def __init__(self):
+        self._heap = []  # (sla_deadline, doc_state_id)
+        self._deadlines: Dict[str, datetime] = {}  # doc_state_id -> latest known deadline
+        self._overdue: Dict[str, Dict] = {}  # doc_state_id -> breach event
+        self._loaded_until: Optional[datetime] = None
+        self._last_tick: Optional[datetime] = None
+        self._handlers: List[Callable[[List[Dict]], None]] = []
+        self._lock = threading.RLock()
+
+    # =========================================================================
+    # CONFIGURATION
+    # =========================================================================
+
+    def _settings(self) -> Dict:
+        config = current_app.config
+        return {
+            'horizon': timedelta(minutes=min(
+                int(config.get('SLA_SCAN_HORIZON_MINUTES', 30)), MAX_HORIZON_MINUTES
+            )),
+            'batch_size': int(config.get('SLA_ESCALATION_BATCH_SIZE', 500)),
+            'poll_seconds': int(config.get('SLA_SCHEDULER_POLL_SECONDS', 30))
+        }
+
+    def register_handler(self, handler: Callable[[List[Dict]], None]):
+        """Register a callable that receives each batch of escalation events"""
+        self._handlers.append(handler)
+
+    def reset(self):
+        """Drop all in-memory state; the next tick reloads from the database"""
+        with self._lock:
+            self._heap = []
+            self._deadlines = {}
+            self._overdue = {}
+            self._loaded_until = None
+            self._last_tick = None
+
+    # =========================================================================
+    # SCHEDULING
+    # =========================================================================
+
+    def tick(self, now: datetime = None, escalate: bool = True) -> List[Dict]:
+        """Load new deadlines, collect breaches and escalate them in batches
+
+        Returns the escalation events raised by this tick.
+        """
+        now = now or datetime.utcnow()
+        settings = self._settings()
+
+        with self._lock:
+            self._refill(now, settings)
+
+            due_ids = []
+            while self._heap and self._heap[0][0] <= now:
+                deadline, doc_state_id = heapq.heappop(self._heap)
+                if self._deadlines.get(doc_state_id) == deadline:
+                    due_ids.append(doc_state_id)
+
+            # Re-validate due and previously overdue rows in one pass per batch
+            candidate_ids = list(dict.fromkeys(due_ids + list(self._overdue.keys())))
+            breached = []
+            for start in range(0, len(candidate_ids), settings['batch_size']):
+                chunk = candidate_ids[start:start + settings['batch_size']]
+                rows = {row.id: row for row in db.session.query(
+                    DocumentWorkflowState.id,
+                    DocumentWorkflowState.document_id,
+                    DocumentWorkflowState.current_state_id,
+                    DocumentWorkflowState.assigned_to,
+                    DocumentWorkflowState.sla_deadline,
+                    DocumentWorkflowState.sla_escalated_at
+                ).filter(DocumentWorkflowState.id.in_(chunk)).all()}
+
+                for doc_state_id in chunk:
+                    row = rows.get(doc_state_id)
+                    if row is None or row.sla_deadline is None or row.sla_deadline > now:
+                        # Transitioned out of the breached state; a new deadline reloads via the watermark
+                        self._overdue.pop(doc_state_id, None)
+                        if row is None or row.sla_deadline is None:
+                            self._deadlines.pop(doc_state_id, None)
+                        continue
+
+                    self._deadlines.pop(doc_state_id, None)
+                    event = self._serialize_breach(row, now)
+                    self._overdue[doc_state_id] = event
+                    if row.sla_escalated_at is None:
+                        breached.append(event)
+
+            self._last_tick = now
+
+        if not escalate or not breached:
+            return []
+        return self._escalate(breached, now, settings['batch_size'])
+
+    def _refill(self, now: datetime, settings: Dict):
+        """Load deadlines in (loaded_until, now + horizon] using the sla_deadline index"""
+        upper = now + settings['horizon']
+        if self._loaded_until is not None and upper <= self._loaded_until:
+            return
+
+        # Keyset pagination over (sla_deadline, id) keeps each query an index range read
+        cursor = None
+        while True:
+            query = db.session.query(
+                DocumentWorkflowState.id, DocumentWorkflowState.sla_deadline
+            ).filter(
+                DocumentWorkflowState.sla_deadline.isnot(None),
+                DocumentWorkflowState.sla_deadline <= upper
+            )
+            if self._loaded_until is not None:
+                query = query.filter(DocumentWorkflowState.sla_deadline > self._loaded_until)
+            if cursor is not None:
+                query = query.filter(db.or_(
+                    DocumentWorkflowState.sla_deadline > cursor[0],
+                    db.and_(DocumentWorkflowState.sla_deadline == cursor[0],
+                            DocumentWorkflowState.id > cursor[1])
+                ))
+            rows = query.order_by(
+                DocumentWorkflowState.sla_deadline, DocumentWorkflowState.id
+            ).limit(settings['batch_size']).all()
+
+            for doc_state_id, deadline in rows:
+                self._deadlines[doc_state_id] = deadline
+                heapq.heappush(self._heap, (deadline, doc_state_id))
+
+            if len(rows) < settings['batch_size']:
+                break
+            cursor = rows[-1]
+
+        self._loaded_until = upper
+
+    def _escalate(self, events: List[Dict], now: datetime, batch_size: int) -> List[Dict]:
+        """Claim breaches with one UPDATE per batch, then notify handlers of the rows claimed
+
+        The UPDATE stamps a fresh claim token on the rows it actually changes, so
+        when several scheduler processes race for the same breaches each event is
+        handed to exactly one of them.
+        """
+        raised = []
+        for start in range(0, len(events), batch_size):
+            batch = events[start:start + batch_size]
+            batch_ids = [e['doc_state_id'] for e in batch]
+            claim = str(uuid.uuid4())
+            try:
+                DocumentWorkflowState.query.filter(
+                    DocumentWorkflowState.id.in_(batch_ids),
+                    DocumentWorkflowState.sla_escalated_at.is_(None)
+                ).update({
+                    DocumentWorkflowState.sla_escalated_at: now,
+                    DocumentWorkflowState.sla_escalation_claim: claim
+                }, synchronize_session=False)
+                claimed = {row_id for (row_id,) in db.session.query(DocumentWorkflowState.id).filter(
+                    DocumentWorkflowState.id.in_(batch_ids),
+                    DocumentWorkflowState.sla_escalation_claim == claim
+                )}
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f'SLA escalation claim failed: {str(e)}')
+                continue
+
+            batch = [e for e in batch if e['doc_state_id'] in claimed]
+            if not batch:
+                continue
+
+            for handler in self._handlers or [self._emit_socketio]:
+                try:
+                    handler(batch)
+                except Exception as e:
+                    logger.error(f'SLA escalation handler failed: {str(e)}')
+            raised.extend(batch)
+        return raised
+
+    @staticmethod
+    def _emit_socketio(events: List[Dict]):
+        socketio.emit('sla_escalations', {'events': events})
+
+    @staticmethod
+    def _serialize_breach(row, now: datetime) -> Dict:
+        return {
+            'doc_state_id': row.id,
+            'document_id': row.document_id,
+            'state_id': row.current_state_id,
+            'assigned_to': row.assigned_to,
+            'sla_deadline': row.sla_deadline.isoformat(),
+            'overdue_minutes': int((now - row.sla_deadline).total_seconds() // 60)
+        }
+
+    # =========================================================================
+    # QUERIES
+    # =========================================================================
+
+    def get_overdue(self, assigned_to: str = None, limit: int = None) -> List[Dict]:
+        """Overdue documents from memory, refreshed at most once per poll interval"""
+        settings = self._settings()
+        now = datetime.utcnow()
+        if self._last_tick is None or (now - self._last_tick).total_seconds() >= settings['poll_seconds']:
+            self.tick(now, escalate=False)
+
+        with self._lock:
+            events = list(self._overdue.values())
+        if assigned_to:
+            events = [e for e in events if e['assigned_to'] == assigned_to]
+        events.sort(key=lambda e: e['sla_deadline'])
+        return events[:limit] if limit else events
+
+    def get_upcoming(self, within_minutes: int = 60) -> List[Dict]:
+        """Deadlines already loaded into the heap that fall due within the window"""
+        cutoff = datetime.utcnow() + timedelta(minutes=within_minutes)
+        with self._lock:
+            upcoming = sorted(
+                (deadline, doc_state_id) for doc_state_id, deadline in self._deadlines.items()
+                if deadline <= cutoff
+            )
+        return [{'doc_state_id': doc_state_id, 'sla_deadline': deadline.isoformat()}
+                for deadline, doc_state_id in upcoming]
+
+    # =========================================================================
+    # BACKGROUND LOOP
+    # =========================================================================
+
+    def run_forever(self, app, stop_event: threading.Event = None):
+        """Tick until stopped; intended for a dedicated scheduler process"""
+        stop_event = stop_event or threading.Event()
+        with app.app_context():
+            poll_seconds = self._settings()['poll_seconds']
+            logger.info(f'SLA scheduler started (poll every {poll_seconds}s)')
+            while not stop_event.is_set():
+                try:
+                    raised = self.tick()
+                    if raised:
+                        logger.info(f'Escalated {len(raised)} SLA breaches')
+                except Exception as e:
+                    db.session.rollback()
+                    logger.error(f'SLA scheduler tick failed: {str(e)}')
+                finally:
+                    db.session.remove()
+                stop_event.wait(poll_seconds)
+
+
+sla_scheduler = SLAEscalationScheduler()
@@ -2,7 +2,9 @@ import hashlib
 import json
 from datetime import datetime
 from ..models.system_validation import ValidationProtocol, ValidationResult, ComprehensiveAuditLog, SystemHealthMetric, ValidationStatus, ValidationPhase
-from sqlalchemy import db
+from app import db
+from app.services.audit_analytics_service import AuditAnalyticsService
+from app.services.audit_pipeline_service import audit_pipeline
 
 class SystemValidationService:
     
@@ -64,9 +66,7 @@ class SystemValidationService:
             user_agent=user_agent,
             checksum=checksum
         )
-        db.session.add(audit_log)
-        db.session.commit()
-        return audit_log
+        return audit_pipeline.submit(audit_log)
     
     @staticmethod
     def record_system_health_metric(metric_name, metric_value, threshold_min=None, threshold_max=None):
@@ -110,21 +110,4 @@ class SystemValidationService:
     
     @staticmethod
     def generate_audit_report(start_date, end_date):
-        logs = ComprehensiveAuditLog.query.filter(
-            ComprehensiveAuditLog.timestamp >= start_date,
-            ComprehensiveAuditLog.timestamp <= end_date
-        ).all()
-        
-        report = {
-            'total_audit_records': len(logs),
-            'audit_types': {},
-            'by_user': {},
-            'by_entity': {}
-        }
-        
-        for log in logs:
-            report['audit_types'][log.audit_type] = report['audit_types'].get(log.audit_type, 0) + 1
-            report['by_user'][log.user_id] = report['by_user'].get(log.user_id, 0) + 1
-            report['by_entity'][log.entity_type] = report['by_entity'].get(log.entity_type, 0) + 1
-        
-        return report
+        return AuditAnalyticsService.get_report(start_date, end_date)
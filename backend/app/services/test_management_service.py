@@ -1,11 +1,26 @@
-from app.models.test_management import TestPlan, TestSet, TestCase, TestStep, TestExecution, TestStepResult
+from app.models.test_management import (
+    TestPlan, TestSet, TestCase, TestStep, TestExecution, TestStepResult, TestCoverageSnapshot
+)
 from app import db
+from flask import current_app
+from sqlalchemy import Select, event, inspect, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
 from datetime import datetime
 from uuid import uuid4
 import json
 
 class TestManagementService:
     
+    @staticmethod
+    def init_app(app):
+        if not app.config.get('TEST_COVERAGE_SNAPSHOTS', True):
+            return
+        if not event.contains(Session, 'before_flush', _collect_stale_coverage):
+            event.listen(Session, 'before_flush', _collect_stale_coverage)
+            event.listen(Session, 'after_flush_postexec', _invalidate_stale_coverage)
+            event.listen(Session, 'after_soft_rollback', _discard_stale_coverage)
+    
     @staticmethod
     def create_test_plan(name, description, validation_id, project_id, created_by):
         """Create new test plan"""
@@ -89,34 +104,78 @@ class TestManagementService:
     @staticmethod
     def record_step_result(execution_id, step_id, status, actual_result, notes=None, screenshots=None):
         """Record individual step result"""
-        step_result = TestStepResult(
+        return TestManagementService.record_step_results(execution_id, [{
+            'step_id': step_id,
+            'status': status,
+            'actual_result': actual_result,
+            'notes': notes,
+            'screenshots': screenshots
+        }])[0]
+    
+    @staticmethod
+    def record_step_results(execution_id, results, track_totals=True):
+        """Record many step results with one counter update and one commit
+        
+        Counters are bumped in place (passed_steps = passed_steps + n) rather
+        than recounted from every stored result. track_totals also counts the
+        results into total_steps and derives overall_status; executions
+        started over the API carry the planned step count instead and get
+        their status when completed.
+        """
+        if not results:
+            return []
+        step_results = [TestStepResult(
             id=str(uuid4()),
             execution_id=execution_id,
-            step_id=step_id,
-            status=status,
-            actual_result=actual_result,
-            notes=notes,
-            screenshot_urls=screenshots or [],
-            duration_seconds=0
-        )
-        db.session.add(step_result)
-        db.session.flush()
+            step_id=result['step_id'],
+            status=result['status'],
+            actual_result=result.get('actual_result'),
+            notes=result.get('notes'),
+            screenshot_urls=result.get('screenshots') or [],
+            duration_seconds=result.get('duration_seconds') or 0
+        ) for result in results]
+        passed = sum(1 for result in results if result['status'] == 'PASS')
+        failed = sum(1 for result in results if result['status'] == 'FAIL')
         
-        # Update execution summary
-        execution = TestExecution.query.get(execution_id)
-        step_results = TestStepResult.query.filter_by(execution_id=execution_id).all()
+        passed_steps = db.func.coalesce(TestExecution.passed_steps, 0) + passed
+        failed_steps = db.func.coalesce(TestExecution.failed_steps, 0) + failed
+        values = []
+        if track_totals:
+            total_steps = db.func.coalesce(TestExecution.total_steps, 0) + len(results)
+            # Listed first and written in terms of the old values: MySQL applies SET clauses left to right
+            values.append((TestExecution.overall_status, db.case(
+                (passed_steps == total_steps, 'PASS'),
+                (failed_steps > 0, 'FAIL'),
+                else_=TestExecution.overall_status
+            )))
+            values.append((TestExecution.total_steps, total_steps))
+        values += [(TestExecution.passed_steps, passed_steps), (TestExecution.failed_steps, failed_steps)]
         
-        execution.total_steps = len(step_results)
-        execution.passed_steps = len([s for s in step_results if s.status == 'PASS'])
-        execution.failed_steps = len([s for s in step_results if s.status == 'FAIL'])
+        # The counter update also locks the execution row, so concurrent syncs apply one after another
+        updated = db.session.execute(
+            update(TestExecution).where(TestExecution.id == execution_id).ordered_values(*values),
+            execution_options={'synchronize_session': False}
+        ).rowcount
+        if not updated:
+            db.session.rollback()
+            raise ValueError('Test execution not found')
         
-        if execution.passed_steps == execution.total_steps:
-            execution.overall_status = 'PASS'
-        elif execution.failed_steps > 0:
-            execution.overall_status = 'FAIL'
+        if track_totals and current_app.config.get('TEST_COVERAGE_SNAPSHOTS', True):
+            # The bulk update bypasses the session hooks, so drop the coverage snapshot here
+            TestManagementService.invalidate_coverage(
+                select(TestPlan.project_id).join(TestCase, TestCase.plan_id == TestPlan.id).join(
+                    TestExecution, TestExecution.test_case_id == TestCase.id
+                ).where(TestExecution.id == execution_id)
+            )
+        if track_totals:
+            # overall_status was derived by the UPDATE; keep the deviation index in the same commit
+            from app.services.deviation_index_service import DeviationIndexService
+            execution = db.session.get(TestExecution, execution_id, populate_existing=True)
+            DeviationIndexService.record_execution(execution, detected_at=datetime.utcnow())
         
+        db.session.add_all(step_results)
         db.session.commit()
-        return step_result
+        return step_results
     
     @staticmethod
     def get_test_plan(test_plan_id):
@@ -124,38 +183,124 @@ class TestManagementService:
         return TestPlan.query.get(test_plan_id)
     
     @staticmethod
-    def get_test_coverage(validation_id):
-        """Calculate test coverage metrics"""
-        test_plans = TestPlan.query.filter_by(validation_id=validation_id).all()
-        total_test_cases = 0
-        executed_test_cases = 0
-        passed_test_cases = 0
-        failed_test_cases = 0
+    def get_test_coverage(validation_id, use_snapshot=True):
+        """Calculate test coverage metrics for a validation project
         
-        for plan in test_plans:
-            for test_set in plan.test_sets:
-                for test_case in test_set.test_cases:
-                    total_test_cases += 1
-                    executions = TestExecution.query.filter_by(test_case_id=test_case.id).all()
-                    if executions:
-                        executed_test_cases += 1
-                        latest_execution = max(executions, key=lambda x: x.execution_date)
-                        if latest_execution.overall_status == 'PASS':
-                            passed_test_cases += 1
-                        elif latest_execution.overall_status == 'FAIL':
-                            failed_test_cases += 1
+        Served from the project's coverage snapshot while it is current;
+        otherwise computed with one query. Reads never store a snapshot, see
+        refresh_test_coverage.
+        """
+        if use_snapshot and current_app.config.get('TEST_COVERAGE_SNAPSHOTS', True):
+            snapshot = db.session.get(TestCoverageSnapshot, validation_id)
+            if snapshot is not None and snapshot.is_current:
+                return TestManagementService._coverage_result({
+                    'total_test_cases': snapshot.total_test_cases,
+                    'executed_test_cases': snapshot.executed_test_cases,
+                    'passed_test_cases': snapshot.passed_test_cases,
+                    'failed_test_cases': snapshot.failed_test_cases
+                })
+        return TestManagementService._coverage_result(TestManagementService.compute_test_coverage(validation_id))
+    
+    @staticmethod
+    def refresh_test_coverage(validation_id):
+        """Recompute and store a project's coverage snapshot (caller commits); returns the counts"""
+        snapshot = db.session.get(TestCoverageSnapshot, validation_id)
+        if snapshot is None:
+            # The row must exist before counting so a concurrent execution can bump its version
+            try:
+                with db.session.begin_nested():
+                    db.session.add(TestCoverageSnapshot(project_id=validation_id, version=0, is_current=False))
+            except IntegrityError:
+                pass
+            snapshot = db.session.get(TestCoverageSnapshot, validation_id)
+        
+        version = snapshot.version
+        counts = TestManagementService.compute_test_coverage(validation_id)
+        # Only store the figures if nothing invalidated them while they were being counted
+        TestCoverageSnapshot.query.filter_by(project_id=validation_id, version=version).update(
+            dict(counts, is_current=True, computed_at=datetime.utcnow()), synchronize_session=False
+        )
+        return counts
+    
+    @staticmethod
+    def compute_test_coverage(validation_id):
+        """Case counts by latest execution status, in one query"""
+        latest = TestManagementService.latest_executions(
+            select(TestCase.id).join(TestPlan, TestCase.plan_id == TestPlan.id).where(
+                TestPlan.project_id == validation_id
+            )
+        )
         
-        coverage_pct = (executed_test_cases / total_test_cases * 100) if total_test_cases > 0 else 0
+        total, executed, passed, failed = db.session.query(
+            db.func.count(TestCase.id),
+            db.func.count(latest.c.test_case_id),
+            db.func.sum(db.case((latest.c.overall_status == 'PASS', 1), else_=0)),
+            db.func.sum(db.case((latest.c.overall_status == 'FAIL', 1), else_=0))
+        ).select_from(TestCase).join(TestPlan, TestCase.plan_id == TestPlan.id).outerjoin(
+            latest, latest.c.test_case_id == TestCase.id
+        ).filter(TestPlan.project_id == validation_id).one()
         
         return {
-            'total_test_cases': total_test_cases,
-            'executed_test_cases': executed_test_cases,
-            'passed_test_cases': passed_test_cases,
-            'failed_test_cases': failed_test_cases,
+            'total_test_cases': total or 0,
+            'executed_test_cases': executed or 0,
+            'passed_test_cases': passed or 0,
+            'failed_test_cases': failed or 0
+        }
+    
+    @staticmethod
+    def latest_executions(case_ids):
+        """Subquery of the latest execution of each case in case_ids (a SELECT of case ids)
+        
+        ROW_NUMBER() runs over the (test_case_id, execution_date) index, only
+        for the given cases; executions on the same date are ordered by when
+        they were recorded.
+        """
+        ranked = db.session.query(
+            TestExecution.id.label('execution_id'),
+            TestExecution.test_case_id.label('test_case_id'),
+            TestExecution.overall_status.label('overall_status'),
+            TestExecution.execution_date.label('execution_date'),
+            TestExecution.executed_by.label('executed_by'),
+            db.func.row_number().over(
+                partition_by=TestExecution.test_case_id,
+                order_by=(TestExecution.execution_date.desc(), TestExecution.created_at.desc(), TestExecution.id.desc())
+            ).label('position')
+        ).filter(TestExecution.test_case_id.in_(case_ids)).subquery()
+        return db.session.query(
+            ranked.c.execution_id, ranked.c.test_case_id, ranked.c.overall_status,
+            ranked.c.execution_date, ranked.c.executed_by
+        ).filter(ranked.c.position == 1).subquery()
+    
+    @staticmethod
+    def _coverage_result(counts):
+        total = counts['total_test_cases']
+        executed = counts['executed_test_cases']
+        coverage_pct = (executed / total * 100) if total > 0 else 0
+        
+        return {
+            'total_test_cases': total,
+            'executed_test_cases': executed,
+            'passed_test_cases': counts['passed_test_cases'],
+            'failed_test_cases': counts['failed_test_cases'],
             'coverage_percentage': round(coverage_pct, 2),
-            'pass_rate': round(passed_test_cases / executed_test_cases * 100, 2) if executed_test_cases > 0 else 0
+            'pass_rate': round(counts['passed_test_cases'] / executed * 100, 2) if executed > 0 else 0
         }
     
+    @staticmethod
+    def invalidate_coverage(validation_ids, session=None):
+        """Mark coverage snapshots stale (bumping the version defeats in-flight recomputes)
+        
+        validation_ids is a collection of project ids or a SELECT of them.
+        """
+        session = session or db.session
+        if not isinstance(validation_ids, Select):
+            validation_ids = [v for v in set(validation_ids) if v is not None]
+            if not validation_ids:
+                return
+        session.execute(update(TestCoverageSnapshot).where(
+            TestCoverageSnapshot.project_id.in_(validation_ids)
+        ).values(version=TestCoverageSnapshot.version + 1, is_current=False))
+    
     @staticmethod
     def link_requirement_to_test(test_case_id, requirement_id):
         """Link requirement to test case for traceability"""
@@ -181,3 +326,63 @@ class TestManagementService:
         
         untested = [r for r in requirements if r.id not in tested_requirement_ids]
         return untested
+
+
+# =============================================================================
+# COVERAGE SNAPSHOT INVALIDATION HOOKS
+# =============================================================================
+
+_STALE_KEY = 'coverage_stale'
+_EXECUTION_ATTRIBUTES = ('test_case_id', 'overall_status', 'execution_date')
+
+
+def _validations_of_cases(session, case_ids):
+    """Project ids (TestPlan.project_id) of the given cases"""
+    if not case_ids:
+        return set()
+    return set(session.execute(
+        select(TestPlan.project_id).join(TestCase, TestCase.plan_id == TestPlan.id).where(
+            TestCase.id.in_(list(case_ids))
+        ).distinct()
+    ).scalars())
+
+
+def _collect_stale_coverage(session, flush_context, instances):
+    """Resolve validations of changed and deleted rows while they are still readable"""
+    stale = session.info.setdefault(_STALE_KEY, {'validation_ids': set(), 'pending': []})
+    case_ids = set()
+    for obj in session.new:
+        if isinstance(obj, (TestExecution, TestCase)):
+            # Ids and links are only final once the flush has run
+            stale['pending'].append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, TestExecution):
+            state = inspect(obj)
+            if any(state.attrs[name].history.has_changes() for name in _EXECUTION_ATTRIBUTES):
+                case_ids.add(obj.test_case_id)
+                case_ids.update(value for value in state.attrs['test_case_id'].history.deleted if value is not None)
+        elif isinstance(obj, TestCase) and inspect(obj).attrs['plan_id'].history.has_changes():
+            # Moved to another plan: stale under the old project now, the new one after the flush
+            case_ids.add(obj.id)
+            stale['pending'].append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, TestExecution):
+            case_ids.add(obj.test_case_id)
+        elif isinstance(obj, TestCase):
+            case_ids.add(obj.id)
+    stale['validation_ids'].update(_validations_of_cases(session, case_ids))
+
+
+def _invalidate_stale_coverage(session, flush_context):
+    stale = session.info.pop(_STALE_KEY, None)
+    if not stale:
+        return
+    case_ids = {obj.id if isinstance(obj, TestCase) else obj.test_case_id for obj in stale['pending']}
+    validation_ids = stale['validation_ids'] | _validations_of_cases(session, case_ids)
+    TestManagementService.invalidate_coverage(validation_ids, session)
+
+
+def _discard_stale_coverage(session, previous_transaction):
+    # Only an outermost rollback discards; a savepoint rollback keeps the outer transaction's changes
+    if previous_transaction.parent is None:
+        session.info.pop(_STALE_KEY, None)
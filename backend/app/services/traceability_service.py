@@ -0,0 +1,326 @@
+"""Requirements traceability computed in SQL, with a materialized per-project RTM
+
+A requirement is linked to a test case either through requirement_test_mapping
+or through TestCase.requirement_id. The matrix is one statement: requirements
+LEFT JOIN (union of both link sources) LEFT JOIN test_cases, ordered so rows
+for a requirement are adjacent. Requirements with no active (non-deprecated)
+linked test are gaps.
+
+project_traceability_entries holds the folded matrix, one row per requirement.
+Session hooks note which requirements a flush touches (requirement fields,
+links, linked test names/statuses) and recompute just those rows in the same
+transaction, so the table commits or rolls back with the change. Reads never
+write. Bulk writes that bypass the ORM still bump updated_at, so
+`flask refresh_rtm` recomputes just the rows that are missing or whose
+refreshed_at is older than their requirement, linked tests or links; --full
+rebuilds every row, e.g. after bulk deletes.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Set
+
+from sqlalchemy import delete, event, inspect, select, union
+from sqlalchemy.orm import Session
+from app import db
+from app.models.requirement import Requirement, RequirementTestMapping, ProjectTraceabilityEntry
+from app.models.test_management import TestCase
+
+logger = logging.getLogger(__name__)
+
+_STALE_KEY = 'rtm_stale'
+_CHUNK_SIZE = 500
+
+# Test statuses that do not count as coverage
+INACTIVE_TEST_STATUSES = ('Deprecated',)
+
+# Attributes whose change alters a requirement's RTM row
+_TRACKED_ATTRIBUTES = {
+    Requirement: ('project_id', 'requirement_id', 'title', 'criticality', 'status'),
+    RequirementTestMapping: ('requirement_id', 'test_case_id'),
+    TestCase: ('requirement_id', 'name', 'status')
+}
+
+
+def _links(requirement_ids: Optional[List[str]] = None, project_id: Optional[str] = None):
+    """requirement_id -> test_case_id pairs from both link sources, pre-filtered to the scope"""
+    mapped = select(
+        RequirementTestMapping.requirement_id.label('requirement_id'),
+        RequirementTestMapping.test_case_id.label('test_case_id')
+    )
+    direct = select(TestCase.requirement_id, TestCase.id).where(TestCase.requirement_id.isnot(None))
+    if requirement_ids is not None:
+        mapped = mapped.where(RequirementTestMapping.requirement_id.in_(requirement_ids))
+        direct = direct.where(TestCase.requirement_id.in_(requirement_ids))
+    elif project_id is not None:
+        scope = select(Requirement.id).where(Requirement.project_id == project_id)
+        mapped = mapped.where(RequirementTestMapping.requirement_id.in_(scope))
+        direct = direct.where(TestCase.requirement_id.in_(scope))
+    return union(mapped, direct).subquery('rtm_links')
+
+
+class TraceabilityService:
+    """Single-query RTM and its incrementally maintained materialization"""
+
+    @staticmethod
+    def init_app(app):
+        if not app.config.get('RTM_INCREMENTAL_REFRESH', True):
+            return
+        if not event.contains(Session, 'before_flush', _collect_stale_requirements):
+            event.listen(Session, 'before_flush', _collect_stale_requirements)
+            event.listen(Session, 'after_flush_postexec', _refresh_stale_requirements)
+            event.listen(Session, 'after_soft_rollback', _discard_stale_requirements)
+
+    # =========================================================================
+    # LIVE MATRIX
+    # =========================================================================
+
+    @staticmethod
+    def matrix_query(project_id: str = None, requirement_ids: List[str] = None):
+        """The whole matrix (or a slice of it) as one LEFT JOIN statement"""
+        links = _links(requirement_ids, project_id)
+        query = select(
+            Requirement.id,
+            Requirement.project_id,
+            Requirement.requirement_id,
+            Requirement.title,
+            Requirement.criticality,
+            Requirement.status,
+            TestCase.id,
+            TestCase.name,
+            TestCase.status
+        ).select_from(Requirement).outerjoin(
+            links, links.c.requirement_id == Requirement.id
+        ).outerjoin(
+            TestCase, TestCase.id == links.c.test_case_id
+        )
+        if requirement_ids is not None:
+            query = query.where(Requirement.id.in_(requirement_ids))
+        elif project_id is not None:
+            query = query.where(Requirement.project_id == project_id)
+        return query.order_by(Requirement.requirement_id, Requirement.id, TestCase.name, TestCase.id)
+
+    @staticmethod
+    def iter_matrix(rows: Iterable) -> Iterator[Dict]:
+        """Fold matrix_query rows into one entry per requirement"""
+        entry = None
+        for req_id, project_id, key, title, criticality, status, test_id, test_name, test_status in rows:
+            if entry is None or entry['id'] != req_id:
+                if entry is not None:
+                    yield TraceabilityService._close_entry(entry)
+                entry = {
+                    'id': req_id,
+                    'project_id': project_id,
+                    'requirement_id': key,
+                    'title': title,
+                    'criticality': criticality,
+                    'status': status,
+                    'test_cases': []
+                }
+            if test_id is not None:
+                entry['test_cases'].append({'id': test_id, 'name': test_name, 'status': test_status})
+        if entry is not None:
+            yield TraceabilityService._close_entry(entry)
+
+    @staticmethod
+    def _close_entry(entry: Dict) -> Dict:
+        active = sum(1 for test in entry['test_cases'] if test['status'] not in INACTIVE_TEST_STATUSES)
+        entry['test_count'] = len(entry['test_cases'])
+        entry['active_test_count'] = active
+        entry['coverage'] = 'Complete' if active else 'Gap'
+        return entry
+
+    @staticmethod
+    def compute_matrix(project_id: str) -> List[Dict]:
+        rows = db.session.execute(TraceabilityService.matrix_query(project_id=project_id))
+        return list(TraceabilityService.iter_matrix(rows))
+
+    # =========================================================================
+    # MATERIALIZED MATRIX
+    # =========================================================================
+
+    @staticmethod
+    def get_matrix(project_id: str) -> List[Dict]:
+        """Materialized RTM for a project as last refreshed"""
+        return list(TraceabilityService.iter_materialized(project_id))
+
+    @staticmethod
+    def iter_materialized(project_id: str, batch_size: int = 1000) -> Iterator[Dict]:
+        """Stream the materialized RTM in requirement order over a server-side cursor (read only)"""
+        rows = db.session.query(
+            ProjectTraceabilityEntry.requirement_id,
+            ProjectTraceabilityEntry.project_id,
+            ProjectTraceabilityEntry.requirement_key,
+            ProjectTraceabilityEntry.title,
+            ProjectTraceabilityEntry.criticality,
+            ProjectTraceabilityEntry.requirement_status,
+            ProjectTraceabilityEntry.test_cases,
+            ProjectTraceabilityEntry.test_count,
+            ProjectTraceabilityEntry.active_test_count,
+            ProjectTraceabilityEntry.coverage
+        ).filter(
+            ProjectTraceabilityEntry.project_id == project_id
+        ).order_by(ProjectTraceabilityEntry.requirement_key).yield_per(batch_size)
+        for (requirement_id, entry_project_id, key, title, criticality, status,
+             test_cases, test_count, active_test_count, coverage) in rows:
+            yield {
+                'id': requirement_id,
+                'project_id': entry_project_id,
+                'requirement_id': key,
+                'title': title,
+                'criticality': criticality,
+                'status': status,
+                'test_cases': test_cases or [],
+                'test_count': test_count,
+                'active_test_count': active_test_count,
+                'coverage': coverage
+            }
+
+    @staticmethod
+    def refresh_project(project_id: str, session: Session = None) -> int:
+        """Recompute every RTM row of a project (caller commits); returns rows written"""
+        session = session or db.session
+        session.execute(delete(ProjectTraceabilityEntry.__table__).where(
+            ProjectTraceabilityEntry.__table__.c.project_id == project_id
+        ))
+        return TraceabilityService._write_entries(
+            session, session.execute(TraceabilityService.matrix_query(project_id=project_id))
+        )
+
+    @staticmethod
+    def stale_requirements(project_id: str) -> List[str]:
+        """Requirements whose RTM row is missing or older than the requirement, a linked test or a new link"""
+        entry = ProjectTraceabilityEntry
+        links = _links(project_id=project_id)
+        new_link = select(RequirementTestMapping.id).where(
+            RequirementTestMapping.requirement_id == Requirement.id,
+            RequirementTestMapping.created_at > entry.refreshed_at
+        ).exists()
+        query = select(Requirement.id).distinct().select_from(Requirement).outerjoin(
+            entry, entry.requirement_id == Requirement.id
+        ).outerjoin(
+            links, links.c.requirement_id == Requirement.id
+        ).outerjoin(
+            TestCase, TestCase.id == links.c.test_case_id
+        ).where(
+            Requirement.project_id == project_id,
+            db.or_(
+                entry.requirement_id.is_(None),
+                Requirement.updated_at > entry.refreshed_at,
+                TestCase.updated_at > entry.refreshed_at,
+                new_link
+            )
+        )
+        return list(db.session.execute(query).scalars())
+
+    @staticmethod
+    def refresh_stale(project_id: str) -> int:
+        """Recompute only the project's stale RTM rows (caller commits); returns rows written"""
+        stale = TraceabilityService.stale_requirements(project_id)
+        if not stale:
+            return 0
+        logger.info(f'Refreshing {len(stale)} stale RTM rows for project {project_id}')
+        return TraceabilityService.refresh_requirements(stale)
+
+    @staticmethod
+    def refresh_requirements(requirement_ids: Iterable[str], session: Session = None) -> int:
+        """Recompute the RTM rows of specific requirements (deleted ones drop out)"""
+        session = session or db.session
+        requirement_ids = sorted(set(requirement_ids))
+        written = 0
+        table = ProjectTraceabilityEntry.__table__
+        for start in range(0, len(requirement_ids), _CHUNK_SIZE):
+            chunk = requirement_ids[start:start + _CHUNK_SIZE]
+            session.execute(delete(table).where(table.c.requirement_id.in_(chunk)))
+            written += TraceabilityService._write_entries(
+                session, session.execute(TraceabilityService.matrix_query(requirement_ids=chunk))
+            )
+        return written
+
+    @staticmethod
+    def _write_entries(session: Session, rows) -> int:
+        now = datetime.utcnow()
+        entries = [{
+            'requirement_id': entry['id'],
+            'project_id': entry['project_id'],
+            'requirement_key': entry['requirement_id'],
+            'title': entry['title'],
+            'criticality': entry['criticality'],
+            'requirement_status': entry['status'],
+            'test_cases': entry['test_cases'],
+            'test_count': entry['test_count'],
+            'active_test_count': entry['active_test_count'],
+            'coverage': entry['coverage'],
+            'refreshed_at': now
+        } for entry in TraceabilityService.iter_matrix(rows)]
+        if entries:
+            session.execute(ProjectTraceabilityEntry.__table__.insert(), entries)
+        return len(entries)
+
+
+# =============================================================================
+# INCREMENTAL REFRESH HOOKS
+# =============================================================================
+
+def _changed(obj, attributes) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def _old_values(obj, name) -> List:
+    return [value for value in inspect(obj).attrs[name].history.deleted if value is not None]
+
+
+def _collect_stale_requirements(session, flush_context, instances):
+    """Note the requirements this flush affects while the old links are still readable"""
+    stale = session.info.setdefault(_STALE_KEY, {'requirement_ids': set(), 'pending': []})
+    requirement_ids: Set[str] = stale['requirement_ids']
+    test_ids = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        tracked = _TRACKED_ATTRIBUTES.get(type(obj))
+        if tracked is None:
+            continue
+        if obj in session.dirty and obj not in session.deleted and not _changed(obj, tracked):
+            continue
+        if obj in session.new:
+            # Primary keys are assigned during the flush
+            stale['pending'].append(obj)
+            continue
+
+        if isinstance(obj, Requirement):
+            requirement_ids.add(obj.id)
+        else:
+            if obj.requirement_id is not None:
+                requirement_ids.add(obj.requirement_id)
+            requirement_ids.update(_old_values(obj, 'requirement_id'))
+            if isinstance(obj, TestCase):
+                test_ids.add(obj.id)
+
+    if test_ids:
+        test_ids = sorted(test_ids)
+        for start in range(0, len(test_ids), _CHUNK_SIZE):
+            requirement_ids.update(session.execute(
+                select(RequirementTestMapping.requirement_id).where(
+                    RequirementTestMapping.test_case_id.in_(test_ids[start:start + _CHUNK_SIZE])
+                )
+            ).scalars())
+
+
+def _refresh_stale_requirements(session, flush_context):
+    stale = session.info.pop(_STALE_KEY, None)
+    if not stale:
+        return
+    requirement_ids = stale['requirement_ids']
+    for obj in stale['pending']:
+        requirement_id = obj.id if isinstance(obj, Requirement) else obj.requirement_id
+        if requirement_id is not None:
+            requirement_ids.add(requirement_id)
+    if requirement_ids:
+        TraceabilityService.refresh_requirements(requirement_ids, session)
+
+
+def _discard_stale_requirements(session, previous_transaction):
+    # Only an outermost rollback discards; a savepoint rollback keeps the outer transaction's changes
+    if previous_transaction.parent is None:
+        session.info.pop(_STALE_KEY, None)
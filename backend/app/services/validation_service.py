@@ -3,6 +3,7 @@ from datetime import datetime
 from app import db
 from app.models.validation import ValidationProject, ValidationProtocol
 from app.models.audit import AuditLog
+from app.services.audit_pipeline_service import audit_pipeline
 import uuid
 
 class ValidationService:
@@ -40,7 +41,7 @@ class ValidationService:
             change_description=f'Validation project created: {project.project_number}',
             timestamp=datetime.utcnow()
         )
-        db.session.add(audit)
+        audit_pipeline.stage(audit)
         db.session.commit()
         
         return project
@@ -80,7 +81,7 @@ class ValidationService:
                 change_description=f"Updated {change['field']} from '{change['old']}' to '{change['new']}'",
                 timestamp=datetime.utcnow()
             )
-            db.session.add(audit)
+            audit_pipeline.stage(audit)
         
         db.session.commit()
         return project
@@ -0,0 +1,155 @@
+"""Workflow auto-assignment backed by a cached role -> users index
+
+Replaces the per-transition `first user with role` query. The index is built
+from UserRole/Role in one query and refreshed on a TTL (or via invalidate()).
+Open-task counts per user are seeded from DocumentWorkflowState.assigned_to
+and then maintained incrementally in memory, so selecting an assignee is O(1):
+
+- round_robin: rotate through the role's active members
+- least_loaded: pick from the lowest non-empty load bucket of the role
+
+Counts are per process and drift slightly between workers; every rebuild
+re-seeds them from the database.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional
+
+from flask import current_app
+from app import db
+from app.models.user import User, Role, UserRole
+from app.models.workflow import DocumentWorkflowState, WorkflowState
+
+
+class _RoleLoadBuckets:
+    """Users of one role grouped by open-task count with a tracked minimum"""
+
+    def __init__(self):
+        self.buckets: Dict[int, Dict[str, None]] = {}  # load -> ordered set of user ids
+        self.load: Dict[str, int] = {}
+        self.min_load = 0
+
+    def add(self, user_id: str, load: int):
+        self.load[user_id] = load
+        self.buckets.setdefault(load, {})[user_id] = None
+        if len(self.load) == 1 or load < self.min_load:
+            self.min_load = load
+
+    def move(self, user_id: str, delta: int):
+        old = self.load.get(user_id)
+        if old is None:
+            return
+        new = max(old + delta, 0)
+        if new == old:
+            return
+        bucket = self.buckets[old]
+        del bucket[user_id]
+        if not bucket:
+            del self.buckets[old]
+        self.load[user_id] = new
+        self.buckets.setdefault(new, {})[user_id] = None
+
+        # Loads only move by one step, so the minimum moves by at most one too
+        if new < self.min_load:
+            self.min_load = new
+        elif old == self.min_load and old not in self.buckets:
+            self.min_load = new
+
+    def pick(self) -> Optional[str]:
+        bucket = self.buckets.get(self.min_load)
+        if not bucket:
+            return None
+        return next(iter(bucket))
+
+
+class WorkflowAssignmentService:
+    """Per-process assignment index shared by all WorkflowStateMachine instances"""
+
+    def __init__(self):
+        self._members: Dict[str, List[str]] = {}  # role name -> active user ids
+        self._cursor: Dict[str, int] = {}  # role name -> next round-robin position
+        self._buckets: Dict[str, _RoleLoadBuckets] = {}
+        self._user_roles: Dict[str, List[str]] = {}  # user id -> role names
+        self._built_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Force a rebuild on next use (call after role membership changes)"""
+        with self._lock:
+            self._built_at = None
+
+    def _ensure_index(self):
+        ttl = int(current_app.config.get('WORKFLOW_ASSIGNMENT_INDEX_TTL_SECONDS', 300))
+        if self._built_at is not None and time.monotonic() - self._built_at < ttl:
+            return
+
+        members: Dict[str, List[str]] = {}
+        user_roles: Dict[str, List[str]] = {}
+        for role_name, user_id in db.session.query(Role.name, UserRole.user_id).join(
+            UserRole, UserRole.role_id == Role.id
+        ).join(User, User.id == UserRole.user_id).filter(
+            User.is_active == True, User.is_locked != True
+        ).order_by(Role.name, UserRole.user_id).all():
+            members.setdefault(role_name, []).append(user_id)
+            user_roles.setdefault(user_id, []).append(role_name)
+
+        # Open tasks = documents assigned to the user that are not in a final state
+        loads = dict(db.session.query(
+            DocumentWorkflowState.assigned_to, db.func.count(DocumentWorkflowState.id)
+        ).join(WorkflowState, WorkflowState.id == DocumentWorkflowState.current_state_id).filter(
+            DocumentWorkflowState.assigned_to.isnot(None),
+            db.or_(WorkflowState.is_final == False, WorkflowState.is_final.is_(None))
+        ).group_by(DocumentWorkflowState.assigned_to).all())
+
+        buckets = {}
+        for role_name, user_ids in members.items():
+            role_buckets = _RoleLoadBuckets()
+            for user_id in user_ids:
+                role_buckets.add(user_id, loads.get(user_id, 0))
+            buckets[role_name] = role_buckets
+
+        with self._lock:
+            self._members = members
+            self._user_roles = user_roles
+            self._buckets = buckets
+            self._cursor = {role: self._cursor.get(role, 0) for role in members}
+            self._built_at = time.monotonic()
+
+    def assign(self, role: str, strategy: str = None) -> Optional[str]:
+        """Pick an assignee for `role` and count the new open task against them"""
+        self._ensure_index()
+        strategy = strategy or current_app.config.get('WORKFLOW_ASSIGNMENT_STRATEGY', 'least_loaded')
+
+        with self._lock:
+            members = self._members.get(role)
+            if not members:
+                return None
+            if strategy == 'round_robin':
+                position = self._cursor.get(role, 0) % len(members)
+                user_id = members[position]
+                self._cursor[role] = position + 1
+            else:
+                user_id = self._buckets[role].pick()
+            self._adjust_load(user_id, 1)
+        return user_id
+
+    def release(self, user_id: Optional[str]):
+        """Record that one of the user's open tasks was closed or reassigned"""
+        if not user_id or self._built_at is None:
+            return
+        with self._lock:
+            self._adjust_load(user_id, -1)
+
+    def get_loads(self, role: str) -> Dict[str, int]:
+        self._ensure_index()
+        with self._lock:
+            buckets = self._buckets.get(role)
+            return dict(buckets.load) if buckets else {}
+
+    def _adjust_load(self, user_id: str, delta: int):
+        for role_name in self._user_roles.get(user_id, []):
+            self._buckets[role_name].move(user_id, delta)
+
+
+workflow_assignment = WorkflowAssignmentService()
@@ -0,0 +1,178 @@
+"""Workflow audit chain verification with Merkle checkpoints
+
+Every WorkflowAuditLog row written by the state machine carries a per-document
+sequence number and the previous entry's hash. Verified ranges of the chain are
+sealed into WorkflowAuditCheckpoint rows (Merkle root + head hash), so routine
+verification only re-hashes entries written since the latest checkpoint.
+"""
+
+import hashlib
+import itertools
+from typing import Dict, List
+
+from flask import current_app
+from app import db
+from app.models.workflow import WorkflowAuditLog, WorkflowAuditCheckpoint
+from app.services.audit_archive_service import AuditArchiveService
+
+
+class WorkflowAuditService:
+    """Hash-chain verification and checkpointing for workflow audit trails"""
+
+    @staticmethod
+    def merkle_root(hashes: List[str]) -> str:
+        """Merkle root of hex SHA-256 leaves (odd nodes are paired with themselves)"""
+        if not hashes:
+            return hashlib.sha256(b'').hexdigest()
+        level = list(hashes)
+        while len(level) > 1:
+            if len(level) % 2:
+                level.append(level[-1])
+            level = [
+                hashlib.sha256(f'{level[i]}{level[i + 1]}'.encode()).hexdigest()
+                for i in range(0, len(level), 2)
+            ]
+        return level[0]
+
+    @staticmethod
+    def verify_audit_trail(document_id: str, full: bool = False, user_id: str = None) -> Dict:
+        """Verify a document's audit chain
+
+        Incremental by default: anchors on the latest checkpoint and re-hashes
+        only newer entries. With full=True the chain is verified from the first
+        entry and every existing checkpoint is re-checked. Newly verified
+        entries are sealed into checkpoints every WORKFLOW_AUDIT_CHECKPOINT_INTERVAL
+        entries and at the end of the run.
+        """
+        interval = int(current_app.config.get('WORKFLOW_AUDIT_CHECKPOINT_INTERVAL', 500))
+
+        start_sequence = 0
+        head_hash = None
+        previous_checkpoint_hash = None
+
+        if not full:
+            latest = WorkflowAuditCheckpoint.query.filter_by(document_id=document_id).order_by(
+                WorkflowAuditCheckpoint.sequence.desc()
+            ).first()
+            if latest:
+                if latest.checkpoint_hash != latest.calculate_hash():
+                    return WorkflowAuditService._failure(document_id, latest.sequence, 'Checkpoint hash mismatch')
+                anchor_hash = db.session.query(WorkflowAuditLog.data_hash).filter_by(
+                    document_id=document_id, sequence=latest.sequence
+                ).scalar()
+                if anchor_hash != latest.head_hash:
+                    return WorkflowAuditService._failure(document_id, latest.sequence, 'Checkpoint anchor entry altered')
+                start_sequence = latest.sequence
+                head_hash = latest.head_hash
+                previous_checkpoint_hash = latest.checkpoint_hash
+
+        existing_checkpoints = {
+            cp.sequence: cp for cp in WorkflowAuditCheckpoint.query.filter(
+                WorkflowAuditCheckpoint.document_id == document_id,
+                WorkflowAuditCheckpoint.sequence > start_sequence
+            ).all()
+        }
+
+        entries = WorkflowAuditLog.query.filter(
+            WorkflowAuditLog.document_id == document_id,
+            WorkflowAuditLog.sequence.isnot(None),
+            WorkflowAuditLog.sequence > start_sequence
+        ).order_by(WorkflowAuditLog.sequence).yield_per(500)
+        if full:
+            # Entries below the latest checkpoint may have moved to the audit archive
+            archived = sorted(
+                (log for log in AuditArchiveService.get_archived_models('workflow_audit_logs', (document_id,))
+                 if log.sequence is not None),
+                key=lambda log: log.sequence
+            )
+            if archived:
+                entries = itertools.chain(archived, entries)
+
+        expected_sequence = start_sequence + 1
+        segment_start = expected_sequence
+        segment_hashes = []
+        new_checkpoints = []
+        verified = 0
+
+        for entry in entries:
+            if entry.sequence != expected_sequence:
+                return WorkflowAuditService._failure(
+                    document_id, expected_sequence, f'Missing audit entry (found {entry.sequence})'
+                )
+            if (entry.previous_hash or None) != head_hash:
+                return WorkflowAuditService._failure(document_id, entry.sequence, 'Chain integrity broken')
+            if not entry.verify_integrity():
+                return WorkflowAuditService._failure(document_id, entry.sequence, 'Integrity check failed')
+
+            head_hash = entry.data_hash
+            segment_hashes.append(head_hash)
+            verified += 1
+
+            existing = existing_checkpoints.get(entry.sequence)
+            if existing is not None:
+                if (existing.from_sequence != segment_start
+                        or existing.head_hash != head_hash
+                        or existing.merkle_root != WorkflowAuditService.merkle_root(segment_hashes)
+                        or (existing.previous_checkpoint_hash or None) != previous_checkpoint_hash
+                        or existing.checkpoint_hash != existing.calculate_hash()):
+                    return WorkflowAuditService._failure(document_id, entry.sequence, 'Checkpoint does not match chain')
+                previous_checkpoint_hash = existing.checkpoint_hash
+                segment_start = entry.sequence + 1
+                segment_hashes = []
+            elif len(segment_hashes) >= interval:
+                checkpoint = WorkflowAuditService._seal(
+                    document_id, segment_start, entry.sequence, head_hash, segment_hashes,
+                    previous_checkpoint_hash, user_id
+                )
+                new_checkpoints.append(checkpoint)
+                previous_checkpoint_hash = checkpoint.checkpoint_hash
+                segment_start = entry.sequence + 1
+                segment_hashes = []
+
+            expected_sequence += 1
+
+        if segment_hashes:
+            new_checkpoints.append(WorkflowAuditService._seal(
+                document_id, segment_start, expected_sequence - 1, head_hash, segment_hashes,
+                previous_checkpoint_hash, user_id
+            ))
+
+        if new_checkpoints:
+            db.session.add_all(new_checkpoints)
+            db.session.commit()
+
+        return {
+            'valid': True,
+            'document_id': document_id,
+            'mode': 'full' if full else 'incremental',
+            'verified_entries': verified,
+            'from_sequence': start_sequence + 1 if verified else None,
+            'to_sequence': expected_sequence - 1,
+            'checkpoints_created': len(new_checkpoints),
+            'message': 'All logs verified'
+        }
+
+    @staticmethod
+    def _seal(document_id: str, from_sequence: int, sequence: int, head_hash: str, hashes: List[str],
+              previous_checkpoint_hash: str, user_id: str) -> WorkflowAuditCheckpoint:
+        checkpoint = WorkflowAuditCheckpoint(
+            document_id=document_id,
+            from_sequence=from_sequence,
+            sequence=sequence,
+            head_hash=head_hash,
+            merkle_root=WorkflowAuditService.merkle_root(hashes),
+            entry_count=len(hashes),
+            previous_checkpoint_hash=previous_checkpoint_hash,
+            verified_by=user_id
+        )
+        checkpoint.checkpoint_hash = checkpoint.calculate_hash()
+        return checkpoint
+
+    @staticmethod
+    def _failure(document_id: str, sequence: int, message: str) -> Dict:
+        return {
+            'valid': False,
+            'document_id': document_id,
+            'sequence': sequence,
+            'message': f'{message} at entry {sequence}'
+        }
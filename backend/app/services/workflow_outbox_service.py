@@ -0,0 +1,225 @@
+"""Asynchronous executor for workflow actions (transactional outbox)
+
+WorkflowStateMachine writes send_notification / create_task actions to
+workflow_outbox in the same commit as the state change. This worker polls the
+table, claims batches with SELECT ... FOR UPDATE SKIP LOCKED (so several
+worker processes can run side by side), executes them on a thread pool and
+retries failures with exponential backoff.
+"""
+
+import hashlib
+import logging
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List
+
+from app import db
+from app.models.workflow import WorkflowOutboxEntry
+
+logger = logging.getLogger(__name__)
+
+# Action types executed off the request path; the rest run inside the transition
+ASYNC_ACTION_TYPES = {'send_notification', 'create_task'}
+
+_action_handlers: Dict[str, Callable[[Dict], None]] = {}
+
+
+def register_action_handler(action_type: str, handler: Callable[[Dict], None]):
+    """Register the callable that performs an outbox action
+
+    Handlers receive {'id', 'document_id', 'action_type', 'parameters',
+    'idempotency_key', 'attempt'} and must be safe to call more than once for
+    the same idempotency_key.
+    """
+    _action_handlers[action_type] = handler
+
+
+def build_idempotency_key(document_id: str, transition_id: str, action_id: str, entered_at: datetime) -> str:
+    data = f'{document_id}:{transition_id}:{action_id}:{entered_at.isoformat()}'
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def enqueue_action(document_id: str, transition_id: str, action: Dict, entered_at: datetime) -> WorkflowOutboxEntry:
+    """Add an outbox row to the current session (committed with the caller's transaction)"""
+    entry = WorkflowOutboxEntry(
+        document_id=document_id,
+        transition_id=transition_id,
+        action_id=action['id'],
+        action_type=action['action_type'],
+        parameters=action['parameters'],
+        idempotency_key=build_idempotency_key(document_id, transition_id, action['id'], entered_at),
+        available_at=datetime.utcnow()
+    )
+    db.session.add(entry)
+    return entry
+
+
+def _send_notification(entry: Dict):
+    """Send notification to assigned users"""
+    pass
+
+
+def _create_task(entry: Dict):
+    """Create task in user inbox"""
+    pass
+
+
+register_action_handler('send_notification', _send_notification)
+register_action_handler('create_task', _create_task)
+
+
+class WorkflowOutboxWorker:
+    """DB-polling worker pool that drains workflow_outbox"""
+
+    def __init__(self, app, threads: int = None, batch_size: int = None):
+        self.app = app
+        config = app.config
+        self.threads = threads or int(config.get('OUTBOX_WORKER_THREADS', 4))
+        self.batch_size = batch_size or int(config.get('OUTBOX_BATCH_SIZE', 50))
+        self.poll_seconds = float(config.get('OUTBOX_POLL_SECONDS', 2))
+        self.max_attempts = int(config.get('OUTBOX_MAX_ATTEMPTS', 5))
+        self.lease_seconds = int(config.get('OUTBOX_LEASE_SECONDS', 300))
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}'
+        self._stop = threading.Event()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_forever(self):
+        logger.info(f'Workflow outbox worker {self.worker_id} started ({self.threads} threads)')
+        with ThreadPoolExecutor(max_workers=self.threads) as pool:
+            while not self._stop.is_set():
+                processed = self.run_once(pool)
+                if processed < self.batch_size:
+                    self._stop.wait(self.poll_seconds)
+
+    def run_once(self, pool: ThreadPoolExecutor = None) -> int:
+        """Claim one batch and execute it; returns the number of entries processed"""
+        with self.app.app_context():
+            try:
+                entries = self._claim_batch()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f'Outbox claim failed: {str(e)}')
+                return 0
+            finally:
+                db.session.remove()
+
+        if not entries:
+            return 0
+        if pool is None:
+            for entry in entries:
+                self._process(entry)
+        else:
+            list(pool.map(self._process, entries))
+        return len(entries)
+
+    def _claim_batch(self) -> List[Dict]:
+        now = datetime.utcnow()
+        lease_expired = now - timedelta(seconds=self.lease_seconds)
+        rows = WorkflowOutboxEntry.query.filter(
+            db.or_(
+                db.and_(WorkflowOutboxEntry.status == 'pending',
+                        WorkflowOutboxEntry.available_at <= now),
+                # Reclaim entries from workers that died mid-flight
+                db.and_(WorkflowOutboxEntry.status == 'processing',
+                        WorkflowOutboxEntry.locked_at <= lease_expired)
+            )
+        ).order_by(WorkflowOutboxEntry.available_at).limit(
+            self.batch_size
+        ).with_for_update(skip_locked=True).all()
+
+        claimed = []
+        for row in rows:
+            row.status = 'processing'
+            row.locked_by = self.worker_id
+            row.locked_at = now
+            row.attempts = (row.attempts or 0) + 1
+            claimed.append({
+                'id': row.id,
+                'document_id': row.document_id,
+                'action_type': row.action_type,
+                'parameters': row.parameters,
+                'idempotency_key': row.idempotency_key,
+                'attempt': row.attempts
+            })
+        db.session.commit()
+        return claimed
+
+    def _process(self, entry: Dict):
+        with self.app.app_context():
+            error = None
+            handler = _action_handlers.get(entry['action_type'])
+            try:
+                if handler is None:
+                    raise ValueError(f"No handler for action type {entry['action_type']}")
+                handler(entry)
+            except Exception as e:
+                error = str(e)
+                logger.warning(f"Outbox entry {entry['id']} attempt {entry['attempt']} failed: {error}")
+
+            try:
+                self._finish(entry, error)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not record outbox result for {entry['id']}: {str(e)}")
+            finally:
+                db.session.remove()
+
+    def _finish(self, entry: Dict, error: str = None):
+        now = datetime.utcnow()
+        values = {WorkflowOutboxEntry.locked_by: None, WorkflowOutboxEntry.locked_at: None}
+        if error is None:
+            values.update({
+                WorkflowOutboxEntry.status: 'done',
+                WorkflowOutboxEntry.processed_at: now,
+                WorkflowOutboxEntry.last_error: None
+            })
+        elif entry['attempt'] >= self.max_attempts:
+            values.update({
+                WorkflowOutboxEntry.status: 'failed',
+                WorkflowOutboxEntry.processed_at: now,
+                WorkflowOutboxEntry.last_error: error
+            })
+        else:
+            backoff = timedelta(seconds=min(2 ** entry['attempt'], 3600))
+            values.update({
+                WorkflowOutboxEntry.status: 'pending',
+                WorkflowOutboxEntry.available_at: now + backoff,
+                WorkflowOutboxEntry.last_error: error
+            })
+
+        # Only the worker holding the lease may record the outcome
+        WorkflowOutboxEntry.query.filter_by(
+            id=entry['id'], locked_by=self.worker_id, status='processing'
+        ).update(values, synchronize_session=False)
+        db.session.commit()
+
+
+class WorkflowOutboxService:
+    """Operational queries over the workflow outbox"""
+
+    @staticmethod
+    def get_stats() -> Dict:
+        counts = dict(db.session.query(
+            WorkflowOutboxEntry.status, db.func.count(WorkflowOutboxEntry.id)
+        ).group_by(WorkflowOutboxEntry.status).all())
+        return {status: counts.get(status, 0) for status in ('pending', 'processing', 'done', 'failed')}
+
+    @staticmethod
+    def retry_failed(entry_ids: List[str] = None) -> int:
+        """Put failed entries back in the queue"""
+        query = WorkflowOutboxEntry.query.filter_by(status='failed')
+        if entry_ids:
+            query = query.filter(WorkflowOutboxEntry.id.in_(entry_ids))
+        updated = query.update({
+            WorkflowOutboxEntry.status: 'pending',
+            WorkflowOutboxEntry.attempts: 0,
+            WorkflowOutboxEntry.available_at: datetime.utcnow(),
+            WorkflowOutboxEntry.processed_at: None
+        }, synchronize_session=False)
+        db.session.commit()
+        return updated
@@ -11,19 +11,154 @@ Robust FSM for pharma validation with:
 """
 
 from datetime import datetime, timedelta
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.workflow import (
     WorkflowTemplate, WorkflowState, WorkflowTransition, WorkflowRule,
-    WorkflowAction, DocumentWorkflowState, WorkflowAuditLog, DynamicFormConfig
+    WorkflowAction, DocumentWorkflowState, WorkflowAuditLog, DynamicFormConfig, WorkflowApproval
 )
 from app.models.user import User
 from app.models.audit import AuditLog
+from app.services.audit_archive_service import AuditArchiveService
+from app.services.audit_pipeline_service import audit_pipeline
+from app.services.deviation_index_service import DeviationIndexService
+from app.services.workflow_outbox_service import ASYNC_ACTION_TYPES, enqueue_action
+from app.services.workflow_assignment_service import workflow_assignment
+import base64
 import hashlib
+import itertools
 import json
+import threading
 from typing import List, Dict, Tuple, Optional
 from functools import wraps
 
 
+# Cheap, user-only checks run before checks that depend on document state
+RULE_EVALUATION_ORDER = {
+    'role_required': 0,
+    'condition_check': 1,
+    'parallel_approval': 2,
+    'no_deviations': 3,
+}
+
+
+class CompiledWorkflowGraph:
+    """Read-only snapshot of a workflow template used for transition checks
+    
+    Holds plain dicts rather than ORM instances so the graph can be shared
+    across requests and sessions without lazy loads or detached-instance errors.
+    """
+    
+    def __init__(self, template_id: str, version: int, states: Dict[str, Dict],
+                 transitions: Dict[Tuple[str, str], Dict]):
+        self.template_id = template_id
+        self.version = version
+        self.states = states
+        self.transitions = transitions
+        self.outgoing: Dict[str, List[Dict]] = {}
+        for transition in transitions.values():
+            self.outgoing.setdefault(transition['from_state_id'], []).append(transition)
+    
+    @classmethod
+    def compile(cls, template: WorkflowTemplate) -> 'CompiledWorkflowGraph':
+        """Load states, transitions, rules and actions for a template (4 queries)"""
+        states = {
+            state.id: {
+                'id': state.id,
+                'name': state.name,
+                'order': state.order,
+                'is_initial': state.is_initial,
+                'is_final': state.is_final,
+                'requires_signature': state.requires_signature,
+                'sla_hours': state.sla_hours
+            }
+            for state in WorkflowState.query.filter_by(template_id=template.id).all()
+        }
+        
+        transitions = {}
+        transitions_by_id = {}
+        for t in WorkflowTransition.query.filter_by(template_id=template.id).all():
+            transition = {
+                'id': t.id,
+                'name': t.name,
+                'from_state_id': t.from_state_id,
+                'to_state_id': t.to_state_id,
+                'requires_comment': t.requires_comment,
+                'auto_assign_to_role': t.auto_assign_to_role,
+                'rules': [],
+                'actions': []
+            }
+            transitions[(t.from_state_id, t.to_state_id)] = transition
+            transitions_by_id[t.id] = transition
+        
+        rules = WorkflowRule.query.filter_by(template_id=template.id, is_blocking=True).all()
+        rules.sort(key=lambda r: (RULE_EVALUATION_ORDER.get(r.rule_type, len(RULE_EVALUATION_ORDER)),
+                                  r.created_at or datetime.min))
+        for rule in rules:
+            transition = transitions_by_id.get(rule.transition_id)
+            if transition is not None:
+                transition['rules'].append({
+                    'id': rule.id,
+                    'rule_type': rule.rule_type,
+                    'required_role': rule.required_role,
+                    'requires_signatures': rule.requires_signatures,
+                    'signature_roles': rule.signature_roles,
+                    'condition_field': rule.condition_field,
+                    'condition_operator': rule.condition_operator,
+                    'condition_value': rule.condition_value
+                })
+        
+        if transitions_by_id:
+            actions = WorkflowAction.query.filter(
+                WorkflowAction.transition_id.in_(list(transitions_by_id.keys()))
+            ).order_by(WorkflowAction.order).all()
+            for action in actions:
+                transitions_by_id[action.transition_id]['actions'].append({
+                    'id': action.id,
+                    'action_type': action.action_type,
+                    'parameters': action.parameters,
+                    'order': action.order
+                })
+        
+        return cls(template.id, template.graph_version, states, transitions)
+    
+    def get_transition(self, from_state_id: str, to_state_id: str) -> Optional[Dict]:
+        return self.transitions.get((from_state_id, to_state_id))
+
+
+class WorkflowGraphCache:
+    """Per-process cache of compiled workflow graphs keyed by template id
+    
+    Entries are validated against WorkflowTemplate.graph_version, so a change
+    made by another worker process is picked up on the next template load.
+    """
+    
+    _graphs: Dict[str, CompiledWorkflowGraph] = {}
+    _lock = threading.Lock()
+    
+    @classmethod
+    def get(cls, template: WorkflowTemplate) -> CompiledWorkflowGraph:
+        graph = cls._graphs.get(template.id)
+        if graph is not None and graph.version == template.graph_version:
+            return graph
+        
+        graph = CompiledWorkflowGraph.compile(template)
+        with cls._lock:
+            cached = cls._graphs.get(template.id)
+            if cached is None or cached.version <= graph.version:
+                cls._graphs[template.id] = graph
+        return graph
+    
+    @classmethod
+    def invalidate(cls, template_id: str = None):
+        """Drop one compiled template, or every template when no id is given"""
+        with cls._lock:
+            if template_id is None:
+                cls._graphs.clear()
+            else:
+                cls._graphs.pop(template_id, None)
+
+
 class WorkflowStateMachine:
     """Enterprise State Machine for Pharma Validation Workflows"""
     
@@ -31,6 +166,7 @@ class WorkflowStateMachine:
         self.template = WorkflowTemplate.query.get(template_id)
         if not self.template:
             raise ValueError(f'Workflow template {template_id} not found')
+        self.graph = WorkflowGraphCache.get(self.template)
     
     # =========================================================================
     # STATE TRANSITION VALIDATION
@@ -38,10 +174,7 @@ class WorkflowStateMachine:
     
     def get_valid_transitions(self, current_state_id: str) -> List[Dict]:
         """Get all possible transitions from current state"""
-        transitions = WorkflowTransition.query.filter_by(
-            template_id=self.template.id,
-            from_state_id=current_state_id
-        ).all()
+        transitions = self.graph.outgoing.get(current_state_id, [])
         return [self._serialize_transition(t) for t in transitions]
     
     def can_transition(self, document_id: str, to_state_id: str, user: User) -> Tuple[bool, str]:
@@ -50,44 +183,45 @@ class WorkflowStateMachine:
         if not doc_state:
             return False, 'Document not in workflow'
         
+        can_proceed, message, _ = self._check_transition(doc_state, to_state_id, user)
+        return can_proceed, message
+    
+    def _check_transition(self, doc_state: DocumentWorkflowState, to_state_id: str,
+                          user: User) -> Tuple[bool, str, Optional[Dict]]:
+        """Validate a transition against the compiled graph (no queries)"""
         # Verify valid transition path
-        transition = WorkflowTransition.query.filter_by(
-            template_id=self.template.id,
-            from_state_id=doc_state.current_state_id,
-            to_state_id=to_state_id
-        ).first()
-        
+        transition = self.graph.get_transition(doc_state.current_state_id, to_state_id)
         if not transition:
-            return False, 'Invalid transition'
-        
-        # Validate all blocking rules
-        rules = WorkflowRule.query.filter_by(
-            transition_id=transition.id,
-            is_blocking=True
-        ).all()
+            return False, 'Invalid transition', None
         
-        for rule in rules:
-            can_proceed, message = self._validate_rule(rule, user, doc_state)
+        # Validate all blocking rules; a rule that cannot be evaluated blocks rather than erroring
+        for rule in transition['rules']:
+            try:
+                can_proceed, message = self._validate_rule(rule, user, doc_state)
+            except Exception as e:
+                can_proceed, message = False, f"Rule {rule['rule_type']} could not be evaluated: {str(e)}"
             if not can_proceed:
-                return False, message
+                return False, message, transition
         
-        return True, 'Transition allowed'
+        return True, 'Transition allowed', transition
     
-    def _validate_rule(self, rule: WorkflowRule, user: User, doc_state: DocumentWorkflowState) -> Tuple[bool, str]:
+    def _validate_rule(self, rule: Dict, user: User, doc_state: DocumentWorkflowState) -> Tuple[bool, str]:
         """Validate individual workflow rule"""
-        if rule.rule_type == 'role_required':
-            if user.role != rule.required_role:
-                return False, f'Only {rule.required_role} can perform this action'
+        if rule['rule_type'] == 'role_required':
+            if rule['required_role'] not in user.role_names:
+                return False, f"Only {rule['required_role']} can perform this action"
         
-        elif rule.rule_type == 'parallel_approval':
+        elif rule['rule_type'] == 'parallel_approval':
             # Check if parallel approvals are complete
-            if doc_state.completed_approvals < rule.requires_signatures:
-                return False, f'Requires {rule.requires_signatures} approvals ({doc_state.completed_approvals} completed)'
+            completed, required = doc_state.completed_approvals or 0, rule['requires_signatures'] or 0
+            if completed < required:
+                return False, f'Requires {required} approvals ({completed} completed)'
         
-        elif rule.rule_type == 'no_deviations':
-            # Block if document has open deviations
-            # Implementation: check related deviation records
-            pass
+        elif rule['rule_type'] == 'no_deviations':
+            # condition_value names the validation project whose open deviations block the transition.
+            # Documents carry no project key, so a rule without one stays a no-op as it always was.
+            if rule['condition_value'] and DeviationIndexService.has_open(rule['condition_value']):
+                return False, 'Open deviations must be resolved first'
         
         return True, ''
     
@@ -98,75 +232,161 @@ class WorkflowStateMachine:
     def execute_transition(self, document_id: str, to_state_id: str, user: User, 
                           reason: str = '', ip_address: str = '', user_agent: str = '') -> Dict:
         """Execute state transition with validation, actions, and audit trail"""
-        can_proceed, message = self.can_transition(document_id, to_state_id, user)
+        doc_state = DocumentWorkflowState.query.filter_by(document_id=document_id).first()
+        if not doc_state:
+            return {'success': False, 'error': 'Document not in workflow'}
+        
+        can_proceed, message, transition = self._check_transition(doc_state, to_state_id, user)
         if not can_proceed:
             return {'success': False, 'error': message}
         
         try:
-            doc_state = DocumentWorkflowState.query.filter_by(document_id=document_id).first()
-            from_state = doc_state.current_state
-            to_state = WorkflowState.query.get(to_state_id)
-            
-            # Get transition and execute pre-transition actions
-            transition = WorkflowTransition.query.filter_by(
-                from_state_id=from_state.id,
-                to_state_id=to_state_id
-            ).first()
-            
-            # Execute automated actions
-            self._execute_actions(transition, document_id, to_state_id)
-            
-            # Update document state
-            doc_state.previous_state_id = doc_state.current_state_id
-            doc_state.current_state_id = to_state_id
-            doc_state.moved_by = user.id
-            doc_state.transition_reason = reason
-            doc_state.entered_at = datetime.utcnow()
-            
-            # Calculate SLA deadline
-            if to_state.sla_hours:
-                doc_state.sla_deadline = datetime.utcnow() + timedelta(hours=to_state.sla_hours)
-            
-            # Auto-assign if configured
-            if transition.auto_assign_to_role:
-                assigned_user = self._find_user_by_role(transition.auto_assign_to_role)
-                if assigned_user:
-                    doc_state.assigned_to = assigned_user.id
+            from_state, to_state = self._apply_transition(doc_state, transition, user, reason)
             
             # Create audit log with integrity
             audit_entry = self._create_audit_log(
-                document_id, from_state.name, to_state.name, user.id, reason,
+                doc_state, from_state['name'], to_state['name'], user.id, reason,
                 ip_address, user_agent
             )
             
-            db.session.add(audit_entry)
+            audit_pipeline.stage(audit_entry)
             db.session.commit()
             
             return {
                 'success': True,
-                'message': f'Moved to {to_state.name}',
-                'state_id': to_state_id,
+                'message': f"Moved to {to_state['name']}",
+                'state_id': to_state['id'],
                 'timestamp': datetime.utcnow().isoformat()
             }
         except Exception as e:
             db.session.rollback()
             return {'success': False, 'error': str(e)}
     
-    def _execute_actions(self, transition: WorkflowTransition, document_id: str, state_id: str):
-        """Execute automated actions on transition"""
-        actions = WorkflowAction.query.filter_by(
-            transition_id=transition.id
-        ).order_by(WorkflowAction.order).all()
-        
-        for action in actions:
-            if action.action_type == 'lock_fields':
-                self._lock_fields(document_id, action.parameters)
-            elif action.action_type == 'unlock_fields':
-                self._unlock_fields(document_id, action.parameters)
-            elif action.action_type == 'send_notification':
-                self._send_notification(document_id, action.parameters)
-            elif action.action_type == 'create_task':
-                self._create_task(document_id, action.parameters)
+    def execute_transitions_bulk(self, transitions: List[Dict], user: User, reason: str = '',
+                                 ip_address: str = '', user_agent: str = '') -> Dict:
+        """Execute many transitions with one state load, one audit insert and one commit
+        
+        Each item is {'document_id', 'to_state_id', optional 'reason'}. Items that
+        fail validation or actions are reported individually and do not abort
+        the rest of the batch.
+        """
+        document_ids = list({item.get('document_id') for item in transitions if item.get('document_id')})
+        doc_states = {}
+        if document_ids:
+            for doc_state in DocumentWorkflowState.query.filter(
+                DocumentWorkflowState.document_id.in_(document_ids)
+            ).all():
+                doc_states.setdefault(doc_state.document_id, doc_state)
+        
+        results = []
+        audit_rows = []
+        for item in transitions:
+            document_id = item.get('document_id')
+            to_state_id = item.get('to_state_id')
+            item_reason = item.get('reason') or reason
+            
+            doc_state = doc_states.get(document_id)
+            if not doc_state:
+                results.append({'document_id': document_id, 'success': False, 'error': 'Document not in workflow'})
+                continue
+            if doc_state.current_state_id not in self.graph.states:
+                results.append({'document_id': document_id, 'success': False, 'error': 'Document not in this workflow'})
+                continue
+            
+            can_proceed, message, transition = self._check_transition(doc_state, to_state_id, user)
+            if not can_proceed:
+                results.append({'document_id': document_id, 'success': False, 'error': message})
+                continue
+            
+            try:
+                # One savepoint per item: a failing action rolls back that item's state change and
+                # queued side effects instead of leaving them to be committed with the batch unaudited
+                with db.session.begin_nested():
+                    from_state, to_state = self._apply_transition(doc_state, transition, user, item_reason)
+                    audit_row = self._build_audit_entry(
+                        doc_state, from_state['name'], to_state['name'], user.id, item_reason,
+                        ip_address, user_agent, transition_type='bulk'
+                    )
+            except Exception as e:
+                results.append({'document_id': document_id, 'success': False, 'error': str(e)})
+                continue
+            
+            audit_rows.append(audit_row)
+            results.append({
+                'document_id': document_id,
+                'success': True,
+                'message': f"Moved to {to_state['name']}",
+                'state_id': to_state['id']
+            })
+        
+        if audit_rows:
+            try:
+                audit_pipeline.stage_mappings(WorkflowAuditLog, audit_rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                for result in results:
+                    if result['success']:
+                        result.update({'success': False, 'error': str(e)})
+                        result.pop('message', None)
+                        result.pop('state_id', None)
+        
+        succeeded = sum(1 for result in results if result['success'])
+        return {
+            'success': succeeded > 0,
+            'succeeded': succeeded,
+            'failed': len(results) - succeeded,
+            'results': results,
+            'timestamp': datetime.utcnow().isoformat()
+        }
+    
+    def _apply_transition(self, doc_state: DocumentWorkflowState, transition: Dict, user: User,
+                          reason: str) -> Tuple[Dict, Dict]:
+        """Run actions and move the document to the transition's target state (no commit)"""
+        from_state = self.graph.states[doc_state.current_state_id]
+        to_state = self.graph.states[transition['to_state_id']]
+        
+        # Update document state
+        doc_state.previous_state_id = doc_state.current_state_id
+        doc_state.current_state_id = to_state['id']
+        doc_state.moved_by = user.id
+        doc_state.transition_reason = reason
+        doc_state.entered_at = datetime.utcnow()
+        
+        # Execute automated actions (side effects are queued in the same transaction)
+        self._execute_actions(transition, doc_state.document_id, to_state['id'], doc_state.entered_at)
+        
+        # Calculate SLA deadline (cleared when the new state has no SLA)
+        doc_state.sla_deadline = (
+            datetime.utcnow() + timedelta(hours=to_state['sla_hours']) if to_state['sla_hours'] else None
+        )
+        doc_state.sla_escalated_at = None
+        
+        # Auto-assign if configured (the previous owner's open task is released)
+        previous_assignee = doc_state.assigned_to
+        if transition['auto_assign_to_role']:
+            assigned_user_id = self._find_user_by_role(transition['auto_assign_to_role'])
+            if assigned_user_id:
+                doc_state.assigned_to = assigned_user_id
+                workflow_assignment.release(previous_assignee)
+        elif to_state['is_final']:
+            workflow_assignment.release(previous_assignee)
+        
+        return from_state, to_state
+    
+    def _execute_actions(self, transition: Dict, document_id: str, state_id: str, entered_at: datetime):
+        """Execute automated actions on transition (pre-sorted by order)
+        
+        Field locks run inline; notifications and tasks go to the transactional
+        outbox and are executed by the outbox worker after commit.
+        """
+        for action in transition['actions']:
+            if action['action_type'] in ASYNC_ACTION_TYPES:
+                enqueue_action(document_id, transition['id'], action, entered_at)
+            elif action['action_type'] == 'lock_fields':
+                self._lock_fields(document_id, action['parameters'])
+            elif action['action_type'] == 'unlock_fields':
+                self._unlock_fields(document_id, action['parameters'])
     
     def _lock_fields(self, document_id: str, fields: List[str]):
         """Lock fields from editing"""
@@ -176,94 +396,205 @@ class WorkflowStateMachine:
         """Unlock fields for editing"""
         pass
     
-    def _send_notification(self, document_id: str, params: Dict):
-        """Send notification to assigned users"""
-        pass
-    
-    def _create_task(self, document_id: str, params: Dict):
-        """Create task in user inbox"""
-        pass
-    
     # =========================================================================
     # PARALLEL APPROVAL SIGNATURES
     # =========================================================================
     
     def add_approval_signature(self, document_id: str, user: User, signature: str) -> Dict:
-        """Add approval signature (supports N signatures from M roles)"""
-        doc_state = DocumentWorkflowState.query.filter_by(document_id=document_id).first()
+        """Add approval signature (supports N signatures from M roles)
+        
+        Each signature is its own row in workflow_approvals (unique per user in
+        the document's current workflow state) and the counter is bumped with a conditional SQL UPDATE, so
+        concurrent signers neither overwrite each other nor overshoot the
+        required count.
+        """
+        doc_state = db.session.query(
+            DocumentWorkflowState.id, DocumentWorkflowState.current_state_id,
+            DocumentWorkflowState.required_approvals, DocumentWorkflowState.completed_approvals
+        ).filter_by(document_id=document_id).first()
         if not doc_state:
             return {'success': False, 'error': 'Document not in workflow'}
         
-        if doc_state.completed_approvals >= doc_state.required_approvals:
+        if (doc_state.completed_approvals or 0) >= (doc_state.required_approvals or 0):
             return {'success': False, 'error': 'All approvals already complete'}
         
-        # Add signature to approvals_data
-        if not doc_state.approvals_data:
-            doc_state.approvals_data = []
-        
-        approval = {
-            'user_id': user.id,
-            'role': user.role,
-            'timestamp': datetime.utcnow().isoformat(),
-            'signature': signature,
-            'signed_by': f'{user.first_name} {user.last_name}'
-        }
+        try:
+            db.session.add(WorkflowApproval(
+                document_id=document_id,
+                doc_state_id=doc_state.id,
+                state_id=doc_state.current_state_id,
+                user_id=user.id,
+                role=', '.join(user.role_names) or None,
+                signature=signature,
+                signed_by=f'{user.first_name} {user.last_name}'
+            ))
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            return {'success': False, 'error': 'User has already signed this document in its current state'}
         
-        doc_state.approvals_data.append(approval)
-        doc_state.completed_approvals += 1
+        updated = DocumentWorkflowState.query.filter(
+            DocumentWorkflowState.id == doc_state.id,
+            db.func.coalesce(DocumentWorkflowState.completed_approvals, 0) < DocumentWorkflowState.required_approvals
+        ).update(
+            {DocumentWorkflowState.completed_approvals: db.func.coalesce(DocumentWorkflowState.completed_approvals, 0) + 1},
+            synchronize_session=False
+        )
+        if not updated:
+            db.session.rollback()
+            return {'success': False, 'error': 'All approvals already complete'}
         
+        completed = db.session.query(DocumentWorkflowState.completed_approvals).filter_by(id=doc_state.id).scalar()
         db.session.commit()
         
         return {
             'success': True,
             'message': 'Approval signature recorded',
-            'completed': doc_state.completed_approvals,
+            'completed': completed,
             'required': doc_state.required_approvals
         }
     
+    def get_approvals(self, document_id: str) -> List[Dict]:
+        """Get recorded approval signatures in signing order"""
+        approvals = WorkflowApproval.query.filter_by(document_id=document_id).order_by(
+            WorkflowApproval.signed_at, WorkflowApproval.id
+        ).all()
+        return [{
+            'user_id': a.user_id,
+            'role': a.role,
+            'timestamp': a.signed_at.isoformat(),
+            'signature': a.signature,
+            'signed_by': a.signed_by
+        } for a in approvals]
+    
     # =========================================================================
     # AUDIT TRAIL & INTEGRITY
     # =========================================================================
     
-    def _create_audit_log(self, document_id: str, from_state: str, to_state: str,
+    def _create_audit_log(self, doc_state: DocumentWorkflowState, from_state: str, to_state: str,
                          user_id: str, reason: str, ip_address: str, user_agent: str) -> WorkflowAuditLog:
         """Create audit log with SHA-256 hash for integrity"""
-        data_to_hash = f'{document_id}{from_state}{to_state}{user_id}{datetime.utcnow()}'
-        data_hash = hashlib.sha256(data_to_hash.encode()).hexdigest()
-        
-        return WorkflowAuditLog(
-            document_id=document_id,
-            action='state_change',
-            from_state=from_state,
-            to_state=to_state,
-            performed_by=user_id,
-            transition_reason=reason,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            data_hash=data_hash,
-            details={
-                'transition_type': 'manual',
-                'completed_at': datetime.utcnow().isoformat()
+        return WorkflowAuditLog(**self._build_audit_entry(
+            doc_state, from_state, to_state, user_id, reason, ip_address, user_agent
+        ))
+    
+    def _build_audit_entry(self, doc_state: DocumentWorkflowState, from_state: str, to_state: str,
+                           user_id: str, reason: str, ip_address: str, user_agent: str,
+                           transition_type: str = 'manual') -> Dict:
+        """Build audit log column values chained to the document's previous entry
+        
+        The chain head lives on DocumentWorkflowState, so no lookup of the previous
+        log row is needed; the (document_id, sequence) unique constraint rejects a
+        concurrent writer that read the same head.
+        """
+        # Second precision so the hash survives DATETIME storage unchanged
+        timestamp = datetime.utcnow().replace(microsecond=0)
+        values = {
+            'document_id': doc_state.document_id,
+            'sequence': (doc_state.audit_sequence or 0) + 1,
+            'action': 'state_change',
+            'from_state': from_state,
+            'to_state': to_state,
+            'performed_by': user_id,
+            'transition_reason': reason,
+            'timestamp': timestamp,
+            'ip_address': ip_address,
+            'user_agent': user_agent,
+            'previous_hash': doc_state.audit_head_hash,
+            'details': {
+                'transition_type': transition_type,
+                'completed_at': timestamp.isoformat()
             }
-        )
+        }
+        values['data_hash'] = WorkflowAuditLog.compute_hash(values)
+        
+        doc_state.audit_sequence = values['sequence']
+        doc_state.audit_head_hash = values['data_hash']
+        return values
     
     def get_audit_trail(self, document_id: str) -> List[Dict]:
         """Get immutable audit trail for document"""
-        logs = WorkflowAuditLog.query.filter_by(document_id=document_id).order_by(
-            WorkflowAuditLog.timestamp.desc()
-        ).all()
-        return [self._serialize_audit_log(log) for log in logs]
+        return list(self.iter_audit_trail(document_id))
+    
+    def get_audit_trail_page(self, document_id: str, limit: int = 50, cursor: str = None) -> Dict:
+        """Get one page of the audit trail, newest first, using a (timestamp, id) keyset cursor"""
+        logs = list(itertools.islice(self._iter_audit_entries(document_id, cursor, limit=limit + 1), limit + 1))
+        
+        has_more = len(logs) > limit
+        logs = logs[:limit]
+        return {
+            'audit_trail': [self._serialize_audit_log(log) for log in logs],
+            'next_cursor': self.encode_audit_cursor(logs[-1]) if has_more else None
+        }
+    
+    def iter_audit_trail(self, document_id: str, cursor: str = None, batch_size: int = 500):
+        """Yield serialized audit entries newest first from a server-side cursor"""
+        for log in self._iter_audit_entries(document_id, cursor, batch_size=batch_size):
+            yield self._serialize_audit_log(log)
+    
+    def _iter_audit_entries(self, document_id: str, cursor: str = None, limit: int = None, batch_size: int = 500):
+        """Hot entries newest first by (timestamp, id), then archived ones
+        
+        Archived months are older than every hot entry, so the archive is only
+        read once the hot rows (after the cursor) run out, a month at a time.
+        """
+        query = self._audit_trail_query(document_id, cursor)
+        if limit is not None:
+            hot = query.limit(limit).all()
+        else:
+            # yield_per streams from a server-side cursor (stream_results) in fixed batches
+            hot = query.yield_per(batch_size)
+        
+        last = None
+        for log in hot:
+            last = log
+            yield log
+        if limit is not None and last is not None and len(hot) >= limit:
+            return
+        
+        if last is not None:
+            position = (last.timestamp, last.id)
+        else:
+            position = self.decode_audit_cursor(cursor) if cursor else None
+        yield from AuditArchiveService.iter_archived_models(
+            'workflow_audit_logs', (document_id,), newest_first=True, before=position
+        )
+    
+    def _audit_trail_query(self, document_id: str, cursor: str = None):
+        query = WorkflowAuditLog.query.filter(WorkflowAuditLog.document_id == document_id)
+        if cursor:
+            timestamp, log_id = self.decode_audit_cursor(cursor)
+            query = query.filter(db.or_(
+                WorkflowAuditLog.timestamp < timestamp,
+                db.and_(WorkflowAuditLog.timestamp == timestamp, WorkflowAuditLog.id < log_id)
+            ))
+        return query.order_by(WorkflowAuditLog.timestamp.desc(), WorkflowAuditLog.id.desc())
+    
+    @staticmethod
+    def encode_audit_cursor(log: WorkflowAuditLog) -> str:
+        raw = f'{log.timestamp.isoformat()}|{log.id}'
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+    
+    @staticmethod
+    def decode_audit_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Decode a cursor from encode_audit_cursor; raises ValueError if malformed"""
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+            timestamp, log_id = raw.split('|', 1)
+            return datetime.fromisoformat(timestamp), log_id
+        except Exception:
+            raise ValueError('Invalid audit trail cursor')
     
     # =========================================================================
     # HELPER METHODS
     # =========================================================================
     
-    def _serialize_transition(self, transition: WorkflowTransition) -> Dict:
+    def _serialize_transition(self, transition: Dict) -> Dict:
         return {
-            'id': transition.id,
-            'name': transition.name,
-            'from_state': transition.from_state.name,
-            'to_state': transition.to_state.name
+            'id': transition['id'],
+            'name': transition['name'],
+            'from_state': self.graph.states[transition['from_state_id']]['name'],
+            'to_state': self.graph.states[transition['to_state_id']]['name']
         }
     
     def _serialize_audit_log(self, log: WorkflowAuditLog) -> Dict:
@@ -274,12 +605,13 @@ class WorkflowStateMachine:
             'to_state': log.to_state,
             'performed_by': log.performed_by,
             'timestamp': log.timestamp.isoformat(),
-            'reason': log.transition_reason
+            'reason': log.transition_reason,
+            'sequence': log.sequence
         }
     
-    def _find_user_by_role(self, role: str) -> Optional[User]:
-        """Find first user with given role"""
-        return User.query.filter_by(role=role).first()
+    def _find_user_by_role(self, role: str) -> Optional[str]:
+        """Pick an assignee id for the role from the cached assignment index"""
+        return workflow_assignment.assign(role)
 
 
 class WorkflowService:
@@ -308,7 +640,9 @@ class WorkflowService:
             is_initial=is_initial
         )
         db.session.add(state)
+        WorkflowService._bump_graph_version(template_id)
         db.session.commit()
+        WorkflowGraphCache.invalidate(template_id)
         return {'id': state.id, 'name': state.name}
     
     @staticmethod
@@ -321,5 +655,18 @@ class WorkflowService:
             name=name
         )
         db.session.add(transition)
+        WorkflowService._bump_graph_version(template_id)
         db.session.commit()
+        WorkflowGraphCache.invalidate(template_id)
         return {'id': transition.id, 'name': transition.name}
+    
+    @staticmethod
+    def _bump_graph_version(template_id: str):
+        """Atomically bump the template version so every process recompiles its graph"""
+        WorkflowTemplate.query.filter_by(id=template_id).update(
+            {
+                WorkflowTemplate.graph_version: WorkflowTemplate.graph_version + 1,
+                WorkflowTemplate.updated_at: datetime.utcnow()
+            },
+            synchronize_session=False
+        )
@@ -0,0 +1,346 @@
+"""Workflow engine throughput benchmark
+
+Seeds N workflow templates, M documents and a pool of reviewers into a local
+database (SQLite file by default, or any SQLAlchemy URL such as a MySQL
+stand-in), then drives WorkflowStateMachine.can_transition, execute_transition
+and add_approval_signature at a configurable concurrency.
+
+Reports p50/p95/p99 latency, throughput, queries per operation and commits per
+operation, and writes the results as JSON so runs can be compared between
+releases:
+
+    python benchmark_workflow.py --templates 5 --documents 500 --operations 2000 \
+        --concurrency 8 --output bench.json
+    python benchmark_workflow.py --output new.json --compare bench.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from config import TestingConfig
+from app import create_app
+from app.extensions import db
+from app.models.user import User, Role, UserRole
+from app.models.document import Document
+from app.models.workflow import (
+    WorkflowTemplate, WorkflowState, WorkflowTransition, WorkflowRule, WorkflowAction, DocumentWorkflowState
+)
+from app.services.workflow_service import WorkflowStateMachine, WorkflowGraphCache
+
+REVIEWER_ROLE = 'Reviewer'
+OPERATIONS = ('can_transition', 'execute_transition', 'add_approval_signature')
+
+_counters = threading.local()
+
+
+def _count(name):
+    if getattr(_counters, 'active', False):
+        setattr(_counters, name, getattr(_counters, name, 0) + 1)
+
+
+def _install_counters(engine):
+    event.listen(engine, 'before_cursor_execute', lambda *args: _count('queries'))
+    event.listen(Session, 'after_commit', lambda session: _count('commits'))
+
+
+def _make_config(database_url):
+    class BenchmarkConfig(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = database_url
+        SQLALCHEMY_ECHO = False
+        SQLALCHEMY_ENGINE_OPTIONS = (
+            {'connect_args': {'timeout': 30, 'check_same_thread': False}}
+            if database_url.startswith('sqlite') else
+            {'pool_size': 20, 'max_overflow': 20, 'pool_pre_ping': True}
+        )
+        CACHE_TYPE = 'NullCache'
+    return BenchmarkConfig
+
+
+# =============================================================================
+# SEEDING
+# =============================================================================
+
+def seed(args):
+    """Create templates (cyclic state graphs), documents and reviewers; return the work plan"""
+    db.create_all()
+
+    role = Role.query.filter_by(name=REVIEWER_ROLE).first()
+    if not role:
+        role = Role(name=REVIEWER_ROLE, description='Benchmark reviewer', permissions=[])
+        db.session.add(role)
+        db.session.flush()
+
+    run_tag = uuid.uuid4().hex[:8]
+    reviewers = []
+    for i in range(args.reviewers):
+        user = User(
+            email=f'bench-{run_tag}-{i}@westval.local',
+            username=f'bench-{run_tag}-{i}',
+            password_hash='!',
+            first_name='Bench',
+            last_name=f'Reviewer {i}'
+        )
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserRole(user_id=user.id, role_id=role.id))
+        reviewers.append(user.id)
+
+    documents = []
+    for t in range(args.templates):
+        template = WorkflowTemplate(name=f'Benchmark {run_tag} #{t}', description='benchmark',
+                                    created_by=reviewers[0])
+        db.session.add(template)
+        db.session.flush()
+
+        states = []
+        for s in range(args.states):
+            state = WorkflowState(template_id=template.id, name=f'State {s}', order=s,
+                                  is_initial=(s == 0), sla_hours=24)
+            db.session.add(state)
+            states.append(state)
+        db.session.flush()
+
+        # A cycle keeps every document transitionable for the whole run
+        for s, state in enumerate(states):
+            transition = WorkflowTransition(
+                template_id=template.id,
+                from_state_id=state.id,
+                to_state_id=states[(s + 1) % len(states)].id,
+                name=f'Advance {s}',
+                auto_assign_to_role=REVIEWER_ROLE if s % 2 == 0 else None
+            )
+            db.session.add(transition)
+            db.session.flush()
+            db.session.add(WorkflowAction(transition_id=transition.id, action_type='send_notification',
+                                          parameters={'notify': 'assignee'}, order=0))
+            db.session.add(WorkflowRule(template_id=template.id, transition_id=transition.id,
+                                        rule_type='role_required', required_role=REVIEWER_ROLE))
+
+        next_state = {states[s].id: states[(s + 1) % len(states)].id for s in range(len(states))}
+        for d in range(args.documents // args.templates + (1 if t < args.documents % args.templates else 0)):
+            document = Document(document_number=f'BENCH-{run_tag}-{t}-{d}', title='Benchmark document')
+            db.session.add(document)
+            db.session.flush()
+            db.session.add(DocumentWorkflowState(
+                document_id=document.id,
+                current_state_id=states[0].id,
+                required_approvals=args.reviewers,
+                completed_approvals=0
+            ))
+            documents.append({'document_id': document.id, 'template_id': template.id,
+                              'state_id': states[0].id, 'next_state': next_state})
+
+    db.session.commit()
+    return {'reviewers': reviewers, 'documents': documents}
+
+
+# =============================================================================
+# WORKLOAD
+# =============================================================================
+
+def _load_users(user_ids):
+    # Roles come from user_roles, as in production; load them up front so the first operation is not skewed
+    users = User.query.options(selectinload(User.roles).joinedload(UserRole.role)).filter(User.id.in_(user_ids)).all()
+    return {user.id: user for user in users}
+
+
+def _run_partition(app, operation, partition, reviewer_ids, operations):
+    """Run `operations` calls of one type over a worker's own documents"""
+    samples = []
+    with app.app_context():
+        users = _load_users(reviewer_ids)
+        signers = {}
+        for i in range(operations):
+            doc = partition[i % len(partition)]
+            user = users[reviewer_ids[i % len(reviewer_ids)]]
+
+            _counters.queries = 0
+            _counters.commits = 0
+            _counters.active = True
+            started = time.perf_counter()
+            try:
+                fsm = WorkflowStateMachine(doc['template_id'])
+                if operation == 'can_transition':
+                    ok, _ = fsm.can_transition(doc['document_id'], doc['next_state'][doc['state_id']], user)
+                elif operation == 'execute_transition':
+                    result = fsm.execute_transition(doc['document_id'], doc['next_state'][doc['state_id']],
+                                                    user, reason='benchmark')
+                    ok = result.get('success', False)
+                    if ok:
+                        doc['state_id'] = doc['next_state'][doc['state_id']]
+                else:
+                    index = signers.get(doc['document_id'], 0)
+                    signers[doc['document_id']] = index + 1
+                    signer = users[reviewer_ids[index % len(reviewer_ids)]]
+                    ok = fsm.add_approval_signature(doc['document_id'], signer, 'benchmark').get('success', False)
+                error = None
+            except Exception as e:
+                db.session.rollback()
+                ok, error = False, str(e)
+            elapsed = time.perf_counter() - started
+            _counters.active = False
+
+            samples.append({
+                'latency': elapsed,
+                'queries': _counters.queries,
+                'commits': _counters.commits,
+                'ok': ok,
+                'error': error
+            })
+        db.session.remove()
+    return samples
+
+
+def _percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+def _summarize(samples, wall_seconds):
+    latencies = sorted(s['latency'] * 1000 for s in samples)
+    count = len(samples)
+    errors = [s['error'] for s in samples if s['error']]
+    return {
+        'operations': count,
+        'succeeded': sum(1 for s in samples if s['ok']),
+        'errors': len(errors),
+        'sample_errors': sorted(set(errors))[:5],
+        'wall_seconds': round(wall_seconds, 4),
+        'throughput_ops_per_sec': round(count / wall_seconds, 2) if wall_seconds else None,
+        'latency_ms': {
+            'p50': round(_percentile(latencies, 50), 3) if latencies else None,
+            'p95': round(_percentile(latencies, 95), 3) if latencies else None,
+            'p99': round(_percentile(latencies, 99), 3) if latencies else None,
+            'max': round(latencies[-1], 3) if latencies else None,
+            'mean': round(sum(latencies) / count, 3) if count else None
+        },
+        'queries_per_op': round(sum(s['queries'] for s in samples) / count, 3) if count else None,
+        'commits_per_op': round(sum(s['commits'] for s in samples) / count, 3) if count else None
+    }
+
+
+def run_benchmark(app, plan, args):
+    documents = plan['documents']
+    workers = max(1, min(args.concurrency, len(documents)))
+    # Each worker owns a disjoint slice of documents so transitions never contend on a row
+    partitions = [documents[w::workers] for w in range(workers)]
+    per_worker = [args.operations // workers + (1 if w < args.operations % workers else 0) for w in range(workers)]
+
+    results = {}
+    for operation in args.ops:
+        WorkflowGraphCache.invalidate()
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(_run_partition, app, operation, partitions[w], plan['reviewers'], per_worker[w])
+                for w in range(workers) if per_worker[w]
+            ]
+            samples = [sample for future in futures for sample in future.result()]
+        results[operation] = _summarize(samples, time.perf_counter() - started)
+        print(f"{operation:<24} {results[operation]['throughput_ops_per_sec']:>10} ops/s  "
+              f"p50 {results[operation]['latency_ms']['p50']} ms  "
+              f"p95 {results[operation]['latency_ms']['p95']} ms  "
+              f"p99 {results[operation]['latency_ms']['p99']} ms  "
+              f"{results[operation]['queries_per_op']} q/op  "
+              f"{results[operation]['commits_per_op']} commits/op  "
+              f"errors {results[operation]['errors']}")
+    return results
+
+
+def compare(current, baseline_path):
+    """Print throughput and p95 deltas against an earlier result file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('git_revision')}):")
+    for operation, result in current['results'].items():
+        before = baseline.get('results', {}).get(operation)
+        if not before:
+            continue
+        for label, now_value, then_value in (
+            ('throughput', result['throughput_ops_per_sec'], before['throughput_ops_per_sec']),
+            ('p95 ms', result['latency_ms']['p95'], before['latency_ms']['p95']),
+            ('queries/op', result['queries_per_op'], before['queries_per_op'])
+        ):
+            if then_value:
+                change = (now_value - then_value) / then_value * 100
+                print(f'  {operation:<24} {label:<11} {then_value:>10} -> {now_value:<10} ({change:+.1f}%)')
+
+
+def _git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(os.path.abspath(__file__)), stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark workflow engine throughput')
+    parser.add_argument('--database-url', help='SQLAlchemy URL (default: temporary SQLite file)')
+    parser.add_argument('--templates', type=int, default=3)
+    parser.add_argument('--states', type=int, default=4, help='States per template (cyclic graph)')
+    parser.add_argument('--documents', type=int, default=200)
+    parser.add_argument('--reviewers', type=int, default=5)
+    parser.add_argument('--operations', type=int, default=1000, help='Calls per operation type')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--ops', nargs='+', choices=OPERATIONS, default=list(OPERATIONS))
+    parser.add_argument('--output', default='workflow_benchmark.json')
+    parser.add_argument('--compare', help='Earlier result JSON to compare against')
+    args = parser.parse_args()
+
+    warnings.simplefilter('ignore')
+    database_url = args.database_url or f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'workflow_benchmark.db')}"
+    app = create_app(_make_config(database_url))
+
+    with app.app_context():
+        _install_counters(db.engine)
+        print(f'Seeding {args.templates} templates, {args.documents} documents, {args.reviewers} reviewers...')
+        plan = seed(args)
+        dialect = db.engine.dialect.name
+
+    results = run_benchmark(app, plan, args)
+
+    output = {
+        'benchmark': 'workflow_throughput',
+        'generated_at': datetime.utcnow().isoformat(),
+        'git_revision': _git_revision(),
+        'database': dialect,
+        'parameters': {
+            'templates': args.templates,
+            'states_per_template': args.states,
+            'documents': args.documents,
+            'reviewers': args.reviewers,
+            'operations': args.operations,
+            'concurrency': args.concurrency
+        },
+        'results': results
+    }
+    with open(args.output, 'w') as f:
+        json.dump(output, f, indent=2)
+    print(f'\nResults written to {args.output}')
+
+    if args.compare:
+        compare(output, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -99,6 +99,72 @@ class Config:
     SYSTEM_EMAIL = os.getenv('SYSTEM_EMAIL', 'system@westval.com')
     PAGINATION_PER_PAGE = int(os.getenv('PAGINATION_PER_PAGE', '50'))
     
+    # Workflow SLA escalation
+    SLA_SCAN_HORIZON_MINUTES = int(os.getenv('SLA_SCAN_HORIZON_MINUTES', '30'))  # Must stay under 60
+    SLA_SCHEDULER_POLL_SECONDS = int(os.getenv('SLA_SCHEDULER_POLL_SECONDS', '30'))
+    SLA_ESCALATION_BATCH_SIZE = int(os.getenv('SLA_ESCALATION_BATCH_SIZE', '500'))
+    
+    # Workflow action outbox worker
+    OUTBOX_WORKER_THREADS = int(os.getenv('OUTBOX_WORKER_THREADS', '4'))
+    OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '50'))
+    OUTBOX_POLL_SECONDS = float(os.getenv('OUTBOX_POLL_SECONDS', '2'))
+    OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+    OUTBOX_LEASE_SECONDS = int(os.getenv('OUTBOX_LEASE_SECONDS', '300'))
+    
+    # Workflow audit chain
+    WORKFLOW_AUDIT_CHECKPOINT_INTERVAL = int(os.getenv('WORKFLOW_AUDIT_CHECKPOINT_INTERVAL', '500'))
+    
+    # Workflow auto-assignment
+    WORKFLOW_ASSIGNMENT_STRATEGY = os.getenv('WORKFLOW_ASSIGNMENT_STRATEGY', 'least_loaded')  # least_loaded or round_robin
+    WORKFLOW_ASSIGNMENT_INDEX_TTL_SECONDS = int(os.getenv('WORKFLOW_ASSIGNMENT_INDEX_TTL_SECONDS', '300'))
+    
+    # Field audit chain verifier
+    FIELD_AUDIT_VERIFY_WORKERS = int(os.getenv('FIELD_AUDIT_VERIFY_WORKERS', '4'))
+    FIELD_AUDIT_VERIFY_BATCH_ENTITIES = int(os.getenv('FIELD_AUDIT_VERIFY_BATCH_ENTITIES', '500'))
+    FIELD_AUDIT_VERIFY_FETCH_SIZE = int(os.getenv('FIELD_AUDIT_VERIFY_FETCH_SIZE', '5000'))
+    FIELD_AUDIT_VERIFY_MAX_FINDINGS = int(os.getenv('FIELD_AUDIT_VERIFY_MAX_FINDINGS', '1000'))
+    
+    # Audit ingestion pipeline
+    AUDIT_PIPELINE_ENABLED = os.getenv('AUDIT_PIPELINE_ENABLED', 'true').lower() == 'true'
+    AUDIT_PIPELINE_QUEUE_SIZE = int(os.getenv('AUDIT_PIPELINE_QUEUE_SIZE', '10000'))
+    AUDIT_PIPELINE_BATCH_SIZE = int(os.getenv('AUDIT_PIPELINE_BATCH_SIZE', '200'))
+    AUDIT_PIPELINE_MAX_DELAY_MS = int(os.getenv('AUDIT_PIPELINE_MAX_DELAY_MS', '20'))
+    AUDIT_PIPELINE_SYNC = os.getenv('AUDIT_PIPELINE_SYNC', 'true').lower() == 'true'  # Wait for durability before returning
+    AUDIT_PIPELINE_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv('AUDIT_PIPELINE_ENQUEUE_TIMEOUT_SECONDS', '1'))
+    AUDIT_PIPELINE_WAIT_TIMEOUT_SECONDS = float(os.getenv('AUDIT_PIPELINE_WAIT_TIMEOUT_SECONDS', '30'))
+    
+    # Audit cold archive (months older than the retention window leave the hot tables)
+    AUDIT_ARCHIVE_DIR = os.getenv('AUDIT_ARCHIVE_DIR', '/app/audit_archive')
+    AUDIT_HOT_RETENTION_MONTHS = int(os.getenv('AUDIT_HOT_RETENTION_MONTHS', '12'))
+    AUDIT_ARCHIVE_TABLES = os.getenv('AUDIT_ARCHIVE_TABLES', 'audit_logs,field_audit_logs,workflow_audit_logs').split(',')
+    AUDIT_ARCHIVE_PART_ROWS = int(os.getenv('AUDIT_ARCHIVE_PART_ROWS', '250000'))
+    AUDIT_ARCHIVE_BATCH_SIZE = int(os.getenv('AUDIT_ARCHIVE_BATCH_SIZE', '1000'))
+    
+    # Audit report rollups
+    AUDIT_ROLLUP_GRACE_MINUTES = int(os.getenv('AUDIT_ROLLUP_GRACE_MINUTES', '10'))
+    
+    # Materialized traceability matrix (refreshed in the transaction that changes links/tests)
+    RTM_INCREMENTAL_REFRESH = os.getenv('RTM_INCREMENTAL_REFRESH', 'true').lower() == 'true'
+    
+    # Background report jobs
+    REPORT_JOB_WORKERS = int(os.getenv('REPORT_JOB_WORKERS', '2'))
+    REPORT_CACHE_DIR = os.getenv('REPORT_CACHE_DIR', '/app/report_cache')
+    REPORT_JOB_STALE_MINUTES = int(os.getenv('REPORT_JOB_STALE_MINUTES', '60'))  # In-flight jobs older than this are not joined
+    REPORT_SECTION_WORKERS = int(os.getenv('REPORT_SECTION_WORKERS', '4'))  # Parallel sections per audit package
+    
+    # Report scheduler (flask run_report_scheduler)
+    REPORT_SCHEDULER_WORKERS = int(os.getenv('REPORT_SCHEDULER_WORKERS', '2'))  # Concurrent scheduled renders per scheduler process
+    REPORT_SCHEDULER_POLL_SECONDS = int(os.getenv('REPORT_SCHEDULER_POLL_SECONDS', '60'))
+    REPORT_SCHEDULER_HORIZON_MINUTES = int(os.getenv('REPORT_SCHEDULER_HORIZON_MINUTES', '15'))
+    REPORT_SCHEDULER_BATCH_SIZE = int(os.getenv('REPORT_SCHEDULER_BATCH_SIZE', '50'))
+    REPORT_SCHEDULER_LEASE_SECONDS = int(os.getenv('REPORT_SCHEDULER_LEASE_SECONDS', '3600'))  # Claims older than this are taken over
+    
+    # Compliance dashboard rollups
+    COMPLIANCE_TREND_LENGTH = int(os.getenv('COMPLIANCE_TREND_LENGTH', '10'))  # Reports kept in each trend ring buffer
+    
+    # Cached test coverage per validation (invalidated by test executions)
+    TEST_COVERAGE_SNAPSHOTS = os.getenv('TEST_COVERAGE_SNAPSHOTS', 'true').lower() == 'true'
+    
     # 21 CFR Part 11 Settings
     PASSWORD_MIN_LENGTH = int(os.getenv('PASSWORD_MIN_LENGTH', '8'))
     PASSWORD_REQUIRE_UPPERCASE = os.getenv('PASSWORD_REQUIRE_UPPERCASE', 'true').lower() == 'true'
@@ -0,0 +1,27 @@
+"""Add graph_version to workflow templates for compiled graph cache invalidation
+
+Revision ID: 023
+Revises: 022
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '023'
+down_revision = '022'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('workflow_templates',
+        sa.Column('graph_version', sa.Integer(), nullable=False, server_default='1')
+    )
+    op.add_column('workflow_audit_logs',
+        sa.Column('transition_reason', sa.Text(), nullable=True)
+    )
+    op.create_index('ix_document_workflow_states_document_id', 'document_workflow_states', ['document_id'])
+
+def downgrade():
+    op.drop_index('ix_document_workflow_states_document_id', 'document_workflow_states')
+    op.drop_column('workflow_audit_logs', 'transition_reason')
+    op.drop_column('workflow_templates', 'graph_version')
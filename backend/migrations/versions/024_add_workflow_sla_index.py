@@ -0,0 +1,28 @@
+"""Index workflow SLA deadlines and track escalations
+
+Revision ID: 024
+Revises: 023
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '024'
+down_revision = '023'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('document_workflow_states',
+        sa.Column('sla_escalated_at', sa.DateTime(), nullable=True)
+    )
+    # Token of the scheduler batch that claimed the escalation
+    op.add_column('document_workflow_states',
+        sa.Column('sla_escalation_claim', sa.String(36), nullable=True)
+    )
+    op.create_index('ix_document_workflow_states_sla_deadline', 'document_workflow_states', ['sla_deadline'])
+
+def downgrade():
+    op.drop_index('ix_document_workflow_states_sla_deadline', 'document_workflow_states')
+    op.drop_column('document_workflow_states', 'sla_escalation_claim')
+    op.drop_column('document_workflow_states', 'sla_escalated_at')
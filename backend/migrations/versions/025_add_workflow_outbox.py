@@ -0,0 +1,38 @@
+"""Add transactional outbox for asynchronous workflow actions
+
+Revision ID: 025
+Revises: 024
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '025'
+down_revision = '024'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('workflow_outbox',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('document_id', sa.String(36), sa.ForeignKey('documents.id'), nullable=False),
+        sa.Column('transition_id', sa.String(36), sa.ForeignKey('workflow_transitions.id'), nullable=True),
+        sa.Column('action_id', sa.String(36), sa.ForeignKey('workflow_actions.id'), nullable=True),
+        sa.Column('action_type', sa.String(50), nullable=False),
+        sa.Column('parameters', sa.JSON(), nullable=True),
+        sa.Column('idempotency_key', sa.String(64), nullable=False, unique=True),
+        sa.Column('status', sa.String(20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('available_at', sa.DateTime(), nullable=False),
+        sa.Column('locked_by', sa.String(100), nullable=True),
+        sa.Column('locked_at', sa.DateTime(), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_workflow_outbox_status_available', 'workflow_outbox', ['status', 'available_at'])
+
+def downgrade():
+    op.drop_index('idx_workflow_outbox_status_available', 'workflow_outbox')
+    op.drop_table('workflow_outbox')
@@ -0,0 +1,45 @@
+"""Chain workflow audit logs per document and add Merkle checkpoints
+
+Revision ID: 026
+Revises: 025
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '026'
+down_revision = '025'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.add_column('workflow_audit_logs', sa.Column('sequence', sa.Integer(), nullable=True))
+    op.add_column('workflow_audit_logs', sa.Column('previous_hash', sa.String(64), nullable=True))
+    op.create_unique_constraint('uq_workflow_audit_sequence', 'workflow_audit_logs', ['document_id', 'sequence'])
+    
+    op.add_column('document_workflow_states', sa.Column('audit_sequence', sa.Integer(), nullable=True, server_default='0'))
+    op.add_column('document_workflow_states', sa.Column('audit_head_hash', sa.String(64), nullable=True))
+    
+    op.create_table('workflow_audit_checkpoints',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('document_id', sa.String(36), sa.ForeignKey('documents.id'), nullable=False),
+        sa.Column('sequence', sa.Integer(), nullable=False),
+        sa.Column('from_sequence', sa.Integer(), nullable=False),
+        sa.Column('head_hash', sa.String(64), nullable=False),
+        sa.Column('merkle_root', sa.String(64), nullable=False),
+        sa.Column('entry_count', sa.Integer(), nullable=False),
+        sa.Column('previous_checkpoint_hash', sa.String(64), nullable=True),
+        sa.Column('checkpoint_hash', sa.String(64), nullable=False),
+        sa.Column('verified_by', sa.String(36), sa.ForeignKey('users.id'), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('document_id', 'sequence', name='uq_workflow_audit_checkpoint')
+    )
+
+def downgrade():
+    op.drop_table('workflow_audit_checkpoints')
+    op.drop_column('document_workflow_states', 'audit_head_hash')
+    op.drop_column('document_workflow_states', 'audit_sequence')
+    op.drop_constraint('uq_workflow_audit_sequence', 'workflow_audit_logs', type_='unique')
+    op.drop_column('workflow_audit_logs', 'previous_hash')
+    op.drop_column('workflow_audit_logs', 'sequence')
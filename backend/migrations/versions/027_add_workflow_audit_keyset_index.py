@@ -0,0 +1,19 @@
+"""Composite index for keyset pagination of workflow audit trails
+
+Revision ID: 027
+Revises: 026
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '027'
+down_revision = '026'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('idx_workflow_audit_document_timestamp', 'workflow_audit_logs', ['document_id', 'timestamp', 'id'])
+
+def downgrade():
+    op.drop_index('idx_workflow_audit_document_timestamp', 'workflow_audit_logs')
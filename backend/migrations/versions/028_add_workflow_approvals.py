@@ -0,0 +1,63 @@
+"""Move parallel approval signatures into an append-only table
+
+Revision ID: 028
+Revises: 027
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+import json
+import uuid
+from datetime import datetime
+
+revision = '028'
+down_revision = '027'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    approvals = op.create_table('workflow_approvals',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('document_id', sa.String(36), sa.ForeignKey('documents.id'), nullable=False),
+        sa.Column('doc_state_id', sa.String(36), sa.ForeignKey('document_workflow_states.id'), nullable=False),
+        sa.Column('state_id', sa.String(36), sa.ForeignKey('workflow_states.id'), nullable=True),
+        sa.Column('user_id', sa.String(36), sa.ForeignKey('users.id'), nullable=False),
+        sa.Column('role', sa.String(255), nullable=True),
+        sa.Column('signature', sa.Text(), nullable=True),
+        sa.Column('signed_by', sa.String(255), nullable=True),
+        sa.Column('signed_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('doc_state_id', 'state_id', 'user_id', name='uq_workflow_approval_signer')
+    )
+    
+    # Backfill from the legacy approvals_data JSON list
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        'SELECT id, document_id, current_state_id, approvals_data FROM document_workflow_states '
+        'WHERE approvals_data IS NOT NULL'
+    )).fetchall()
+    backfill = []
+    for doc_state_id, document_id, state_id, approvals_data in rows:
+        data = json.loads(approvals_data) if isinstance(approvals_data, str) else approvals_data
+        seen = set()
+        for approval in data or []:
+            if not approval.get('user_id') or approval['user_id'] in seen:
+                continue
+            seen.add(approval['user_id'])
+            timestamp = approval.get('timestamp')
+            backfill.append({
+                'id': str(uuid.uuid4()),
+                'document_id': document_id,
+                'doc_state_id': doc_state_id,
+                'state_id': state_id,
+                'user_id': approval['user_id'],
+                'role': approval.get('role'),
+                'signature': approval.get('signature'),
+                'signed_by': approval.get('signed_by'),
+                'signed_at': datetime.fromisoformat(timestamp) if timestamp else datetime.utcnow()
+            })
+    if backfill:
+        op.bulk_insert(approvals, backfill)
+
+def downgrade():
+    op.drop_table('workflow_approvals')
@@ -0,0 +1,21 @@
+"""Index workflow assignees and role membership for auto-assignment
+
+Revision ID: 029
+Revises: 028
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '029'
+down_revision = '028'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_document_workflow_states_assigned_to', 'document_workflow_states', ['assigned_to'])
+    op.create_index('idx_user_roles_role_user', 'user_roles', ['role_id', 'user_id'])
+
+def downgrade():
+    op.drop_index('idx_user_roles_role_user', 'user_roles')
+    op.drop_index('ix_document_workflow_states_assigned_to', 'document_workflow_states')
@@ -0,0 +1,38 @@
+"""Track field audit chain heads for primary-key chaining
+
+Revision ID: 030
+Revises: 029
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '030'
+down_revision = '029'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('field_audit_chain_heads',
+        sa.Column('entity_type', sa.String(100), nullable=False),
+        sa.Column('entity_id', sa.Integer(), nullable=False),
+        sa.Column('head_hash', sa.String(256), nullable=True),
+        sa.Column('entry_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('entity_type', 'entity_id')
+    )
+
+    # Seed heads from existing chains (latest entry per entity)
+    op.execute("""
+        INSERT INTO field_audit_chain_heads (entity_type, entity_id, head_hash, entry_count, updated_at)
+        SELECT l.entity_type, l.entity_id, l.change_hash, c.entry_count, l.created_at
+        FROM field_audit_logs l
+        JOIN (
+            SELECT entity_type, entity_id, COUNT(*) AS entry_count, MAX(id) AS last_id
+            FROM field_audit_logs
+            GROUP BY entity_type, entity_id
+        ) c ON c.last_id = l.id
+    """)
+
+def downgrade():
+    op.drop_table('field_audit_chain_heads')
@@ -0,0 +1,39 @@
+"""Add field audit verification runs and chain-order index
+
+Revision ID: 031
+Revises: 030
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '031'
+down_revision = '030'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('field_audit_verification_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(50), nullable=True),
+        sa.Column('started_by', sa.String(100), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.Column('last_entity_type', sa.String(100), nullable=True),
+        sa.Column('last_entity_id', sa.Integer(), nullable=True),
+        sa.Column('entities_verified', sa.Integer(), nullable=True),
+        sa.Column('entries_verified', sa.Integer(), nullable=True),
+        sa.Column('broken_entities', sa.Integer(), nullable=True),
+        sa.Column('hash_mismatch_count', sa.Integer(), nullable=True),
+        sa.Column('broken_link_count', sa.Integer(), nullable=True),
+        sa.Column('head_mismatch_count', sa.Integer(), nullable=True),
+        sa.Column('broken_links', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_entity_chain', 'field_audit_logs', ['entity_type', 'entity_id', 'created_at', 'id'])
+
+def downgrade():
+    op.drop_index('idx_entity_chain', 'field_audit_logs')
+    op.drop_table('field_audit_verification_runs')
@@ -0,0 +1,64 @@
+"""Add audit archive catalog, archived key index and archived chain anchors
+
+Revision ID: 032
+Revises: 031
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '032'
+down_revision = '031'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('audit_archive_partitions',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('table_name', sa.String(100), nullable=False),
+        sa.Column('period', sa.String(7), nullable=False),
+        sa.Column('part', sa.Integer(), nullable=False),
+        sa.Column('file_path', sa.String(500), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('first_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('key_min', sa.Text(), nullable=True),
+        sa.Column('key_max', sa.Text(), nullable=True),
+        sa.Column('content_hash', sa.String(64), nullable=False),
+        sa.Column('previous_seal_hash', sa.String(64), nullable=True),
+        sa.Column('seal_hash', sa.String(64), nullable=False),
+        sa.Column('index_hash', sa.String(64), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('table_name', 'period', 'part', name='uq_audit_archive_partition')
+    )
+    # Entity key -> byte range of its block in a partition file
+    op.create_table('audit_archive_keys',
+        sa.Column('partition_id', sa.String(36), nullable=False),
+        sa.Column('entity_key', sa.String(255), nullable=False),
+        sa.Column('table_name', sa.String(100), nullable=False),
+        sa.Column('period', sa.String(7), nullable=False),
+        sa.Column('byte_offset', sa.BigInteger(), nullable=False),
+        sa.Column('byte_length', sa.Integer(), nullable=False),
+        sa.Column('row_count', sa.Integer(), nullable=False),
+        sa.Column('first_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+        sa.Column('block_hash', sa.String(64), nullable=False),
+        sa.ForeignKeyConstraint(['partition_id'], ['audit_archive_partitions.id']),
+        sa.PrimaryKeyConstraint('partition_id', 'entity_key')
+    )
+    op.create_index('idx_audit_archive_key_lookup', 'audit_archive_keys', ['table_name', 'entity_key', 'period'])
+    op.add_column('field_audit_chain_heads', sa.Column('archived_hash', sa.String(256), nullable=True))
+    op.add_column('field_audit_chain_heads', sa.Column('archived_count', sa.Integer(), nullable=False, server_default='0'))
+
+    # Month-range scans used by the archiver
+    op.create_index('idx_field_audit_created_at', 'field_audit_logs', ['created_at'])
+
+def downgrade():
+    op.drop_index('idx_field_audit_created_at', 'field_audit_logs')
+    op.drop_column('field_audit_chain_heads', 'archived_count')
+    op.drop_column('field_audit_chain_heads', 'archived_hash')
+    op.drop_index('idx_audit_archive_key_lookup', 'audit_archive_keys')
+    op.drop_table('audit_archive_keys')
+    op.drop_table('audit_archive_partitions')
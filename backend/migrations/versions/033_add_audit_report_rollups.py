@@ -0,0 +1,35 @@
+"""Add comprehensive audit composite indexes and daily rollups
+
+Revision ID: 033
+Revises: 032
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '033'
+down_revision = '032'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('idx_comprehensive_audit_time_type', 'comprehensive_audit_logs', ['timestamp', 'audit_type'])
+    op.create_index('idx_comprehensive_audit_time_user', 'comprehensive_audit_logs', ['timestamp', 'user_id'])
+    op.create_index('idx_comprehensive_audit_time_entity', 'comprehensive_audit_logs', ['timestamp', 'entity_type'])
+
+    op.create_table('comprehensive_audit_daily_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('facet', sa.String(50), nullable=False),
+        sa.Column('facet_value', sa.String(255), nullable=False),
+        sa.Column('record_count', sa.Integer(), nullable=False),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('day', 'facet', 'facet_value', name='uq_comprehensive_audit_rollup')
+    )
+
+def downgrade():
+    op.drop_table('comprehensive_audit_daily_rollups')
+    op.drop_index('idx_comprehensive_audit_time_entity', 'comprehensive_audit_logs')
+    op.drop_index('idx_comprehensive_audit_time_user', 'comprehensive_audit_logs')
+    op.drop_index('idx_comprehensive_audit_time_type', 'comprehensive_audit_logs')
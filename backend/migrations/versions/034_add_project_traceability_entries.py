@@ -0,0 +1,47 @@
+"""Add materialized traceability matrix and link indexes
+
+Revision ID: 034
+Revises: 033
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '034'
+down_revision = '033'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_test_cases_requirement_id', 'test_cases', ['requirement_id'])
+    # requirement_test_mapping predates the migration history on some installs
+    if 'requirement_test_mapping' in sa.inspect(op.get_bind()).get_table_names():
+        op.create_index('idx_requirement_test_mapping_requirement', 'requirement_test_mapping', ['requirement_id'])
+        op.create_index('idx_requirement_test_mapping_test_case', 'requirement_test_mapping', ['test_case_id'])
+
+    # Rows are built by `flask refresh_rtm` (missing rows count as stale)
+    op.create_table('project_traceability_entries',
+        sa.Column('requirement_id', sa.String(36), nullable=False),
+        sa.Column('project_id', sa.String(36), nullable=False),
+        sa.Column('requirement_key', sa.String(50), nullable=False),
+        sa.Column('title', sa.String(255), nullable=True),
+        sa.Column('criticality', sa.String(20), nullable=True),
+        sa.Column('requirement_status', sa.String(50), nullable=True),
+        sa.Column('test_cases', sa.JSON(), nullable=True),
+        sa.Column('test_count', sa.Integer(), nullable=True),
+        sa.Column('active_test_count', sa.Integer(), nullable=True),
+        sa.Column('coverage', sa.String(20), nullable=True),
+        sa.Column('refreshed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['requirement_id'], ['requirements.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['project_id'], ['validation_projects.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('requirement_id')
+    )
+    op.create_index('idx_project_traceability_project', 'project_traceability_entries', ['project_id', 'requirement_key'])
+
+def downgrade():
+    op.drop_index('idx_project_traceability_project', 'project_traceability_entries')
+    op.drop_table('project_traceability_entries')
+    if 'requirement_test_mapping' in sa.inspect(op.get_bind()).get_table_names():
+        op.drop_index('idx_requirement_test_mapping_test_case', 'requirement_test_mapping')
+        op.drop_index('idx_requirement_test_mapping_requirement', 'requirement_test_mapping')
+    op.drop_index('ix_test_cases_requirement_id', 'test_cases')
@@ -0,0 +1,43 @@
+"""Add background report jobs
+
+Revision ID: 035
+Revises: 034
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '035'
+down_revision = '034'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('report_jobs',
+        sa.Column('id', sa.String(36), nullable=False),
+        sa.Column('project_id', sa.String(36), nullable=False),
+        sa.Column('report_type', sa.String(50), nullable=False),
+        sa.Column('data_version', sa.String(64), nullable=False),
+        sa.Column('status', sa.String(20), nullable=True),
+        sa.Column('progress', sa.Integer(), nullable=True),
+        sa.Column('stage', sa.String(100), nullable=True),
+        sa.Column('artifact_path', sa.String(500), nullable=True),
+        sa.Column('artifact_size', sa.Integer(), nullable=True),
+        sa.Column('cache_hit', sa.Boolean(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('requested_by', sa.String(36), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('idx_report_job_lookup', 'report_jobs', ['project_id', 'report_type', 'data_version'])
+    # Modification markers for the report data version
+    op.add_column('test_cases', sa.Column('updated_at', sa.DateTime(), nullable=True))
+    op.add_column('test_executions', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+def downgrade():
+    op.drop_column('test_executions', 'updated_at')
+    op.drop_column('test_cases', 'updated_at')
+    op.drop_index('idx_report_job_lookup', 'report_jobs')
+    op.drop_table('report_jobs')
@@ -0,0 +1,50 @@
+"""Add report scheduler claim, scope and recurrence columns
+
+Revision ID: 036
+Revises: 035
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '036'
+down_revision = '035'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    with op.batch_alter_table('report_schedules') as batch_op:
+        batch_op.alter_column('report_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.add_column(sa.Column('project_id', sa.String(36), nullable=True))
+        batch_op.add_column(sa.Column('report_type', sa.String(50), nullable=True))
+        batch_op.add_column(sa.Column('anchor_time', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('locked_by', sa.String(100), nullable=True))
+        batch_op.add_column(sa.Column('locked_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('last_status', sa.String(50), nullable=True))
+    op.execute('UPDATE report_schedules SET anchor_time = next_run_time WHERE anchor_time IS NULL')
+    op.create_index('idx_schedules_due', 'report_schedules', ['is_active', 'next_run_time'])
+
+    with op.batch_alter_table('report_executions') as batch_op:
+        batch_op.add_column(sa.Column('scheduled_for', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('missed_runs', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('report_job_id', sa.String(36), nullable=True))
+        batch_op.add_column(sa.Column('error_message', sa.Text(), nullable=True))
+    op.create_index('idx_executions_schedule', 'report_executions', ['schedule_id', 'started_at'])
+
+def downgrade():
+    op.drop_index('idx_executions_schedule', 'report_executions')
+    with op.batch_alter_table('report_executions') as batch_op:
+        batch_op.drop_column('error_message')
+        batch_op.drop_column('report_job_id')
+        batch_op.drop_column('missed_runs')
+        batch_op.drop_column('scheduled_for')
+
+    op.drop_index('idx_schedules_due', 'report_schedules')
+    with op.batch_alter_table('report_schedules') as batch_op:
+        batch_op.drop_column('last_status')
+        batch_op.drop_column('locked_at')
+        batch_op.drop_column('locked_by')
+        batch_op.drop_column('anchor_time')
+        batch_op.drop_column('report_type')
+        batch_op.drop_column('project_id')
+        batch_op.alter_column('report_id', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,47 @@
+"""Add compliance dashboard rollups
+
+Revision ID: 037
+Revises: 036
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '037'
+down_revision = '036'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('compliance_report_entries',
+        sa.Column('report_id', sa.String(36), nullable=False),
+        sa.Column('scope_id', sa.String(36), nullable=False),
+        sa.Column('report_type', sa.String(50), nullable=False),
+        sa.Column('status', sa.String(50), nullable=True),
+        sa.Column('compliance_percentage', sa.Float(), nullable=True),
+        sa.Column('critical_findings', sa.Integer(), nullable=True),
+        sa.Column('generated_at', sa.DateTime(), nullable=False),
+        sa.Column('approved_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('report_id')
+    )
+    op.create_index('idx_compliance_entry_scope', 'compliance_report_entries', ['scope_id', 'report_type'])
+    op.create_table('compliance_rollups',
+        sa.Column('scope_id', sa.String(36), nullable=False),
+        sa.Column('report_type', sa.String(50), nullable=False),
+        sa.Column('report_count', sa.Integer(), nullable=False),
+        sa.Column('complete_count', sa.Integer(), nullable=False),
+        sa.Column('approved_count', sa.Integer(), nullable=False),
+        sa.Column('no_critical_count', sa.Integer(), nullable=False),
+        sa.Column('compliance_sum', sa.Float(), nullable=False),
+        sa.Column('latest_report_id', sa.String(36), nullable=True),
+        sa.Column('latest_status', sa.String(50), nullable=True),
+        sa.Column('latest_generated_at', sa.DateTime(), nullable=True),
+        sa.Column('recent_compliance', sa.JSON(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('scope_id', 'report_type')
+    )
+
+def downgrade():
+    op.drop_table('compliance_rollups')
+    op.drop_index('idx_compliance_entry_scope', 'compliance_report_entries')
+    op.drop_table('compliance_report_entries')
@@ -0,0 +1,39 @@
+"""Add deviation index
+
+Revision ID: 038
+Revises: 037
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '038'
+down_revision = '037'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('deviation_index',
+        sa.Column('test_id', sa.String(36), nullable=False),
+        sa.Column('project_id', sa.String(36), nullable=False),
+        sa.Column('plan_id', sa.String(36), nullable=True),
+        sa.Column('plan_name', sa.String(255), nullable=True),
+        sa.Column('test_name', sa.String(255), nullable=True),
+        sa.Column('priority', sa.Integer(), nullable=True),
+        sa.Column('execution_id', sa.String(36), nullable=True),
+        sa.Column('executed_by', sa.String(36), nullable=True),
+        sa.Column('failed_steps', sa.Integer(), nullable=True),
+        sa.Column('comments', sa.Text(), nullable=True),
+        sa.Column('status', sa.String(20), nullable=False),
+        sa.Column('detected_at', sa.DateTime(), nullable=True),
+        sa.Column('resolved_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['test_id'], ['test_cases.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('test_id')
+    )
+    op.create_index('idx_deviation_index_open', 'deviation_index',
+                    ['project_id', 'status', 'plan_name', 'test_name'])
+
+def downgrade():
+    op.drop_index('idx_deviation_index_open', 'deviation_index')
+    op.drop_table('deviation_index')
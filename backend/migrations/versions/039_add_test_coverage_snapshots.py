@@ -0,0 +1,31 @@
+"""Add test coverage snapshots and latest-execution index
+
+Revision ID: 039
+Revises: 038
+Create Date: 2026-10-16 00:00:00.000000
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '039'
+down_revision = '038'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('idx_test_execution_case_date', 'test_executions', ['test_case_id', 'execution_date'])
+    op.create_table('test_coverage_snapshots',
+        sa.Column('project_id', sa.String(36), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('is_current', sa.Boolean(), nullable=False),
+        sa.Column('total_test_cases', sa.Integer(), nullable=True),
+        sa.Column('executed_test_cases', sa.Integer(), nullable=True),
+        sa.Column('passed_test_cases', sa.Integer(), nullable=True),
+        sa.Column('failed_test_cases', sa.Integer(), nullable=True),
+        sa.Column('computed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('project_id')
+    )
+
+def downgrade():
+    op.drop_table('test_coverage_snapshots')
+    op.drop_index('idx_test_execution_case_date', 'test_executions')
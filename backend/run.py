@@ -62,5 +62,106 @@ def init_demo():
     """Initialize demo data for presentations"""
     DemoDataService.initialize_demo_data()
 
+@app.cli.command()
+def run_sla_scheduler():
+    """Run the workflow SLA escalation scheduler"""
+    from app.services.sla_scheduler_service import sla_scheduler
+    sla_scheduler.run_forever(app)
+
+@app.cli.command()
+def run_outbox_worker():
+    """Drain the workflow action outbox"""
+    from app.services.workflow_outbox_service import WorkflowOutboxWorker
+    WorkflowOutboxWorker(app).run_forever()
+
+@app.cli.command()
+def run_report_scheduler():
+    """Generate scheduled reports as they fall due"""
+    from app.services.report_scheduler_service import ReportScheduler
+    ReportScheduler(app).run_forever()
+
+@app.cli.command()
+@click.option('--workers', type=int, default=None, help='Hashing processes')
+@click.option('--restart', is_flag=True, help='Start a new run instead of resuming the last unfinished one')
+@click.option('--output', type=click.Path(), default=None, help='Write the summary report as JSON')
+def verify_field_audit(workers, restart, output):
+    """Verify every field audit hash chain (resumable)"""
+    import json
+    from app.services.field_audit_verifier_service import FieldAuditVerifier
+    summary = FieldAuditVerifier(app, workers=workers).run(resume=not restart)
+    print(f"Run {summary['run_id']}: {summary['entities_verified']} entities, "
+          f"{summary['entries_verified']} entries, {summary['broken_entities']} broken")
+    for reason, count in summary['findings_by_reason'].items():
+        print(f'  {reason}: {count}')
+    if output:
+        with open(output, 'w') as f:
+            json.dump(summary, f, indent=2)
+
+@app.cli.command()
+@click.option('--table', 'tables', multiple=True, help='Limit to one audit table (repeatable)')
+@click.option('--dry-run', is_flag=True, help='Report what would be archived without moving rows')
+@click.option('--verify', is_flag=True, help='Only verify sealed archive files')
+def archive_audit_logs(tables, dry_run, verify):
+    """Move sealed months of audit rows to the cold archive"""
+    from app.services.audit_archive_service import AuditArchiveService
+    if verify:
+        report = AuditArchiveService.verify_partitions()
+        print(f"{report['partitions_checked']} partitions checked, {len(report['failures'])} failures")
+        for failure in report['failures']:
+            print(f"  {failure['partition']}: {failure['reason']}")
+        return
+    for part in AuditArchiveService.archive_due(list(tables) or None, dry_run=dry_run):
+        print(f"{part['table']} {part['period']}: {part['rows']} rows" + (' (dry run)' if dry_run else f" -> {part['file']}"))
+
+@app.cli.command()
+@click.option('--days', type=int, default=1, help='Number of closed days to (re)compute, ending yesterday')
+def rollup_audit_reports(days):
+    """Precompute daily audit report rollups (schedule after midnight)"""
+    from datetime import timedelta
+    from app.services.audit_analytics_service import AuditAnalyticsService
+    last_day = AuditAnalyticsService.last_closed_day()
+    written = AuditAnalyticsService.rollup_days(last_day - timedelta(days=days - 1), last_day)
+    print(f'Rolled up {written} days')
+
+@app.cli.command()
+@click.option('--project-id', default=None, help='Only rebuild this project')
+@click.option('--full', is_flag=True, help='Rebuild every row instead of only stale ones')
+def refresh_rtm(project_id, full):
+    """Refresh the materialized requirements traceability matrix"""
+    from app.models.validation import ValidationProject
+    from app.services.traceability_service import TraceabilityService
+    project_ids = [project_id] if project_id else [p.id for p in ValidationProject.query.with_entities(ValidationProject.id)]
+    for pid in project_ids:
+        if full:
+            written = TraceabilityService.refresh_project(pid)
+        else:
+            written = TraceabilityService.refresh_stale(pid)
+        db.session.commit()
+        print(f'{pid}: {written} requirements')
+
+@app.cli.command()
+@click.option('--project-id', default=None, help='Only refresh this project')
+def refresh_test_coverage(project_id):
+    """Store current test coverage snapshots (schedule after execution batches)"""
+    from app.models.validation import ValidationProject
+    from app.services.test_management_service import TestManagementService
+    project_ids = [project_id] if project_id else [p.id for p in ValidationProject.query.with_entities(ValidationProject.id)]
+    for pid in project_ids:
+        counts = TestManagementService.refresh_test_coverage(pid)
+        db.session.commit()
+        print(f"{pid}: {counts['executed_test_cases']}/{counts['total_test_cases']} test cases executed")
+
+@app.cli.command()
+@click.option('--project-id', default=None, help='Only rebuild this project')
+def rebuild_deviation_index(project_id):
+    """Rebuild the open-deviation index from failed tests"""
+    from app.models.validation import ValidationProject
+    from app.services.deviation_index_service import DeviationIndexService
+    project_ids = [project_id] if project_id else [p.id for p in ValidationProject.query.with_entities(ValidationProject.id)]
+    for pid in project_ids:
+        written = DeviationIndexService.rebuild_project(pid)
+        db.session.commit()
+        print(f'{pid}: {written} open deviations')
+
 if __name__ == '__main__':
     socketio.run(app, debug=True, host='0.0.0.0', port=5002)
\ No newline at end of file